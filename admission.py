@@ -0,0 +1,543 @@
+"""Admission control and fair queuing for LLM calls.
+
+Nothing used to limit concurrent LLM calls: one recruiter's batch could
+push every worker into provider 429s and slow everybody else. Every call
+through `S1NGULARITYAgent._call_llm` now passes `AdmissionController`:
+
+- Global and per-user concurrency caps
+- A tokens-per-minute budget, charged with the estimated prompt size
+  (`estimate_tokens`) before the provider sees the request
+- Weighted fair queuing: waiting calls are tagged with virtual finish
+  times per (user, session) flow, so a batch of 500 evaluations interleaves
+  with other recruiters' chats instead of queuing in front of them. A
+  user's sessions split that user's share, and batch work gets a lower
+  weight than interactive chat
+- Deadline-aware shedding: a caller with a deadline whose predicted wait
+  exceeds it is rejected immediately (`AdmissionRejected`, served as 503 with
+  Retry-After) instead of timing out after the provider call
+
+Every uvicorn worker (and worker.py) has its own controller. With Redis
+configured, `SharedLimits` enforces the same caps and token budget across
+all of them: a call admitted locally also takes a lease in Redis before it
+reaches the provider. Without Redis the caps apply per process.
+
+Queue depth, in-flight calls, wait times and rejections are in `stats()`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from llm_router import LLMRequest
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Rough characters per token for prompt-size estimates
+CHARS_PER_TOKEN = 4
+
+
+class AdmissionRejected(Exception):
+    """Raised when a call is shed before reaching the provider."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"LLM capacity exceeded ({reason}); retry after {math.ceil(retry_after)}s")
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+@dataclass
+class Caller:
+    """Who an LLM call is for (the fairness and deadline unit)."""
+    user: str
+    session: Optional[str] = None
+    weight: float = 1.0  # Relative share while backlogged
+    max_wait: Optional[float] = None  # Seconds before shedding; None waits indefinitely
+
+    @property
+    def flow(self) -> Tuple[str, str]:
+        return self.user, self.session or self.user
+
+
+BACKGROUND_CALLER = Caller(user="background", weight=0.5)
+
+
+def estimate_tokens(request: LLMRequest) -> int:
+    """Prompt tokens of a request, estimated from its compiled size."""
+    chars = len(request.system_prompt) + len(request.user_message)
+    chars += sum(len(message.get("content") or "") for message in request.history or [])
+    if request.context:
+        chars += len(str(request.context))
+    return chars // CHARS_PER_TOKEN + 1
+
+
+# KEYS: in-flight leases, the user's leases, token log
+# ARGV: now, lease expiry, max concurrent, max per user, tokens/minute, tokens, lease ID, key TTL
+# Returns 1 (admitted), 0 (concurrency cap), 2 (per-user cap), -1 (token budget)
+_ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then return 0 end
+if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[4]) then return 2 end
+if tonumber(ARGV[5]) > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', tonumber(ARGV[1]) - 60)
+    local used = 0
+    for _, member in ipairs(redis.call('ZRANGE', KEYS[3], 0, -1)) do
+        used = used + tonumber(string.match(member, '^(%d+):'))
+    end
+    if used > 0 and used + tonumber(ARGV[6]) > tonumber(ARGV[5]) then return -1 end
+    redis.call('ZADD', KEYS[3], ARGV[1], ARGV[6] .. ':' .. ARGV[7])
+    redis.call('EXPIRE', KEYS[3], 120)
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[7])
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[7])
+redis.call('EXPIRE', KEYS[1], ARGV[8])
+redis.call('EXPIRE', KEYS[2], ARGV[8])
+return 1
+"""
+_SHARED_REASONS = {0: "concurrency", 2: "per_user", -1: "token_budget"}
+
+
+class SharedLimits:
+    """Concurrency caps and token budget shared by all processes (Redis).
+
+    In-flight calls are leases in sorted sets scored by expiry, so slots of
+    a crashed process free themselves after `lease_seconds`. If Redis is
+    unreachable, calls are admitted on the per-process caps alone.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        max_concurrent: int,
+        max_per_user: int,
+        tokens_per_minute: int = 0,
+        lease_seconds: float = 300.0,
+        key_prefix: str = "s1ngularity:admission",
+    ):
+        """Initialize shared limits.
+
+        Args:
+            redis_url: Redis holding the leases and token log
+            max_concurrent: LLM calls in flight across all processes
+            max_per_user: LLM calls in flight per user across all processes
+            tokens_per_minute: Estimated prompt tokens per rolling minute
+                across all processes (0 disables the budget)
+            lease_seconds: A lease not released by then is reclaimed
+            key_prefix: Redis key prefix
+        """
+        self.redis_url = redis_url
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_user = max(1, max_per_user)
+        self.tokens_per_minute = tokens_per_minute
+        self.lease_seconds = lease_seconds
+        self.key_prefix = key_prefix
+        self._redis = None
+        self._script = None
+        self._redis_checked = False
+
+    @property
+    def active(self) -> bool:
+        return self._redis is not None
+
+    async def _redis_client(self):
+        if not self._redis_checked:
+            self._redis_checked = True
+            try:
+                client = aioredis.from_url(self.redis_url, decode_responses=True)
+                await client.ping()
+                self._redis = client
+                self._script = client.register_script(_ACQUIRE_SCRIPT)
+            except Exception as e:
+                print(f"Admission Redis unavailable ({e}); LLM caps apply per process")
+        return self._redis
+
+    async def try_acquire(self, user: str, tokens: int) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Take a lease for one call.
+
+        Returns:
+            (admitted, lease ID or None without Redis, reason when refused)
+        """
+        if await self._redis_client() is None:
+            return True, None, None
+        now = time.time()
+        lease = uuid.uuid4().hex
+        try:
+            status = await self._script(
+                keys=[
+                    f"{self.key_prefix}:in_flight",
+                    f"{self.key_prefix}:user:{user}",
+                    f"{self.key_prefix}:tokens",
+                ],
+                args=[
+                    now, now + self.lease_seconds, self.max_concurrent, self.max_per_user,
+                    self.tokens_per_minute, max(tokens, 1), lease, int(self.lease_seconds * 2),
+                ],
+            )
+        except Exception as e:
+            print(f"Admission Redis call failed ({e}); admitting on per-process caps")
+            return True, None, None
+        if int(status) == 1:
+            return True, lease, None
+        return False, None, _SHARED_REASONS.get(int(status), "capacity")
+
+    async def release(self, user: str, lease: str) -> None:
+        """Free a lease (the token charge stays for its minute)."""
+        try:
+            await self._redis.zrem(f"{self.key_prefix}:in_flight", lease)
+            await self._redis.zrem(f"{self.key_prefix}:user:{user}", lease)
+        except Exception as e:
+            print(f"Admission Redis release failed ({e}); lease expires in {self.lease_seconds:.0f}s")
+
+
+@dataclass
+class _Waiter:
+    caller: Caller
+    tokens: int
+    start: float
+    finish: float
+    enqueued: float
+    future: asyncio.Future = field(repr=False)
+
+
+class AdmissionController:
+    """Concurrency caps, token budget, weighted fair queuing and shedding."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        max_per_user: int = 4,
+        tokens_per_minute: int = 0,
+        interactive_max_wait: float = 10.0,
+        batch_weight: float = 0.5,
+        default_service_seconds: float = 5.0,
+        window: int = 500,
+        shared: Optional[SharedLimits] = None,
+    ):
+        """Initialize admission controller.
+
+        Args:
+            max_concurrent: LLM calls in flight across all users
+            max_per_user: LLM calls in flight per user
+            tokens_per_minute: Estimated prompt tokens admitted per rolling
+                minute (0 disables the budget)
+            interactive_max_wait: Seconds an interactive caller waits before
+                being shed with 503
+            batch_weight: Fair-queuing weight of batch callers (interactive
+                callers have 1.0)
+            default_service_seconds: Assumed call duration until measured
+                (used to predict queue waits)
+            window: Recent wait samples kept for percentiles
+            shared: Cluster-wide caps checked after the local ones (optional)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_user = max(1, max_per_user)
+        self.tokens_per_minute = tokens_per_minute
+        self.interactive_max_wait = interactive_max_wait
+        self.batch_weight = batch_weight
+        self._service_seconds = default_service_seconds
+        self.shared = shared
+
+        self._queues: Dict[Tuple[str, str], Deque[_Waiter]] = {}
+        self._flow_finish: Dict[Tuple[str, str], float] = {}
+        self._virtual_time = 0.0
+        self._in_flight = 0
+        self._user_in_flight: Dict[str, int] = defaultdict(int)
+        self._token_log: Deque[Tuple[float, int]] = deque()
+        self._tokens_in_window = 0
+        self._refill_timer: Optional[asyncio.TimerHandle] = None
+
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._admitted = 0
+        self._rejected: Dict[str, int] = defaultdict(int)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def caller_for(self, user: Optional[str], session: Optional[str], batch: bool = False) -> Caller:
+        """Interactive callers are shed after `interactive_max_wait`; batch
+        callers wait indefinitely at `batch_weight`."""
+        if batch:
+            return Caller(user=user or session or "anonymous", session=session, weight=self.batch_weight)
+        return Caller(user=user or session or "anonymous", session=session, max_wait=self.interactive_max_wait)
+
+    @asynccontextmanager
+    async def admit(self, caller: Caller, tokens: int) -> AsyncIterator[None]:
+        """Hold an admission slot for the duration of one provider call.
+
+        Raises:
+            AdmissionRejected: Predicted or actual wait exceeds `caller.max_wait`
+        """
+        lease = await self.acquire(caller, tokens)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(caller, time.monotonic() - started)
+            if lease is not None:
+                await self.shared.release(caller.user, lease)
+
+    async def acquire(self, caller: Caller, tokens: int) -> Optional[str]:
+        """Wait for (or be refused) an admission slot; pair with `release`.
+
+        Returns:
+            The shared lease to release with `SharedLimits.release` (None
+            without shared limits)
+        """
+        now = time.monotonic()
+        if caller.max_wait is not None:
+            predicted = self.predict_wait(caller, tokens)
+            if predicted > caller.max_wait:
+                self._rejected["predicted_wait"] += 1
+                raise AdmissionRejected("queue full", predicted)
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(caller, tokens, *self._tag(caller, tokens), now, loop.create_future())
+        self._queues.setdefault(caller.flow, deque()).append(waiter)
+        self._dispatch()
+        try:
+            if caller.max_wait is None:
+                await waiter.future
+            else:
+                await asyncio.wait_for(asyncio.shield(waiter.future), caller.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the wait ended: give the slot back
+                self.release(caller, None)
+            else:
+                waiter.future.cancel()
+                self._remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._rejected["deadline"] += 1
+                raise AdmissionRejected("deadline exceeded", self._service_seconds)
+            raise
+        lease = await self._acquire_shared(caller, tokens, now) if self.shared is not None else None
+        self._waits.append(time.monotonic() - now)
+        return lease
+
+    async def _acquire_shared(self, caller: Caller, tokens: int, enqueued: float) -> Optional[str]:
+        """Hold the local slot until the cluster-wide limits admit the call too."""
+        delay = 0.05
+        try:
+            while True:
+                admitted, lease, reason = await self.shared.try_acquire(caller.user, tokens)
+                if admitted:
+                    return lease
+                waited = time.monotonic() - enqueued
+                if caller.max_wait is not None and waited + delay > caller.max_wait:
+                    self._rejected[f"shared_{reason}"] += 1
+                    raise AdmissionRejected(f"cluster {reason.replace('_', ' ')}", self._service_seconds)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 1.0)
+        except BaseException:
+            self.release(caller, None)
+            raise
+
+    def release(self, caller: Caller, duration: Optional[float]) -> None:
+        """Free a slot; `duration` (seconds) feeds the service-time estimate."""
+        self._in_flight -= 1
+        self._user_in_flight[caller.user] -= 1
+        if self._user_in_flight[caller.user] <= 0:
+            del self._user_in_flight[caller.user]
+        if duration is not None:
+            self._service_seconds = 0.9 * self._service_seconds + 0.1 * duration
+        self._dispatch()
+
+    def predict_wait(self, caller: Caller, tokens: int) -> float:
+        """Seconds until a new call from `caller` would be admitted (estimate).
+
+        Under fair queuing every backlogged flow gets about as many turns as
+        this caller's flow before the new call runs, so only that many
+        waiters per flow count as "ahead".
+        """
+        own = len(self._queues.get(caller.flow, ())) + 1
+        ahead = sum(min(len(queue), own) for flow, queue in self._queues.items() if flow != caller.flow)
+        ahead += own - 1
+        free = self.max_concurrent - self._in_flight
+        wait = 0.0
+        if ahead >= free:
+            wait = (ahead - free + 1) / self.max_concurrent * self._service_seconds
+        if self._user_in_flight.get(caller.user, 0) >= self.max_per_user:
+            wait = max(wait, self._service_seconds)
+        return max(wait, self._budget_wait(tokens))
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight calls, wait percentiles and rejections."""
+        waits = np.array(self._waits) if self._waits else None
+        depth_by_user: Dict[str, int] = defaultdict(int)
+        for (user, _), queue in self._queues.items():
+            depth_by_user[user] += len(queue)
+        busiest = sorted(depth_by_user.items(), key=lambda item: -item[1])[:10]
+        self._expire_tokens(time.monotonic())
+        return {
+            "scope": "cluster" if self.shared is not None and self.shared.active else "process",
+            "in_flight": self._in_flight,
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "queue_depth": sum(depth_by_user.values()),
+            "queued_flows": len(self._queues),
+            "queue_depth_by_user": dict(busiest),
+            "tokens_last_minute": self._tokens_in_window,
+            "tokens_per_minute": self.tokens_per_minute or None,
+            "admitted": self._admitted,
+            "rejected": dict(self._rejected),
+            "wait_p50_ms": round(float(np.percentile(waits, 50)) * 1000, 3) if waits is not None else None,
+            "wait_p95_ms": round(float(np.percentile(waits, 95)) * 1000, 3) if waits is not None else None,
+            "service_ms": round(self._service_seconds * 1000, 3),
+        }
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def _tag(self, caller: Caller, tokens: int) -> Tuple[float, float]:
+        """Virtual (start, finish) times; a user's backlogged sessions share its weight."""
+        sessions = 1 + sum(
+            1 for (user, session), queue in self._queues.items()
+            if user == caller.user and session != caller.flow[1] and queue
+        )
+        weight = max(caller.weight, 1e-3) / sessions
+        start = max(self._virtual_time, self._flow_finish.get(caller.flow, 0.0))
+        finish = start + max(tokens, 1) / weight
+        self._flow_finish[caller.flow] = finish
+        return start, finish
+
+    def _dispatch(self) -> None:
+        """Admit waiters in virtual-finish order while capacity and budget allow."""
+        now = time.monotonic()
+        self._expire_tokens(now)
+        while self._in_flight < self.max_concurrent:
+            best: Optional[_Waiter] = None
+            for queue in self._queues.values():
+                head = queue[0]
+                if self._user_in_flight.get(head.caller.user, 0) >= self.max_per_user:
+                    continue
+                if best is None or head.finish < best.finish:
+                    best = head
+            if best is None:
+                return
+            if best.future.done():  # Cancelled while queued
+                self._pop(best)
+                continue
+            if self._budget_wait(best.tokens) > 0:
+                self._schedule_refill(now)
+                return
+            self._pop(best)
+            self._virtual_time = max(self._virtual_time, best.start)
+            self._in_flight += 1
+            self._user_in_flight[best.caller.user] += 1
+            self._admitted += 1
+            if self.tokens_per_minute:
+                self._token_log.append((now, best.tokens))
+                self._tokens_in_window += best.tokens
+            best.future.set_result(None)
+
+    def _pop(self, waiter: _Waiter) -> None:
+        queue = self._queues[waiter.caller.flow]
+        queue.popleft()
+        if not queue:
+            del self._queues[waiter.caller.flow]
+            if not self._queues:
+                self._flow_finish.clear()  # Idle: restart virtual time
+                self._virtual_time = 0.0
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.caller.flow)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[waiter.caller.flow]
+        self._dispatch()
+
+    # ------------------------------------------------------------------
+    # Token budget
+    # ------------------------------------------------------------------
+
+    def _expire_tokens(self, now: float) -> None:
+        while self._token_log and now - self._token_log[0][0] >= 60:
+            self._tokens_in_window -= self._token_log.popleft()[1]
+
+    def _budget_wait(self, tokens: int) -> float:
+        """Seconds until `tokens` fit the rolling budget (an oversized call
+        runs alone once the window is empty)."""
+        if not self.tokens_per_minute or not self._token_log:
+            return 0.0
+        needed = self._tokens_in_window + tokens - self.tokens_per_minute
+        if needed <= 0:
+            return 0.0
+        now = time.monotonic()
+        freed = 0
+        for admitted_at, count in self._token_log:
+            freed += count
+            if freed >= needed:
+                return max(0.0, admitted_at + 60 - now)
+        return max(0.0, self._token_log[-1][0] + 60 - now)
+
+    def _schedule_refill(self, now: float) -> None:
+        if self._refill_timer is not None or not self._token_log:
+            return
+        delay = max(0.01, self._token_log[0][0] + 60 - now)
+
+        def refill() -> None:
+            self._refill_timer = None
+            self._dispatch()
+
+        self._refill_timer = asyncio.get_running_loop().call_later(delay, refill)
+
+
+# Global admission controller instance
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get or create global admission controller instance."""
+    global _admission_controller
+    if _admission_controller is None:
+        max_concurrent = int(os.getenv("LLM_MAX_CONCURRENT", "16"))
+        max_per_user = int(os.getenv("LLM_MAX_CONCURRENT_PER_USER", "4"))
+        tokens_per_minute = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+        redis_url = os.getenv("LLM_ADMISSION_REDIS_URL") or os.getenv("REDIS_URL")
+        shared = None
+        if REDIS_AVAILABLE and redis_url:
+            shared = SharedLimits(
+                redis_url,
+                max_concurrent=max_concurrent,
+                max_per_user=max_per_user,
+                tokens_per_minute=tokens_per_minute,
+                lease_seconds=float(os.getenv("LLM_ADMISSION_LEASE_SECONDS", "300")),
+            )
+        _admission_controller = AdmissionController(
+            max_concurrent=max_concurrent,
+            max_per_user=max_per_user,
+            tokens_per_minute=tokens_per_minute,
+            interactive_max_wait=float(os.getenv("LLM_ADMISSION_MAX_WAIT", "10")),
+            batch_weight=float(os.getenv("LLM_BATCH_WEIGHT", "0.5")),
+            shared=shared,
+        )
+    return _admission_controller
+
+
+__all__ = [
+    "BACKGROUND_CALLER",
+    "AdmissionController",
+    "AdmissionRejected",
+    "Caller",
+    "SharedLimits",
+    "estimate_tokens",
+    "get_admission_controller",
+]
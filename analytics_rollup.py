@@ -0,0 +1,570 @@
+"""Incremental analytics rollups into the `analytics_metrics` table.
+
+Implements the aggregate metrics from s1ngularity-analytics-insights.json as
+hourly and daily pre-aggregations per dimension. Each source table is rolled
+up from a high-water mark (last processed primary key) so every run only
+touches new rows, and dashboards read the small rollup table instead of
+scanning the interaction tables.
+
+`SessionHistory.message_count` is incremented in place, which a primary-key
+high-water mark cannot see: the session writer adds each flushed increment
+to the daily `message_count` rollup in the same transaction
+(`record_messages`), and the first run seeds the messages stored before that.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Float, String, case, cast, func, insert, literal, select, union_all, update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import (
+    AnalyticsMetric,
+    CandidateInteraction,
+    DatabaseManager,
+    FeedbackLog,
+    SessionHistory,
+    get_db_manager,
+)
+
+WATERMARK_METRIC = "rollup_high_water_mark"
+MESSAGE_METRIC = "message_count"
+# Watermark row marking the message_count seed as done
+_MESSAGE_SEED = "session_history.message_count"
+PERIODS = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+}
+
+# (metric_name, period, period_start, dimension_type, dimension_value)
+_MetricKey = Tuple[str, str, datetime, str, str]
+
+
+@dataclass(frozen=True)
+class RollupSource:
+    """An append-only source table and the metrics derived from it."""
+    table: str
+    model: Any
+    time_column: str
+    count_metric: str
+    dimensions: Dict[str, str] = field(default_factory=dict)  # dimension_type -> column
+    score_column: Optional[str] = None  # Rolled up as <column>_sum / <column>_count
+
+
+ROLLUP_SOURCES: List[RollupSource] = [
+    RollupSource(
+        table="session_history",
+        model=SessionHistory,
+        time_column="created_at",
+        count_metric="session_count",
+        dimensions={"task_type": "task_type"},
+    ),
+    RollupSource(
+        table="candidate_interactions",
+        model=CandidateInteraction,
+        time_column="timestamp",
+        count_metric="interaction_count",
+        dimensions={"job_role": "job_id", "action": "action"},
+        score_column="match_score",
+    ),
+    RollupSource(
+        table="feedback_logs",
+        model=FeedbackLog,
+        time_column="timestamp",
+        count_metric="feedback_count",
+        dimensions={"error_type": "error_type", "severity": "severity"},
+    ),
+]
+
+
+def _bucket_start(timestamp: datetime, period: str) -> datetime:
+    if period == "hourly":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def record_messages(db: AsyncSession, messages: int, at: Optional[datetime] = None) -> None:
+    """Add chat messages to the daily `message_count` rollup.
+
+    Runs in the caller's transaction, so the rollup moves together with the
+    session rows. Concurrent first writers of a day may each insert a row;
+    readers sum them.
+    """
+    if not messages:
+        return
+    now = datetime.utcnow()
+    start = _bucket_start(at or now, "daily")
+    bucket = (
+        AnalyticsMetric.metric_name == MESSAGE_METRIC,
+        AnalyticsMetric.period == "daily",
+        AnalyticsMetric.period_start == start,
+        AnalyticsMetric.dimension_type == "all",
+    )
+    updated = await db.execute(
+        update(AnalyticsMetric)
+        .where(*bucket)
+        .values(metric_value=AnalyticsMetric.metric_value + messages, timestamp=now)
+        .execution_options(synchronize_session=False)
+    )
+    if updated.rowcount == 0:
+        await db.execute(insert(AnalyticsMetric).values(
+            timestamp=now,
+            metric_name=MESSAGE_METRIC,
+            metric_value=messages,
+            metric_unit="count",
+            dimension_type="all",
+            dimension_value="all",
+            period="daily",
+            period_start=start,
+            period_end=start + PERIODS["daily"],
+        ))
+
+
+class AnalyticsRollup:
+    """Maintains hourly/daily `AnalyticsMetric` rollups from high-water marks.
+
+    Rows newer than `lag_seconds` are left for the next run so in-flight
+    transactions have committed before their IDs fall below the mark. Every
+    worker schedules runs, but a run only proceeds in the process holding
+    the database-wide "analytics_rollup" lock, so deltas are added once.
+    """
+
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        interval_seconds: int = 300,
+        batch_size: int = 50_000,
+        lag_seconds: int = 60,
+        summary_cache_ttl: float = 5.0,
+    ):
+        """Initialize analytics rollup job.
+
+        Args:
+            db_manager: Database manager providing the job's session
+            interval_seconds: Seconds between background rollup runs
+            batch_size: Source rows aggregated per query
+            lag_seconds: Skip rows younger than this
+            summary_cache_ttl: Seconds to reuse a computed summary (0 disables)
+        """
+        self.db_manager = db_manager or get_db_manager()
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.lag_seconds = lag_seconds
+        self.summary_cache_ttl = summary_cache_ttl
+
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._summary_lock = asyncio.Lock()
+        self._summary_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._has_rollups = False
+
+    # ------------------------------------------------------------------
+    # Rollup job
+    # ------------------------------------------------------------------
+
+    async def run(self) -> Dict[str, int]:
+        """Roll up all sources once.
+
+        Returns:
+            Number of new source rows processed per table (empty if another
+            process is running the rollup)
+        """
+        async with self._lock, self.db_manager.exclusive("analytics_rollup") as acquired:
+            if not acquired:
+                return {}
+            processed: Dict[str, int] = {}
+            async with self.db_manager.async_session() as db:
+                for source in ROLLUP_SOURCES:
+                    processed[source.table] = await self._rollup_source(db, source)
+                await self._seed_messages(db)
+                await db.commit()
+            self._has_rollups = self._has_rollups or any(processed.values())
+            return processed
+
+    async def _rollup_source(self, db: AsyncSession, source: RollupSource) -> int:
+        model = source.model
+        watermark_row = await self._watermark_row(db, source.table)
+        watermark = int(watermark_row.metric_value) if watermark_row else 0
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lag_seconds)
+        upper = (await db.execute(
+            select(func.max(model.id)).where(
+                model.id > watermark,
+                getattr(model, source.time_column) <= cutoff,
+            )
+        )).scalar()
+        if upper is None:
+            return 0
+
+        columns = [model.id, getattr(model, source.time_column)]
+        columns += [getattr(model, column) for column in source.dimensions.values()]
+        if source.score_column:
+            columns.append(getattr(model, source.score_column))
+
+        deltas: Dict[_MetricKey, float] = {}
+        processed = 0
+        low = watermark
+        while low < upper:
+            high = min(low + self.batch_size, upper)
+            result = await db.execute(
+                select(*columns).where(model.id > low, model.id <= high)
+            )
+            for row in result:
+                self._accumulate(deltas, source, row)
+                processed += 1
+            low = high
+
+        await self._apply(db, deltas)
+
+        if watermark_row is None:
+            watermark_row = AnalyticsMetric(
+                metric_name=WATERMARK_METRIC,
+                metric_unit="id",
+                dimension_type="source_table",
+                dimension_value=source.table,
+                metric_value=0,
+            )
+            db.add(watermark_row)
+        watermark_row.metric_value = float(upper)
+        watermark_row.timestamp = datetime.utcnow()
+        return processed
+
+    async def _seed_messages(self, db: AsyncSession) -> None:
+        """Once: roll up messages stored before the writer recorded them.
+
+        One statement reads the stored total and the already-recorded
+        increments from the same snapshot; a session row and its recorded
+        increment commit together, so the difference is exactly the
+        unrecorded history.
+        """
+        if await self._watermark_row(db, _MESSAGE_SEED) is not None:
+            return
+        stored = select(func.coalesce(func.sum(SessionHistory.message_count), 0)).scalar_subquery()
+        recorded = (
+            select(func.coalesce(func.sum(AnalyticsMetric.metric_value), 0))
+            .where(AnalyticsMetric.metric_name == MESSAGE_METRIC, AnalyticsMetric.period == "daily")
+            .scalar_subquery()
+        )
+        first = select(func.min(SessionHistory.created_at)).scalar_subquery()
+        unrecorded, first_session = (await db.execute(select(stored - recorded, first))).one()
+        if unrecorded:
+            await record_messages(db, int(unrecorded), at=first_session)
+        db.add(AnalyticsMetric(
+            metric_name=WATERMARK_METRIC,
+            metric_unit="seed",
+            dimension_type="source_table",
+            dimension_value=_MESSAGE_SEED,
+            metric_value=1,
+        ))
+
+    @staticmethod
+    def _accumulate(deltas: Dict[_MetricKey, float], source: RollupSource, row) -> None:
+        timestamp = row[1]
+        dimension_values = row[2:2 + len(source.dimensions)]
+        score = row[-1] if source.score_column else None
+
+        dimensions = [("all", "all")] + [
+            (dimension_type, str(value) if value is not None else "unknown")
+            for dimension_type, value in zip(source.dimensions, dimension_values)
+        ]
+        for period in PERIODS:
+            start = _bucket_start(timestamp, period)
+            for dimension_type, dimension_value in dimensions:
+                key = (source.count_metric, period, start, dimension_type, dimension_value)
+                deltas[key] = deltas.get(key, 0.0) + 1
+                if score is not None:
+                    for suffix, value in (("_sum", score), ("_count", 1)):
+                        key = (source.score_column + suffix, period, start, dimension_type, dimension_value)
+                        deltas[key] = deltas.get(key, 0.0) + value
+
+    @staticmethod
+    async def _apply(db: AsyncSession, deltas: Dict[_MetricKey, float]) -> None:
+        """Add deltas onto existing metric rows, creating missing ones."""
+        if not deltas:
+            return
+
+        earliest = min(key[2] for key in deltas)
+        result = await db.execute(
+            select(
+                AnalyticsMetric.id,
+                AnalyticsMetric.metric_name,
+                AnalyticsMetric.period,
+                AnalyticsMetric.period_start,
+                AnalyticsMetric.dimension_type,
+                AnalyticsMetric.dimension_value,
+                AnalyticsMetric.metric_value,
+            ).where(
+                AnalyticsMetric.metric_name.in_({key[0] for key in deltas}),
+                AnalyticsMetric.period.in_(list(PERIODS)),
+                AnalyticsMetric.period_start >= earliest,
+            )
+        )
+        existing = {tuple(row[1:6]): (row[0], row[6]) for row in result}
+
+        now = datetime.utcnow()
+        updates: List[Dict[str, Any]] = []
+        inserts: List[Dict[str, Any]] = []
+        for key, delta in deltas.items():
+            if key in existing:
+                metric_id, value = existing[key]
+                updates.append({"id": metric_id, "metric_value": value + delta, "timestamp": now})
+                continue
+            metric_name, period, start, dimension_type, dimension_value = key
+            inserts.append({
+                "timestamp": now,
+                "metric_name": metric_name,
+                "metric_value": delta,
+                "metric_unit": "score" if metric_name.endswith("_sum") else "count",
+                "dimension_type": dimension_type,
+                "dimension_value": dimension_value,
+                "period": period,
+                "period_start": start,
+                "period_end": start + PERIODS[period],
+            })
+
+        # Bulk ORM operations: executemany instead of per-object flushes
+        if updates:
+            await db.execute(update(AnalyticsMetric), updates)
+        if inserts:
+            await db.execute(insert(AnalyticsMetric), inserts)
+
+    @staticmethod
+    async def _watermark_row(db: AsyncSession, table: str) -> Optional[AnalyticsMetric]:
+        result = await db.execute(
+            select(AnalyticsMetric).where(
+                AnalyticsMetric.metric_name == WATERMARK_METRIC,
+                AnalyticsMetric.dimension_value == table,
+            )
+        )
+        return result.scalars().first()
+
+    # ------------------------------------------------------------------
+    # Background scheduling
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start periodic rollups on the running event loop."""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop periodic rollups."""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.run()
+            except Exception as e:
+                print(f"Analytics rollup failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    async def read_summary(self, db: AsyncSession, use_cache: bool = True) -> Dict[str, Any]:
+        """Build the analytics summary from rollups plus the un-rolled tail.
+
+        Results are cached in-process for `summary_cache_ttl` seconds and
+        concurrent misses share a single query.
+        """
+        if use_cache and self.summary_cache_ttl > 0:
+            cached = self._summary_cache
+            if cached and time.monotonic() - cached[0] < self.summary_cache_ttl:
+                return cached[1]
+            async with self._summary_lock:
+                cached = self._summary_cache
+                if cached and time.monotonic() - cached[0] < self.summary_cache_ttl:
+                    return cached[1]
+                summary = await self._query_summary(db)
+                self._summary_cache = (time.monotonic(), summary)
+                return summary
+        return await self._query_summary(db)
+
+    async def _query_summary(self, db: AsyncSession) -> Dict[str, Any]:
+        """Fetch every summary figure in one round trip."""
+        result = await db.execute(self._summary_statement(self._has_rollups))
+
+        totals: Dict[str, float] = {}
+        feedback_by_type: Dict[Optional[str], int] = {}
+        for kind, key, value in result:
+            value = float(value or 0)
+            if key is not None and kind != "feedback_tail":
+                # Only rollup rows carry a dimension value
+                self._has_rollups = True
+            if kind == "feedback_rollup":
+                key = None if key == "unknown" else key
+                feedback_by_type[key] = feedback_by_type.get(key, 0) + int(value)
+            elif kind == "feedback_tail":
+                feedback_by_type[key] = feedback_by_type.get(key, 0) + int(value)
+            else:
+                totals[kind] = totals.get(kind, 0.0) + value
+
+        score_sum = totals.get("match_score_sum", 0.0)
+        score_count = totals.get("match_score_count", 0.0)
+        return {
+            "total_sessions": int(totals.get("session_count", 0)),
+            "total_messages": int(totals.get(MESSAGE_METRIC, 0)),
+            "total_candidate_interactions": int(totals.get("interaction_count", 0)),
+            "average_match_score": score_sum / score_count if score_count else 0.0,
+            "total_feedback_logs": sum(feedback_by_type.values()),
+            "feedback_by_type": feedback_by_type,
+        }
+
+    @staticmethod
+    def _summary_statement(small_tail: bool = True):
+        """UNION ALL of (kind, key, value) rows: daily rollups + tails.
+
+        Each tail reads only rows above its table's high-water mark (a
+        primary-key range scan), so with no rollups yet the same statement
+        degrades to a single-pass live aggregate. `small_tail` only changes
+        the plan for the grouped feedback tail, not the result.
+        """
+        def watermark(table: str):
+            return func.coalesce(
+                select(func.max(AnalyticsMetric.metric_value))
+                .where(
+                    AnalyticsMetric.metric_name == WATERMARK_METRIC,
+                    AnalyticsMetric.dimension_value == table,
+                )
+                .scalar_subquery(),
+                0,
+            )
+
+        def row(kind: str, key, value):
+            return (
+                literal(kind).label("kind"),
+                cast(key, String).label("key"),
+                cast(value, Float).label("value"),
+            )
+
+        rollups = select(
+            AnalyticsMetric.metric_name,
+            AnalyticsMetric.dimension_type,
+            AnalyticsMetric.dimension_value,
+            func.sum(AnalyticsMetric.metric_value).label("value"),
+        ).where(
+            AnalyticsMetric.period == "daily",
+            # error_type is only a dimension of feedback_count
+            AnalyticsMetric.dimension_type.in_(["all", "error_type"]),
+        ).group_by(
+            AnalyticsMetric.metric_name,
+            AnalyticsMetric.dimension_type,
+            AnalyticsMetric.dimension_value,
+        ).subquery()
+
+        rollup_kind = case(
+            (rollups.c.dimension_type == "all", rollups.c.metric_name),
+            else_=literal("feedback_rollup"),
+        )
+
+        # One pass per source tail; each CTE is read by several UNION arms.
+        # Messages come from rollups only (recorded as they are flushed)
+        sessions = select(
+            func.count(SessionHistory.id).label("tail_count"),
+        ).where(
+            SessionHistory.id > watermark("session_history")
+        ).cte("session_tail")
+        interactions = select(
+            func.count(CandidateInteraction.id).label("tail_count"),
+            func.sum(CandidateInteraction.match_score).label("score_sum"),
+            func.count(CandidateInteraction.match_score).label("score_count"),
+        ).where(
+            CandidateInteraction.id > watermark("candidate_interactions")
+        ).cte("interaction_tail")
+        # With rollups present, MATERIALIZED keeps the small primary-key range
+        # scan; otherwise the planner scans the whole error_type index for the
+        # GROUP BY, which is only the better plan when the tail is the table
+        feedback = select(FeedbackLog.error_type).where(
+            FeedbackLog.id > watermark("feedback_logs")
+        ).cte("feedback_tail")
+        if small_tail:
+            feedback = feedback.prefix_with("MATERIALIZED")
+
+        return union_all(
+            select(
+                rollup_kind.label("kind"),
+                cast(rollups.c.dimension_value, String).label("key"),
+                cast(rollups.c.value, Float).label("value"),
+            ),
+            select(*row("session_count", None, sessions.c.tail_count)),
+            select(*row("interaction_count", None, interactions.c.tail_count)),
+            select(*row("match_score_sum", None, interactions.c.score_sum)),
+            select(*row("match_score_count", None, interactions.c.score_count)),
+            select(*row("feedback_tail", feedback.c.error_type, func.count()))
+            .group_by(feedback.c.error_type),
+        )
+
+    async def read_series(
+        self,
+        db: AsyncSession,
+        metric_name: str,
+        period: str = "daily",
+        dimension_type: str = "all",
+        since: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Read a rolled-up metric as a time series per dimension value."""
+        stmt = select(
+            AnalyticsMetric.period_start,
+            AnalyticsMetric.dimension_value,
+            AnalyticsMetric.metric_value,
+        ).where(
+            AnalyticsMetric.metric_name == metric_name,
+            AnalyticsMetric.period == period,
+            AnalyticsMetric.dimension_type == dimension_type,
+        )
+        if since is not None:
+            stmt = stmt.where(AnalyticsMetric.period_start >= since)
+        result = await db.execute(stmt.order_by(AnalyticsMetric.period_start))
+        return [
+            {
+                "period_start": period_start.isoformat(),
+                "dimension_value": dimension_value,
+                "value": value,
+            }
+            for period_start, dimension_value, value in result
+        ]
+
+
+# Global rollup instance
+_analytics_rollup: Optional[AnalyticsRollup] = None
+
+
+def get_analytics_rollup() -> AnalyticsRollup:
+    """Get or create global analytics rollup instance."""
+    global _analytics_rollup
+    if _analytics_rollup is None:
+        _analytics_rollup = AnalyticsRollup(
+            interval_seconds=int(os.getenv("ANALYTICS_ROLLUP_INTERVAL", "300")),
+            batch_size=int(os.getenv("ANALYTICS_ROLLUP_BATCH_SIZE", "50000")),
+            lag_seconds=int(os.getenv("ANALYTICS_ROLLUP_LAG", "60")),
+            summary_cache_ttl=float(os.getenv("ANALYTICS_SUMMARY_CACHE_TTL", "5")),
+        )
+    return _analytics_rollup
+
+
+__all__ = [
+    "AnalyticsRollup",
+    "RollupSource",
+    "ROLLUP_SOURCES",
+    "PERIODS",
+    "get_analytics_rollup",
+    "record_messages",
+]
@@ -0,0 +1,482 @@
+"""Time-partitioned storage and archival for append-only tables.
+
+`feedback_logs` and `candidate_interactions` grow forever. On Postgres they
+are converted to monthly RANGE partitions on `timestamp`; the archive job
+exports partitions older than the retention window to gzip-compressed JSONL
+files on local disk, then detaches and drops them. On SQLite (no native
+partitioning) the same monthly files are written and the rows deleted.
+
+Archived months stay queryable through `iter_archive` (served by the
+`/archive` export endpoints).
+
+Every worker runs partition maintenance at startup (and the archive loop,
+if enabled); both only proceed in the process holding the database-wide
+"archive" lock, so partition DDL and exports never run concurrently.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database import CandidateInteraction, DatabaseManager, FeedbackLog, get_db_manager
+
+try:
+    import orjson
+
+    def _dumps(row: Dict[str, Any]) -> bytes:
+        return orjson.dumps(row)
+except ImportError:  # pragma: no cover - optional dependency
+    def _dumps(row: Dict[str, Any]) -> bytes:
+        return json.dumps(row, default=str).encode()
+
+
+ARCHIVED_TABLES = {
+    "feedback_logs": FeedbackLog,
+    "candidate_interactions": CandidateInteraction,
+}
+EXPORT_CHUNK_SIZE = 10_000
+
+
+def month_start(value: date) -> date:
+    """First day of the month containing `value`."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Shift a first-of-month date by `months`."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, start: date) -> str:
+    return f"{table}_p{start:%Y_%m}"
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class PartitionManager:
+    """Monthly RANGE partitioning on `timestamp` (Postgres only)."""
+
+    def __init__(self, months_ahead: int = 3):
+        """Initialize partition manager.
+
+        Args:
+            months_ahead: Future monthly partitions kept pre-created
+        """
+        self.months_ahead = months_ahead
+
+    @staticmethod
+    async def is_partitioned(conn: AsyncConnection, table: str) -> bool:
+        result = await conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"
+        ), {"table": table})
+        return result.scalar() is not None
+
+    @staticmethod
+    async def list_partitions(conn: AsyncConnection, table: str) -> List[Tuple[str, date]]:
+        """Monthly partitions of `table` as (name, month start), oldest first."""
+        result = await conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table"
+        ), {"table": table})
+        prefix = f"{table}_p"
+        partitions = []
+        for (name,) in result:
+            if name.startswith(prefix):
+                start = datetime.strptime(name[len(prefix):], "%Y_%m").date()
+                partitions.append((name, start))
+        return sorted(partitions, key=lambda p: p[1])
+
+    async def ensure_partitioned(self, conn: AsyncConnection, table: str) -> bool:
+        """Convert a plain table into a monthly-partitioned one (one transaction).
+
+        The primary key becomes (id, timestamp), as Postgres requires the
+        partition key in every unique constraint. Existing rows are copied.
+
+        Returns:
+            True if the table was converted
+        """
+        if await self.is_partitioned(conn, table):
+            return False
+
+        model = ARCHIVED_TABLES[table]
+        bounds = (await conn.execute(
+            select(func.min(model.timestamp), func.max(model.timestamp))
+        )).one()
+        today = month_start(date.today())
+        first = month_start(bounds[0].date()) if bounds[0] else today
+        last = max(month_start(bounds[1].date()) if bounds[1] else today, today)
+
+        staging = f"{table}_partitioned"
+        await conn.execute(text(
+            f'CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ("timestamp")'
+        ))
+        await conn.execute(text(f'ALTER TABLE {staging} ADD PRIMARY KEY (id, "timestamp")'))
+
+        month = first
+        while month <= add_months(last, self.months_ahead):
+            await self._create_partition(conn, staging, table, month)
+            month = add_months(month, 1)
+        await conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {staging} DEFAULT"))
+
+        await conn.execute(text(f"INSERT INTO {staging} SELECT * FROM {table}"))
+        await conn.execute(text(f"ALTER SEQUENCE IF EXISTS {table}_id_seq OWNED BY {staging}.id"))
+        await conn.execute(text(f"DROP TABLE {table}"))
+        await conn.execute(text(f"ALTER TABLE {staging} RENAME TO {table}"))
+
+        # Recreate the model's indexes as partitioned indexes
+        for index in model.__table__.indexes:
+            await conn.run_sync(lambda sync_conn, index=index: index.create(sync_conn))
+        return True
+
+    async def ensure_future_partitions(self, conn: AsyncConnection, table: str) -> int:
+        """Create missing partitions from this month to `months_ahead`.
+
+        Rows that landed in the DEFAULT partition for a new month are moved
+        into it.
+
+        Returns:
+            Number of partitions created
+        """
+        if not await self.is_partitioned(conn, table):
+            return 0
+
+        existing = {start for _, start in await self.list_partitions(conn, table)}
+        created = 0
+        month = month_start(date.today())
+        for _ in range(self.months_ahead + 1):
+            if month not in existing:
+                await self._create_partition_from_default(conn, table, month)
+                created += 1
+            month = add_months(month, 1)
+        return created
+
+    @staticmethod
+    async def _create_partition(conn: AsyncConnection, parent: str, table: str, start: date) -> None:
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, start)} PARTITION OF {parent} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+        ))
+
+    async def _create_partition_from_default(self, conn: AsyncConnection, table: str, start: date) -> None:
+        end = add_months(start, 1)
+        in_range = f"\"timestamp\" >= '{start.isoformat()}' AND \"timestamp\" < '{end.isoformat()}'"
+        has_default_rows = (await conn.execute(text(
+            f"SELECT 1 FROM {table}_default WHERE {in_range} LIMIT 1"
+        ))).scalar() is not None
+
+        if not has_default_rows:
+            await self._create_partition(conn, table, table, start)
+            return
+
+        await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {table}_default"))
+        await self._create_partition(conn, table, table, start)
+        await conn.execute(text(f"INSERT INTO {table} SELECT * FROM {table}_default WHERE {in_range}"))
+        await conn.execute(text(f"DELETE FROM {table}_default WHERE {in_range}"))
+        await conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {table}_default DEFAULT"))
+
+
+class ArchiveManager:
+    """Moves months past the retention window into compressed JSONL files."""
+
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        archive_dir: Optional[Path] = None,
+        retention_months: int = 6,
+        interval_hours: float = 24,
+        partitions: Optional[PartitionManager] = None,
+    ):
+        """Initialize archive manager.
+
+        Args:
+            db_manager: Database manager
+            archive_dir: Root directory for archive files
+            retention_months: Full months kept in the live tables
+            interval_hours: Hours between background archive runs
+            partitions: Partition manager (Postgres)
+        """
+        self.db_manager = db_manager or get_db_manager()
+        self.archive_dir = archive_dir or Path("archive")
+        self.retention_months = retention_months
+        self.interval_hours = interval_hours
+        self.partitions = partitions or PartitionManager()
+
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @property
+    def is_postgres(self) -> bool:
+        return self.db_manager.engine.dialect.name == "postgresql"
+
+    def cutoff(self) -> date:
+        """Months starting before this date are archived."""
+        return add_months(month_start(date.today()), -self.retention_months)
+
+    def archive_path(self, table: str, start: date) -> Path:
+        return self.archive_dir / table / f"{start:%Y-%m}.jsonl.gz"
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    async def maintain_partitions(self) -> Dict[str, int]:
+        """Pre-create upcoming monthly partitions (Postgres only).
+
+        Returns:
+            Partitions created per table (empty if another process holds the lock)
+        """
+        if not self.is_postgres:
+            return {}
+        async with self._lock, self.db_manager.exclusive("archive") as acquired:
+            if not acquired:
+                print("Partition maintenance running in another worker; skipped")
+                return {}
+            return await self._maintain_partitions()
+
+    async def _maintain_partitions(self) -> Dict[str, int]:
+        created = {}
+        async with self.db_manager.engine.begin() as conn:
+            for table in ARCHIVED_TABLES:
+                created[table] = await self.partitions.ensure_future_partitions(conn, table)
+        return created
+
+    async def run(self) -> Dict[str, List[str]]:
+        """Archive every month older than the retention window.
+
+        Returns:
+            Archived months per table (empty if another process holds the lock)
+        """
+        async with self._lock, self.db_manager.exclusive("archive") as acquired:
+            if not acquired:
+                print("Archive run in progress in another worker; skipped")
+                return {}
+            archived: Dict[str, List[str]] = {}
+            for table in ARCHIVED_TABLES:
+                archived[table] = await self._archive_table(table)
+            if self.is_postgres:
+                await self._maintain_partitions()
+            return archived
+
+    async def _archive_table(self, table: str) -> List[str]:
+        model = ARCHIVED_TABLES[table]
+        cutoff = self.cutoff()
+        archived = []
+
+        partitioned = False
+        if self.is_postgres:
+            async with self.db_manager.engine.connect() as conn:
+                partitioned = await self.partitions.is_partitioned(conn, table)
+
+        if partitioned:
+            async with self.db_manager.engine.connect() as conn:
+                months = [
+                    (name, start)
+                    for name, start in await self.partitions.list_partitions(conn, table)
+                    if start < cutoff
+                ]
+            for name, start in months:
+                await self._export(model, self.archive_path(table, start), source=name)
+                async with self.db_manager.engine.begin() as conn:
+                    await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                    await conn.execute(text(f"DROP TABLE {name}"))
+                archived.append(f"{start:%Y-%m}")
+            return archived
+
+        async with self.db_manager.engine.connect() as conn:
+            oldest = (await conn.execute(
+                select(func.min(model.timestamp)).where(model.timestamp < cutoff)
+            )).scalar()
+        if oldest is None:
+            return archived
+
+        start = month_start(oldest.date())
+        while start < cutoff:
+            end = add_months(start, 1)
+            exported_ids: List[int] = []
+            rows = await self._export(
+                model, self.archive_path(table, start), start=start, end=end, exported_ids=exported_ids
+            )
+            if rows:
+                # Only the exported rows: a late row committed after the
+                # export stays for the next run
+                async with self.db_manager.engine.begin() as conn:
+                    for offset in range(0, len(exported_ids), EXPORT_CHUNK_SIZE):
+                        await conn.execute(delete(model).where(
+                            model.id.in_(exported_ids[offset:offset + EXPORT_CHUNK_SIZE])
+                        ))
+                archived.append(f"{start:%Y-%m}")
+            start = end
+        return archived
+
+    async def _export(
+        self,
+        model,
+        path: Path,
+        source: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        exported_ids: Optional[List[int]] = None,
+    ) -> int:
+        """Stream rows into `path` (written atomically). Returns row count.
+
+        The IDs of exported rows are appended to `exported_ids` if given.
+        """
+        columns = [column.name for column in model.__table__.columns]
+        id_position = columns.index("id")
+        if source is not None:
+            column_list = ", ".join(f'"{c}"' for c in columns)
+            stmt = text(f"SELECT {column_list} FROM {source}")
+        else:
+            stmt = select(*model.__table__.columns).where(
+                model.timestamp >= start, model.timestamp < end
+            )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        rows = 0
+        fh = await asyncio.to_thread(gzip.open, tmp_path, "wb")
+        try:
+            # A month archived in an earlier run (late rows) is extended
+            if path.exists():
+                await asyncio.to_thread(fh.write, await asyncio.to_thread(_read_gzip, path))
+            async with self.db_manager.engine.connect() as conn:
+                result = await conn.stream(stmt)
+                async for chunk in result.partitions(EXPORT_CHUNK_SIZE):
+                    data = b"".join(
+                        _dumps({c: _serialize(v) for c, v in zip(columns, row)}) + b"\n"
+                        for row in chunk
+                    )
+                    await asyncio.to_thread(fh.write, data)
+                    rows += len(chunk)
+                    if exported_ids is not None:
+                        exported_ids.extend(row[id_position] for row in chunk)
+        finally:
+            await asyncio.to_thread(fh.close)
+
+        if rows:
+            os.replace(tmp_path, path)
+        else:
+            tmp_path.unlink(missing_ok=True)
+        return rows
+
+    # ------------------------------------------------------------------
+    # Reading archives
+    # ------------------------------------------------------------------
+
+    def list_archives(self) -> Dict[str, List[str]]:
+        """Archived months per table."""
+        return {
+            table: sorted(
+                p.name.split(".")[0]
+                for p in (self.archive_dir / table).glob("*.jsonl.gz")
+            )
+            for table in ARCHIVED_TABLES
+        }
+
+    def iter_archive(
+        self,
+        table: str,
+        from_month: Optional[str] = None,
+        to_month: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[bytes]:
+        """Yield archived JSONL lines for a month range, optionally filtered.
+
+        Args:
+            table: Archived table name
+            from_month: First month (YYYY-MM, inclusive)
+            to_month: Last month (YYYY-MM, inclusive)
+            filters: Equality filters on row fields (e.g. session_id)
+        """
+        if table not in ARCHIVED_TABLES:
+            raise ValueError(f"Unknown archived table: {table}")
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+
+        for month in self.list_archives()[table]:
+            if (from_month and month < from_month) or (to_month and month > to_month):
+                continue
+            with gzip.open(self.archive_dir / table / f"{month}.jsonl.gz", "rb") as fh:
+                for line in fh:
+                    if filters:
+                        row = json.loads(line)
+                        if any(str(row.get(k)) != str(v) for k, v in filters.items()):
+                            continue
+                    yield line
+
+    # ------------------------------------------------------------------
+    # Background scheduling
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start periodic archiving on the running event loop."""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop periodic archiving."""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.run()
+            except Exception as e:
+                print(f"Archive run failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval_hours * 3600)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _read_gzip(path: Path) -> bytes:
+    with gzip.open(path, "rb") as fh:
+        return fh.read()
+
+
+# Global archive manager instance
+_archive_manager: Optional[ArchiveManager] = None
+
+
+def get_archive_manager() -> ArchiveManager:
+    """Get or create global archive manager instance."""
+    global _archive_manager
+    if _archive_manager is None:
+        _archive_manager = ArchiveManager(
+            archive_dir=Path(os.getenv("ARCHIVE_DIR", "archive")),
+            retention_months=int(os.getenv("ARCHIVE_RETENTION_MONTHS", "6")),
+            interval_hours=float(os.getenv("ARCHIVE_INTERVAL_HOURS", "24")),
+            partitions=PartitionManager(
+                months_ahead=int(os.getenv("PARTITION_MONTHS_AHEAD", "3")),
+            ),
+        )
+    return _archive_manager
+
+
+__all__ = [
+    "ARCHIVED_TABLES",
+    "ArchiveManager",
+    "PartitionManager",
+    "get_archive_manager",
+]
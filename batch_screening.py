@@ -0,0 +1,279 @@
+"""Batch resume screening against one JD.
+
+Screening N resumes through `/chat` rebuilds the system prompt and re-sends
+the JD N times, serially. `BatchScreener` does it once per batch:
+
+- The RESUME_SCREENING system prompt, the JD (plus its stored analysis,
+  if any) and the output contract are compiled into one shared prefix; each
+  evaluation only adds the resume as the user message
+- The prefix is marked cacheable for the provider (Anthropic
+  `cache_control`; OpenAI caches identical prefixes automatically). The
+  first evaluation runs alone to warm the cache, the rest run with bounded
+  concurrency
+- Rate-limit errors (HTTP 429) are retried with the provider's
+  Retry-After, so throughput settles at the provider limit
+- Results stream back as they complete and `CandidateInteraction` rows are
+  written in bulk, each batch on its own short session (no connection is
+  held through the LLM calls)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import CandidateInteraction, DatabaseManager, ResumeDocument, get_db_manager
+from jd_cache import get_jd_cache
+
+# complete(system_prompt, user_message) -> response text
+CompleteFn = Callable[[str, str], Awaitable[str]]
+
+SCREENING_CONTRACT = """# BATCH SCREENING
+The user message is ONE candidate's resume. Evaluate it against the job
+description above using the screening modules. Reply with a JSON object only:
+{"match_score": 0-100, "skill_match": 0-100, "experience_match": 0-100,
+ "green_flags": ["..."], "yellow_flags": ["..."], "red_flags": ["..."],
+ "recommendation": "advance" | "review" | "reject",
+ "summary": "<two sentences>"}"""
+
+_JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
+_SCORE_FIELDS = ("match_score", "skill_match", "experience_match")
+_FLAG_FIELDS = ("green_flags", "yellow_flags", "red_flags")
+
+
+class ScreeningResume(BaseModel):
+    """One resume in a batch (inline text or a stored resume_id)."""
+    text: Optional[str] = None
+    resume_id: Optional[int] = Field(None, description="Stored resume (resume_documents.id)")
+    candidate_id: Optional[str] = None
+    candidate_email: Optional[str] = None
+    candidate_name: Optional[str] = None
+    source: Optional[str] = Field(None, description="Label echoed in results (e.g. filename)")
+
+
+class ScreeningBatchRequest(BaseModel):
+    """One JD and the resumes to screen against it."""
+    jd_text: str = Field(..., min_length=1)
+    resumes: List[ScreeningResume] = Field(..., min_length=1, max_length=1000)
+    session_id: Optional[str] = None
+    user_id: Optional[str] = Field(None, description="Recruiter ID (fair share of LLM capacity)")
+    job_id: Optional[str] = None
+    persist: bool = Field(True, description="Write CandidateInteraction rows")
+
+
+def parse_screening(response: str) -> Dict[str, Any]:
+    """Scores and flags from an evaluation (tolerates prose around the JSON)."""
+    match = _JSON_RE.search(response)
+    try:
+        data = json.loads(match.group(0)) if match else {}
+    except json.JSONDecodeError:
+        data = {}
+    result: Dict[str, Any] = {}
+    for name in _SCORE_FIELDS:
+        try:
+            result[name] = max(0.0, min(100.0, float(data[name])))
+        except (KeyError, TypeError, ValueError):
+            result[name] = None
+    for name in _FLAG_FIELDS:
+        value = data.get(name)
+        result[name] = [str(v) for v in value] if isinstance(value, list) else []
+    result["recommendation"] = data.get("recommendation")
+    result["summary"] = data.get("summary") or (None if data else response.strip()[:500])
+    return result
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait if `error` is a provider rate limit (HTTP 429), else None."""
+    if getattr(error, "status_code", None) != 429:
+        return None
+    response = getattr(error, "response", None)
+    header = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(header) if header else 0.0
+    except ValueError:
+        return 0.0
+
+
+class BatchScreener:
+    """Screens resumes against one JD with a shared, cached prompt prefix."""
+
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        concurrency: int = 8,
+        max_retries: int = 5,
+        write_batch_size: int = 50,
+        max_resume_chars: int = 20000,
+    ):
+        """Initialize batch screener.
+
+        Args:
+            db_manager: Database manager for the prefix reads and result writes
+            concurrency: Evaluations in flight per batch
+            max_retries: Retries per evaluation on provider rate limits
+            write_batch_size: CandidateInteraction rows per bulk insert
+            max_resume_chars: Longer resumes are truncated
+        """
+        self.db_manager = db_manager or get_db_manager()
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.write_batch_size = write_batch_size
+        self.max_resume_chars = max_resume_chars
+
+    async def build_prefix(self, db: AsyncSession, system_prompt: str, request: ScreeningBatchRequest) -> str:
+        """Shared system prompt: modules, JD, stored JD analysis, output contract."""
+        parts = [system_prompt, f"\n\n# JOB DESCRIPTION\n{request.jd_text.strip()}"]
+        jd_cache = get_jd_cache()
+        content_hash = jd_cache.key_for_jd(request.jd_text)
+        analysis = None
+        if content_hash:
+            analysis = await jd_cache.lookup(db, content_hash, job_id=request.job_id)
+        if analysis is not None:
+            parsed = {
+                "core_skills": analysis.core_skills,
+                "nice_to_have": analysis.nice_to_have,
+                "red_flags": analysis.red_flags,
+            }
+            parts.append(
+                "\n\n# STORED JD ANALYSIS\n"
+                + json.dumps({k: v for k, v in parsed.items() if v}, indent=2)
+            )
+        parts.append(f"\n\n{SCREENING_CONTRACT}")
+        return "".join(parts)
+
+    async def _load_texts(self, db: AsyncSession, resumes: List[ScreeningResume]) -> None:
+        """Fill in text (and missing candidate fields) for stored resumes."""
+        wanted = [r.resume_id for r in resumes if r.resume_id is not None and not r.text]
+        if not wanted:
+            return
+        result = await db.execute(select(ResumeDocument).where(ResumeDocument.id.in_(wanted)))
+        documents = {document.id: document for document in result.scalars()}
+        for resume in resumes:
+            document = documents.get(resume.resume_id)
+            if document is not None and not resume.text:
+                resume.text = document.text
+                resume.candidate_id = resume.candidate_id or document.candidate_id
+                resume.candidate_email = resume.candidate_email or document.candidate_email
+                resume.candidate_name = resume.candidate_name or document.candidate_name
+
+    async def _evaluate(self, complete: CompleteFn, prefix: str, text: str) -> str:
+        attempt = 0
+        while True:
+            try:
+                return await complete(prefix, text[: self.max_resume_chars])
+            except Exception as e:
+                wait = _retry_after(e)
+                if wait is None or attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(wait or min(30.0, 2 ** attempt) + random.random())
+                attempt += 1
+
+    async def screen(
+        self,
+        complete: CompleteFn,
+        system_prompt: str,
+        request: ScreeningBatchRequest,
+        session_id: str,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Screen every resume, yielding one event per candidate as it completes."""
+        async with self.db_manager.async_session() as db:
+            await self._load_texts(db, request.resumes)
+            prefix = await self.build_prefix(db, system_prompt, request)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        warmed = asyncio.Event()
+        pending_rows: List[Dict[str, Any]] = []
+
+        async def run(index: int, resume: ScreeningResume) -> Dict[str, Any]:
+            event: Dict[str, Any] = {
+                "index": index,
+                "resume_id": resume.resume_id,
+                "candidate_id": resume.candidate_id,
+                "candidate_email": resume.candidate_email,
+                "candidate_name": resume.candidate_name,
+                "source": resume.source,
+            }
+            try:
+                if not resume.text:
+                    event.update(status="error", error="No resume text (unknown resume_id?)")
+                    return event
+                if index > 0:
+                    await warmed.wait()  # later requests read the cached prefix
+                async with semaphore:
+                    response = await self._evaluate(complete, prefix, resume.text)
+            except Exception as e:
+                event.update(status="error", error=str(e))
+                return event
+            finally:
+                if index == 0:
+                    warmed.set()
+            event.update(status="ok", **parse_screening(response))
+            return event
+
+        tasks = [asyncio.ensure_future(run(i, resume)) for i, resume in enumerate(request.resumes)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                event = await next_done
+                # Unparseable evaluations are streamed but not stored
+                if request.persist and event["status"] == "ok" and event["match_score"] is not None:
+                    pending_rows.append(self._row(request, session_id, event))
+                    if len(pending_rows) >= self.write_batch_size:
+                        await self._write(pending_rows)
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            if pending_rows:
+                await self._write(pending_rows)
+
+    @staticmethod
+    def _row(request: ScreeningBatchRequest, session_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "session_id": session_id,
+            "candidate_id": event["candidate_id"],
+            "candidate_email": event["candidate_email"],
+            "job_id": request.job_id,
+            **{name: event[name] for name in _SCORE_FIELDS},
+            **{name: event[name] or None for name in _FLAG_FIELDS},
+        }
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        async with self.db_manager.async_session() as db:
+            await db.execute(insert(CandidateInteraction), rows)
+            await db.commit()
+        for session_id in {row["session_id"] for row in rows}:
+            await self.db_manager.mark_write(session_id)
+        rows.clear()
+
+
+# Global batch screener instance
+_batch_screener: Optional[BatchScreener] = None
+
+
+def get_batch_screener() -> BatchScreener:
+    """Get or create global batch screener instance."""
+    global _batch_screener
+    if _batch_screener is None:
+        _batch_screener = BatchScreener(
+            concurrency=int(os.getenv("SCREENING_CONCURRENCY", "8")),
+            max_retries=int(os.getenv("SCREENING_MAX_RETRIES", "5")),
+            write_batch_size=int(os.getenv("SCREENING_WRITE_BATCH_SIZE", "50")),
+            max_resume_chars=int(os.getenv("SCREENING_MAX_RESUME_CHARS", "20000")),
+        )
+    return _batch_screener
+
+
+__all__ = [
+    "BatchScreener",
+    "ScreeningBatchRequest",
+    "ScreeningResume",
+    "get_batch_screener",
+    "parse_screening",
+]
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark /analytics/summary aggregation strategies.
+
+Compares, at each row count:
+1. Legacy: six sequential aggregate queries
+2. Single statement (no rollups yet - full live aggregate)
+3. Single statement over rollups + un-rolled tail
+4. Cached summary (in-process TTL cache hit)
+
+Usage:
+    python bench_analytics_summary.py --rows 100000 1000000
+    python bench_analytics_summary.py --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from analytics_rollup import AnalyticsRollup
+from database import (
+    CandidateInteraction,
+    DatabaseManager,
+    FeedbackLog,
+    SessionHistory,
+)
+
+CHUNK = 20_000
+
+
+async def seed(db_manager: DatabaseManager, rows: int):
+    """Bulk insert `rows` interactions, rows/2 feedback logs, rows/50 sessions."""
+    now = datetime.utcnow() - timedelta(minutes=5)
+    error_types = ["hallucination", "bias", "technical_error", "user_feedback", None]
+
+    async with db_manager.engine.begin() as conn:
+        sessions = max(rows // 50, 1)
+        for start in range(0, sessions, CHUNK):
+            await conn.execute(insert(SessionHistory), [
+                {
+                    "session_id": f"bench-{i}",
+                    "message_count": random.randint(1, 40),
+                    "created_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 90)),
+                    "last_active": now,
+                }
+                for i in range(start, min(start + CHUNK, sessions))
+            ])
+
+        for start in range(0, rows, CHUNK):
+            await conn.execute(insert(CandidateInteraction), [
+                {
+                    "session_id": f"bench-{i % sessions}",
+                    "timestamp": now - timedelta(minutes=random.randint(0, 60 * 24 * 90)),
+                    "job_id": f"job-{i % 200}",
+                    "match_score": random.choice([None, random.uniform(20, 100)]),
+                    "action": random.choice(["viewed", "shortlisted", "rejected"]),
+                }
+                for i in range(start, min(start + CHUNK, rows))
+            ])
+
+        for start in range(0, rows // 2, CHUNK):
+            await conn.execute(insert(FeedbackLog), [
+                {
+                    "session_id": f"bench-{i % sessions}",
+                    "timestamp": now - timedelta(minutes=random.randint(0, 60 * 24 * 90)),
+                    "error_type": random.choice(error_types),
+                }
+                for i in range(start, min(start + CHUNK, rows // 2))
+            ])
+
+
+async def legacy_summary(db):
+    """The original six sequential aggregate queries."""
+    total_sessions = (await db.execute(select(func.count(SessionHistory.id)))).scalar()
+    total_messages = (await db.execute(select(func.sum(SessionHistory.message_count)))).scalar() or 0
+    total_interactions = (await db.execute(select(func.count(CandidateInteraction.id)))).scalar()
+    avg_match_score = (await db.execute(select(func.avg(CandidateInteraction.match_score)))).scalar() or 0
+    total_feedback = (await db.execute(select(func.count(FeedbackLog.id)))).scalar()
+    result = await db.execute(
+        select(FeedbackLog.error_type, func.count(FeedbackLog.id)).group_by(FeedbackLog.error_type)
+    )
+    return {
+        "total_sessions": total_sessions,
+        "total_messages": int(total_messages),
+        "total_candidate_interactions": total_interactions,
+        "average_match_score": float(avg_match_score),
+        "total_feedback_logs": total_feedback,
+        "feedback_by_type": {row[0]: row[1] for row in result},
+    }
+
+
+async def timed(fn, repeat: int) -> float:
+    """Median wall time of `fn` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def bench(database_url: str, rows: int, repeat: int):
+    db_manager = DatabaseManager(database_url)
+    await db_manager.drop_tables()
+    await db_manager.create_tables()
+
+    print(f"\n🌱 Seeding {rows:,} interactions...")
+    start = time.perf_counter()
+    await seed(db_manager, rows)
+    print(f"   done in {time.perf_counter() - start:.1f}s")
+
+    rollup = AnalyticsRollup(db_manager, lag_seconds=0)
+
+    async with db_manager.async_session() as db:
+        legacy_ms = await timed(lambda: legacy_summary(db), repeat)
+        live_ms = await timed(lambda: rollup.read_summary(db, use_cache=False), repeat)
+        expected = await legacy_summary(db)
+
+    start = time.perf_counter()
+    await rollup.run()
+    rollup_s = time.perf_counter() - start
+
+    async with db_manager.async_session() as db:
+        rolled_ms = await timed(lambda: rollup.read_summary(db, use_cache=False), repeat)
+        await rollup.read_summary(db)
+        cached_ms = await timed(lambda: rollup.read_summary(db), repeat)
+        actual = await rollup.read_summary(db, use_cache=False)
+
+    assert actual["total_messages"] == expected["total_messages"]
+    assert actual["total_candidate_interactions"] == expected["total_candidate_interactions"]
+    assert actual["total_feedback_logs"] == expected["total_feedback_logs"]
+    assert abs(actual["average_match_score"] - expected["average_match_score"]) < 1e-6
+
+    print(f"   initial rollup: {rollup_s:.1f}s")
+    print(f"   {'legacy (6 queries)':<32} {legacy_ms:10.2f} ms")
+    print(f"   {'single statement, no rollups':<32} {live_ms:10.2f} ms")
+    print(f"   {'single statement, rollups':<32} {rolled_ms:10.2f} ms")
+    print(f"   {'cached':<32} {cached_ms:10.4f} ms")
+
+    await db_manager.engine.dispose()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("S1NGULARITY ANALYTICS SUMMARY BENCHMARK")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            database_url = args.database_url or (
+                f"sqlite+aiosqlite:///{os.path.join(tmp, f'bench-{rows}.db')}"
+            )
+            await bench(database_url, rows, args.repeat)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
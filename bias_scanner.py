@@ -0,0 +1,379 @@
+"""Deterministic bias-language scanner for JDs and outreach.
+
+Compiles the term lists of s1ngularity-bias-detection-compliance.json
+(jd_bias_detection.language_analysis and requirements_analysis) into
+literal-prefixed regexes over the lowercased text, so bias checks run
+locally in tens of microseconds instead of sending the whole module to the
+LLM:
+
+- Masculine / feminine-coded terms are matched by stem ("aggressive" also
+  finds "aggressively") and reported as info; the document is flagged
+  when the spec's skew rule fires (5+ gendered terms one direction)
+- Age-discrimination and culture-fit terms are flagged on every match
+- Exclusionary and unnecessary requirements (prose in the spec) are
+  encoded as patterns below, one per `check_for` entry
+- Every flag carries its span, category and a suggested replacement
+
+The LLM is left for nuanced cases: BIAS_CHECK turns that paste a document
+are answered from the scan alone.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from skill_index import load_spec
+
+SPEC_FILE = "s1ngularity-bias-detection-compliance.json"
+
+MASCULINE = "masculine_coded"
+FEMININE = "feminine_coded"
+AGE = "age_discrimination"
+CULTURE_FIT = "culture_fit_language"
+EXCLUSIONARY = "exclusionary_requirements"
+UNNECESSARY = "unnecessary_requirements"
+
+# Per-term replacements in the spirit of the spec's "Suggested fix" lines
+REPLACEMENTS = {
+    "rockstar": "skilled", "ninja": "expert", "guru": "expert",
+    "dominant": "leading", "aggressive": "ambitious", "competitive": "motivated",
+    "recent college grad": "entry-level", "young": "(remove)", "energetic": "motivated",
+    "digital native": "proficient with digital tools", "tech-savvy": "proficient with <specific tools>",
+    "seasoned": "experienced", "mature": "professional", "veteran": "experienced",
+    "culture fit": "values alignment", "like-minded": "collaborative",
+    "passion": "interest", "obsessed": "committed", "work hard play hard": "supportive, high-performing team",
+}
+
+# (category, check, patterns, suggestion) for requirements the spec describes
+# in prose. Patterns run on lowercased text and each starts with a literal
+# word, which lets the regex engine jump straight to candidate positions.
+REQUIREMENT_PATTERNS: Tuple[Tuple[str, str, Tuple[str, ...], str], ...] = (
+    (
+        EXCLUSIONARY, "degree_requirement",
+        tuple(
+            rf"{degree}\s+degree\b(?![^.\n]{{0,60}}\b(?:or equivalent|equivalent experience))"
+            for degree in (r"bachelor'?s", r"master'?s", r"4[- ]year", r"four[- ]year", "college")
+        ),
+        "Bachelor's degree or equivalent experience",
+    ),
+    (
+        EXCLUSIONARY, "experience_cap",
+        (r"no more than\s+\d{1,2}\s*years?\b", r"not more than\s+\d{1,2}\s*years?\b",
+         r"maximum(?: of)?\s+\d{1,2}\s*years?\b", r"less than\s+\d{1,2}\s*years?\b",
+         r"up to\s+\d{1,2}\s*years?\b"),
+        "State the skills needed instead of capping years of experience",
+    ),
+    (
+        EXCLUSIONARY, "long_experience_minimum",
+        (r"must have\s+(?:1\d|[2-9]\d)\+?\s*years?\b", r"minimum(?: of)?\s+(?:1\d|[2-9]\d)\+?\s*years?\b",
+         r"at least\s+(?:1\d|[2-9]\d)\+?\s*years?\b"),
+        "Describe the required capabilities; long tenure minimums act as an age proxy",
+    ),
+    (
+        EXCLUSIONARY, "local_only",
+        (r"must (?:be|live) local\b", r"locals? only\b", r"local candidates only\b", r"no relocation\b"),
+        "Describe on-site expectations (e.g. 'on-site 3 days/week in Austin')",
+    ),
+    (
+        EXCLUSIONARY, "native_speaker",
+        (r"native(?:[- ]level)?\s+(?:english\s+)?speakers?\b",),
+        "Fluent in English (written and spoken)",
+    ),
+    (
+        UNNECESSARY, "employment_gaps",
+        (r"no (?:employment |work |career )?gaps(?: in (?:employment|work history|your resume))?\b",
+         r"continuous employment\b"),
+        "Remove unless there is a specific business reason",
+    ),
+)
+
+# Suffixes dropped from single-word terms so related forms match
+# ("dominant" -> dominate, "competitive" -> competition, "passion" -> passionate)
+_STEM_SUFFIXES = ("ant", "ent", "ive", "ate", "e", "y")
+
+SEVERITY = {
+    MASCULINE: "info", FEMININE: "info",
+    AGE: "warning", CULTURE_FIT: "warning", EXCLUSIONARY: "warning", UNNECESSARY: "warning",
+}
+
+
+@dataclass
+class BiasFlag:
+    """One flagged span."""
+    category: str
+    term: str
+    start: int
+    end: int
+    severity: str
+    suggestion: Optional[str] = None
+
+
+@dataclass
+class BiasScan:
+    """Scan result for one document."""
+    flags: List[BiasFlag] = field(default_factory=list)
+    gendered: Dict[str, int] = field(default_factory=lambda: {MASCULINE: 0, FEMININE: 0})
+    gender_skew: Optional[str] = None  # category that tripped the skew rule
+
+    @property
+    def issues(self) -> List[BiasFlag]:
+        """Flags that need action (gendered terms only count through the skew rule)."""
+        return [flag for flag in self.flags if flag.severity != "info"]
+
+    @property
+    def flagged(self) -> bool:
+        return bool(self.issues) or self.gender_skew is not None
+
+    def to_flags(self) -> List[Dict[str, Any]]:
+        """Compact flags for storage (CandidateInteraction.bias_flags)."""
+        flags = [asdict(flag) for flag in self.issues]
+        if self.gender_skew:
+            flags.append({
+                "category": self.gender_skew,
+                "term": ", ".join(dict.fromkeys(
+                    f.term.lower() for f in self.flags if f.category == self.gender_skew
+                )),
+                "severity": "warning",
+                "suggestion": "Use neutral terms like 'skilled developer', 'experienced engineer'",
+            })
+        return flags
+
+    def prompt_block(self) -> str:
+        """System-prompt section handing the scan to the LLM (empty if nothing found)."""
+        if not self.flags:
+            return ""
+        unique = {(flag.category, flag.term.lower()): flag for flag in self.flags}
+        terms = "; ".join(
+            f"\"{flag.term}\" ({flag.category}" + (f" → {flag.suggestion})" if flag.suggestion else ")")
+            for flag in unique.values()
+        )
+        skew = (
+            f"\nGender skew: {self.gender_skew} ({self.gendered[MASCULINE]} masculine-coded vs "
+            f"{self.gendered[FEMININE]} feminine-coded)." if self.gender_skew else ""
+        )
+        return (
+            "\n\n# BIAS PRE-SCAN\n"
+            f"A local term scan of the user's text flagged: {terms}.{skew}\n"
+            "Use these flags as found; spend bias review only on what a term list cannot judge "
+            "(context, tone, whether a requirement is justified)."
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "flagged": self.flagged,
+            "gendered": dict(self.gendered),
+            "gender_skew": self.gender_skew,
+            "flags": [asdict(flag) for flag in self.flags],
+        }
+
+
+class BiasScanner:
+    """Compiled scanner over the bias module's term lists."""
+
+    def __init__(self, spec_path: Optional[Path] = None, min_document_chars: int = 200):
+        """Initialize scanner from the bias detection spec.
+
+        Args:
+            spec_path: Path to s1ngularity-bias-detection-compliance.json
+            min_document_chars: BIAS_CHECK messages at least this long are
+                answered from the scan without an LLM call
+        """
+        spec_path = spec_path or Path(os.getenv("MODULES_DIR", ".")) / SPEC_FILE
+        language = load_spec(spec_path)["bias_detection_engine"]["jd_bias_detection"]["language_analysis"]
+        self.min_document_chars = min_document_chars
+
+        gendered = language["gendered_language"]
+        threshold = re.search(r"(\d+)\+", gendered.get("detection", ""))
+        self.skew_threshold = int(threshold.group(1)) if threshold else 5
+        self.recommendations = {
+            MASCULINE: gendered.get("recommendation"),
+            AGE: language["age_discrimination"].get("recommendation"),
+            CULTURE_FIT: language["culture_fit_language"].get("recommendation"),
+            EXCLUSIONARY: language["exclusionary_requirements"].get("recommendation"),
+        }
+
+        # (category, term, suggestion, compiled pattern); patterns match lowercased text
+        self._rules: List[Tuple[str, str, Optional[str], Pattern[str]]] = []
+
+        def add(category: str, term: str, pattern: str, suggestion: Optional[str]) -> None:
+            self._rules.append((category, term, suggestion, re.compile(pattern)))
+
+        for category in (MASCULINE, FEMININE):
+            for term in gendered["examples"][category]:
+                add(category, term, _term_pattern(term), REPLACEMENTS.get(term.lower()))
+        for category, terms in (
+            (AGE, language["age_discrimination"]["problematic_terms"]),
+            (CULTURE_FIT, language["culture_fit_language"]["problematic"]),
+        ):
+            for term in terms:
+                add(category, term, _term_pattern(term), REPLACEMENTS.get(term.lower()))
+        for category, check, patterns, suggestion in REQUIREMENT_PATTERNS:
+            for pattern in patterns:
+                add(category, check, pattern, suggestion)
+
+    def scan(self, text: str) -> BiasScan:
+        """Flag bias-coded language in one document."""
+        lowered = _lower(text)
+        flags = []
+        for category, _, suggestion, pattern in self._rules:
+            for match in pattern.finditer(lowered):
+                start = match.start()
+                if start and lowered[start - 1].isalnum():
+                    continue  # inside a word ("prosupport", "unseasoned")
+                flags.append(BiasFlag(
+                    category=category,
+                    term=text[start:match.end()],
+                    start=start,
+                    end=match.end(),
+                    severity=SEVERITY[category],
+                    suggestion=suggestion,
+                ))
+
+        result = BiasScan()
+        last_end = -1
+        for flag in sorted(flags, key=lambda f: (f.start, -f.end)):
+            if flag.start < last_end:
+                continue  # overlaps a longer, earlier match
+            last_end = flag.end
+            result.flags.append(flag)
+            if flag.category in result.gendered:
+                result.gendered[flag.category] += 1
+
+        masculine, feminine = result.gendered[MASCULINE], result.gendered[FEMININE]
+        if max(masculine, feminine) >= self.skew_threshold and masculine != feminine:
+            result.gender_skew = MASCULINE if masculine > feminine else FEMININE
+        return result
+
+    def scan_many(self, texts: Iterable[str]) -> List[BiasScan]:
+        """Batch `scan`."""
+        return [self.scan(text) for text in texts]
+
+    def answers_locally(self, document: str, context: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether a BIAS_CHECK turn can be answered from the scan alone."""
+        if context and context.get("bias_llm_review"):
+            return False
+        return len(document.strip()) >= self.min_document_chars
+
+
+def _lower(text: str) -> str:
+    """Lowercase without shifting character offsets (a few characters expand)."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+def _term_pattern(term: str) -> str:
+    """Pattern for a spec term, starting with a literal.
+
+    Phrases match with spaces or hyphens between words and an optional
+    plural; single words of 5+ letters match by stem ("aggressive" ->
+    aggressively, "passion" -> passionate).
+    """
+    words = [re.escape(word) for word in re.split(r"[\s-]+", term.strip().lower())]
+    if len(words) > 1 or len(words[0]) < 5:
+        return r"[\s-]+".join(words) + r"s?\b"
+    stem = words[0]
+    for suffix in _STEM_SUFFIXES:
+        if stem.endswith(suffix) and len(stem) - len(suffix) >= 5:
+            stem = stem[:-len(suffix)]
+            break
+    return rf"{stem}[a-z]*"
+
+
+def format_bias_report(scan: BiasScan) -> str:
+    """Markdown report in the bias module's output style."""
+    if not scan.flags:
+        return (
+            "✅ **No flagged language found.** The text contains none of the gendered, "
+            "age-related, culture-fit or exclusionary terms S1NGULARITY checks for.\n\n"
+            "ℹ️ This is a term-level check. Ask for a detailed review to assess "
+            "requirements and tone in context."
+        )
+
+    lines = []
+    by_category: Dict[str, List[BiasFlag]] = {}
+    for flag in scan.flags:
+        by_category.setdefault(flag.category, []).append(flag)
+
+    headings = {
+        AGE: "🚩 **Compliance Issue - age-related language**",
+        CULTURE_FIT: "⚠️ **Diversity Risk - culture-fit language**",
+        EXCLUSIONARY: "⚠️ **Accessibility Issue - exclusionary requirements**",
+        UNNECESSARY: "⚠️ **Potentially Discriminatory - unnecessary requirements**",
+    }
+    for category, heading in headings.items():
+        flags = by_category.get(category)
+        if not flags:
+            continue
+        lines.append(heading)
+        counts: Dict[str, int] = {}
+        first: Dict[str, BiasFlag] = {}
+        for flag in flags:
+            key = flag.term.lower()
+            counts[key] = counts.get(key, 0) + 1
+            first.setdefault(key, flag)
+        for key, flag in first.items():
+            repeat = f" (×{counts[key]})" if counts[key] > 1 else ""
+            fix = f" → {flag.suggestion}" if flag.suggestion else ""
+            lines.append(f"- \"{flag.term}\"{repeat}{fix}")
+        lines.append("")
+
+    masculine, feminine = scan.gendered[MASCULINE], scan.gendered[FEMININE]
+    if masculine or feminine:
+        terms = {
+            category: ", ".join(dict.fromkeys(f.term.lower() for f in by_category.get(category, [])))
+            for category in (MASCULINE, FEMININE)
+        }
+        if scan.gender_skew == MASCULINE:
+            lines.append(
+                f"🚩 **Bias Alert:** {masculine} masculine-coded terms ({terms[MASCULINE]}) vs "
+                f"{feminine} feminine-coded. This may discourage women and non-binary candidates. "
+                "**Suggested fix:** Use neutral terms like 'skilled developer', "
+                "'experienced engineer', 'fast-paced environment'."
+            )
+        elif scan.gender_skew == FEMININE:
+            lines.append(
+                f"⚠️ **Gendered Language:** {feminine} feminine-coded terms ({terms[FEMININE]}) vs "
+                f"{masculine} masculine-coded. Consider balancing the wording."
+            )
+        else:
+            lines.append(
+                f"ℹ️ **Gendered terms:** masculine-coded {masculine}, feminine-coded {feminine} "
+                "- below the skew threshold, no change needed."
+            )
+        lines.append("")
+
+    if not scan.flagged:
+        lines.insert(0, "✅ **No bias issues flagged.**\n")
+    lines.append(
+        "ℹ️ Term-level check. Ask for a detailed review for requirements and tone in context."
+    )
+    return "\n".join(lines).strip()
+
+
+# Global bias scanner instance
+_bias_scanner: Optional[BiasScanner] = None
+
+
+def get_bias_scanner() -> BiasScanner:
+    """Get or create global bias scanner instance."""
+    global _bias_scanner
+    if _bias_scanner is None:
+        _bias_scanner = BiasScanner(
+            min_document_chars=int(os.getenv("BIAS_SCAN_MIN_CHARS", "200")),
+        )
+    return _bias_scanner
+
+
+__all__ = [
+    "BiasFlag",
+    "BiasScan",
+    "BiasScanner",
+    "format_bias_report",
+    "get_bias_scanner",
+]
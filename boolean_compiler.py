@@ -0,0 +1,437 @@
+"""Deterministic Boolean string compiler.
+
+Implements the algorithm in s1ngularity-boolean-engine-v1.json directly, so
+Boolean generation from structured buckets needs no LLM call:
+
+1. Build concept buckets (TITLES, CORE_TECH, PLATFORMS, ...) with MUST /
+   STRONG / OPTIONAL priorities; deduplicate terms across buckets
+2. Expand variants: tech spelling (dots, hyphens, symbols), abbreviation
+   pairs (with their context rules), approved synonym sets, and - for wide
+   searches - morphology or wildcard compression depending on the platform
+3. Enforce the quality limits, dropping OPTIONAL then STRONG terms
+4. Render one line: OR inside each parenthesized bucket, AND between
+   buckets, optional location block and AND NOT exclusions
+
+All vocabularies (synonyms, pairs, wildcard families, platform profiles,
+limits) are read from the spec file. Same input, same output.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from skill_index import SkillNormalizer, get_skill_normalizer
+
+SPEC_FILE = "s1ngularity-boolean-engine-v1.json"
+MODES = ("tight", "standard", "wide", "staged")
+PRIORITIES = ("MUST", "STRONG", "OPTIONAL")
+
+_PLAIN_TERM_RE = re.compile(r"^[A-Za-z0-9]+\*?$")
+_DOTTED_RE = re.compile(r"^(?P<left>[A-Za-z0-9#+]+)\.(?P<right>[A-Za-z]+)$")
+_HYPHENATED_RE = re.compile(r"^(?P<left>[A-Za-z]+)-(?P<right>[A-Za-z]+)$")
+
+# Terms signalling the context required by ambiguous acronyms (AD, CI, CD)
+_ACRONYM_CONTEXT = {
+    "windows_identity": (
+        "windows", "active directory", "identity", "ldap", "sso", "single sign",
+        "mfa", "azure", "office 365", "o365", "group policy", "password", "account",
+    ),
+    "devops": (
+        "devops", "jenkins", "pipeline", "kubernetes", "docker", "terraform",
+        "gitlab", "github actions", "continuous", "deployment", "build", "release",
+    ),
+}
+_ACRONYM_CONTEXT_RULES = {"AD": "windows_identity", "CI": "devops", "CD": "devops"}
+
+
+class BooleanBucket(BaseModel):
+    """A concept bucket of base terms."""
+    name: str = Field(..., description="TITLES, CORE_TECH, PLATFORMS, ACCESS_SECURITY, DOMAIN, SOFT_FILTERS, ...")
+    terms: List[str] = Field(default_factory=list)
+    priority: Optional[str] = Field(None, description="MUST | STRONG | OPTIONAL (defaults from the spec)")
+
+
+class BooleanRequest(BaseModel):
+    """Structured input for the Boolean compiler."""
+    buckets: List[BooleanBucket]
+    platform: str = Field("generic", description="generic, linkedin_recruiter, dice, indeed, ats_generic")
+    mode: str = Field("standard", description="tight, standard, wide or staged")
+    wildcards_allowed: Optional[bool] = Field(None, description="Override the platform profile")
+    include_synonyms: bool = True
+    include_soft_filters: bool = False
+    exclusions: List[str] = Field(default_factory=list)
+    locations: List[str] = Field(default_factory=list)
+    context_text: Optional[str] = Field(None, description="JD text used for acronym context rules")
+
+
+class CompiledBoolean(BaseModel):
+    """Compiler output."""
+    boolean: str
+    preview: List[str]
+    buckets: Dict[str, Dict[str, Any]]
+    stages: Optional[Dict[str, str]] = None
+    warnings: List[str] = Field(default_factory=list)
+    dropped: List[str] = Field(default_factory=list)
+    platform: str
+    mode: str
+
+
+class BooleanCompiler:
+    """Compiles concept buckets into platform-specific Boolean strings."""
+
+    def __init__(self, spec_path: Optional[Path] = None, normalizer: Optional[SkillNormalizer] = None):
+        """Initialize compiler from the Boolean engine spec.
+
+        Args:
+            spec_path: Path to s1ngularity-boolean-engine-v1.json
+            normalizer: Shared skill index used to deduplicate terms across buckets
+        """
+        spec_path = spec_path or Path(os.getenv("MODULES_DIR", ".")) / SPEC_FILE
+        self.normalizer = normalizer or get_skill_normalizer()
+        with open(spec_path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+
+        self.bucket_priorities = {
+            name: config.get("priority", "OPTIONAL")
+            for name, config in spec["concept_buckets"]["bucket_types"].items()
+        }
+        self.bucket_order = list(self.bucket_priorities)
+
+        variants = spec["variant_generation"]
+        spelling = spec["tech_spelling_variant_rules"]
+
+        # Every known spelling, symbol and abbreviation family, keyed by member
+        self._families: Dict[str, List[str]] = {}
+        for examples in (
+            variants["variant_types"]["tech_spelling_variants"]["dot_separated"]["examples"],
+            variants["variant_types"]["tech_spelling_variants"]["hyphenated"]["examples"],
+            spelling["dot_separated_names"]["examples"],
+            spelling["hyphenated_names"]["examples"],
+            variants["variant_types"]["tech_spelling_variants"]["symbols"]["mappings"],
+            variants["variant_types"]["abbreviation_pairs"]["pairs"],
+        ):
+            for forms in examples.values():
+                self._add_family(forms)
+        for mapping in spelling["symbol_expansions"]["mappings"].values():
+            self._add_family(mapping["variants"])
+        for group in spelling["abbreviation_pairs"]["approved_pairs"].values():
+            for forms in group.values():
+                self._add_family(forms)
+
+        self._synonyms: Dict[str, List[str]] = {}
+        synonym_sets = spec["synonym_policy"]["allowed_synonyms"]["industry_standard_equivalents"]["approved_synonym_sets"]
+        for family in synonym_sets.values():
+            members = [family["primary"], *family["synonyms"]]
+            for member in members:
+                self._synonyms[member.lower()] = members
+
+        morphology = variants["variant_types"]["morphological_variants"]
+        self.max_variants = morphology.get("max_variants", 5)
+        self._morphology: Dict[str, List[str]] = {}
+        for word_class in morphology["rules"].values():
+            for base, forms in word_class["examples"].items():
+                self._morphology[base.lower()] = forms
+
+        wildcard = spec["variant_generation"]["wildcard_compression"]["safe_wildcards"]
+        self._wildcards: Dict[str, str] = {}
+        for family in wildcard["approved_patterns"].values():
+            for form in family["expanded"]:
+                self._wildcards[form.lower()] = family["wildcard"]
+        self._prohibited_wildcards = {
+            pattern.lower()
+            for patterns in wildcard["prohibited_patterns"].values()
+            if isinstance(patterns, list)
+            for pattern in patterns
+        }
+
+        self.platforms = {
+            name.replace("_profile", ""): profile
+            for name, profile in spec["platform_profiles"].items()
+            if isinstance(profile, dict)
+        }
+
+        limits = spec["quality_checks"]["length_and_term_limits"]["configurable_parameters"]
+        self.max_terms_per_bucket = limits["max_terms_per_bucket"]
+        self.max_total_terms = limits["max_total_terms"]
+        self.max_length = limits["max_length_chars"]
+
+    def _add_family(self, forms: List[str]) -> None:
+        family = self._families.get(forms[0].lower(), [])
+        merged = _dedupe([*family, *forms])
+        for form in merged:
+            self._families[form.lower()] = merged
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    def compile(self, request: BooleanRequest) -> CompiledBoolean:
+        """Compile a request into a Boolean string (three for staged mode)."""
+        if request.mode not in MODES:
+            raise ValueError(f"Unsupported mode: {request.mode}")
+        if request.platform not in self.platforms:
+            raise ValueError(f"Unsupported platform: {request.platform}")
+
+        wildcards = request.wildcards_allowed
+        if wildcards is None:
+            wildcards = bool(self.platforms[request.platform].get("wildcards_supported"))
+        buckets = self._build_buckets(request)
+        context = self._context(request)
+
+        if request.mode == "staged":
+            stages = {
+                "stage_1_core": self._render(request, buckets, context, "tight", wildcards),
+                "stage_2_expanded": self._render(request, buckets, context, "standard", wildcards, include_domain=True),
+                "stage_3_broad": self._render(request, buckets, context, "wide", wildcards),
+            }
+            compiled = self._render(request, buckets, context, "standard", wildcards, include_domain=True)
+            compiled.stages = {name: stage.boolean for name, stage in stages.items()}
+            compiled.mode = "staged"
+            return compiled
+        return self._render(request, buckets, context, request.mode, wildcards)
+
+    def _build_buckets(self, request: BooleanRequest) -> List[Tuple[str, str, List[str]]]:
+        """(name, priority, terms) per bucket, in spec order, deduplicated across buckets."""
+        seen = set()
+        merged: Dict[str, Tuple[str, List[str]]] = {}
+        for bucket in request.buckets:
+            name = bucket.name.strip().upper()
+            if name == "EXCLUSIONS":
+                continue
+            if name == "SOFT_FILTERS" and not request.include_soft_filters:
+                continue
+            priority = (bucket.priority or self.bucket_priorities.get(name, "OPTIONAL")).upper()
+            if priority not in PRIORITIES:
+                raise ValueError(f"Unsupported priority for {name}: {priority}")
+            terms = merged.setdefault(name, (priority, []))[1]
+            for term in bucket.terms:
+                term = " ".join(term.split())
+                # "AWS" and "Amazon Web Services" are one concept
+                key = self.normalizer.canonical(term).lower()
+                if term and key not in seen:
+                    seen.add(key)
+                    terms.append(term)
+
+        order = {name: i for i, name in enumerate(self.bucket_order)}
+        return [
+            (name, priority, terms)
+            for name, (priority, terms) in sorted(
+                merged.items(), key=lambda item: order.get(item[0], len(order))
+            )
+            if terms
+        ]
+
+    @staticmethod
+    def _context(request: BooleanRequest) -> str:
+        terms = " ".join(term for bucket in request.buckets for term in bucket.terms)
+        return f"{terms} {request.context_text or ''}".lower()
+
+    def expand_term(self, term: str, context: str, synonyms: bool, wide: bool, wildcards: bool) -> List[str]:
+        """Controlled variants of one term (base term first)."""
+        key = term.lower()
+        variants = [term]
+
+        family = self._families.get(key)
+        if family:
+            variants.extend(family)
+        else:
+            dotted = _DOTTED_RE.match(term)
+            hyphenated = _HYPHENATED_RE.match(term)
+            if dotted:
+                left, right = dotted.group("left"), dotted.group("right")
+                variants.extend([f"{left} .{right}", f"{left} {right}"])
+                if left.isalnum():
+                    variants.append(f"{left}{right}")
+            elif hyphenated:
+                variants.append(f"{hyphenated.group('left')} {hyphenated.group('right')}")
+
+        if synonyms and key in self._synonyms:
+            variants.extend(self._synonyms[key])
+
+        if wide:
+            if wildcards:
+                variants = [self._wildcard(v) for v in variants]
+            elif key in self._morphology:
+                variants.extend(self._morphology[key])
+
+        # Ambiguous acronyms only with their required context
+        variants = [
+            v for v in variants
+            if v == term
+            or v.upper() not in _ACRONYM_CONTEXT_RULES
+            or any(signal in context for signal in _ACRONYM_CONTEXT[_ACRONYM_CONTEXT_RULES[v.upper()]])
+        ]
+        return _dedupe(variants)[:self.max_variants]
+
+    def _wildcard(self, variant: str) -> str:
+        pattern = self._wildcards.get(variant.lower())
+        if pattern and pattern.lower() not in self._prohibited_wildcards:
+            return pattern
+        return variant
+
+    def _render(
+        self,
+        request: BooleanRequest,
+        buckets: List[Tuple[str, str, List[str]]],
+        context: str,
+        mode: str,
+        wildcards: bool,
+        include_domain: bool = False,
+    ) -> CompiledBoolean:
+        allowed = {"tight": ("MUST",), "standard": ("MUST", "STRONG"), "wide": PRIORITIES}[mode]
+        synonyms = request.include_synonyms and mode != "tight"
+        wide = mode == "wide"
+
+        clauses: List[Tuple[str, str, List[str]]] = []
+        optional_terms: List[str] = []
+        bucket_json: Dict[str, Dict[str, Any]] = {}
+        for name, priority, terms in buckets:
+            in_scope = priority in allowed or (include_domain and name == "DOMAIN")
+            expanded = _dedupe([
+                variant
+                for term in terms
+                for variant in self.expand_term(term, context, synonyms, wide, wildcards)
+            ])
+            bucket_json[name] = {"priority": priority, "terms": terms, "variants": expanded, "included": in_scope}
+            if not in_scope:
+                continue
+            if priority == "OPTIONAL" and not (include_domain and name == "DOMAIN"):
+                # OPTIONAL buckets share one enrichment clause
+                optional_terms.extend(expanded)
+            else:
+                clauses.append((name, priority, expanded))
+        if optional_terms:
+            clauses.append(("OPTIONAL", "OPTIONAL", _dedupe(optional_terms)))
+
+        clauses, dropped = self._enforce_limits(clauses, request)
+        for name, _, _ in clauses:
+            if name in bucket_json:
+                bucket_json[name]["rendered"] = True
+
+        boolean = " AND ".join(_clause(variants) for _, _, variants in clauses)
+        if request.locations:
+            boolean += f" AND {_clause(request.locations)}"
+        if request.exclusions:
+            boolean += f" AND NOT {_clause(request.exclusions)}"
+
+        return CompiledBoolean(
+            boolean=boolean,
+            preview=[f"{name}: {' OR '.join(_quote(v) for v in variants)}" for name, _, variants in clauses],
+            buckets=bucket_json,
+            warnings=self._warnings(clauses, boolean),
+            dropped=dropped,
+            platform=request.platform,
+            mode=mode,
+        )
+
+    def _enforce_limits(
+        self,
+        clauses: List[Tuple[str, str, List[str]]],
+        request: BooleanRequest,
+    ) -> Tuple[List[Tuple[str, str, List[str]]], List[str]]:
+        """Apply term and length limits, dropping OPTIONAL then STRONG terms."""
+        dropped = [
+            f"{name}: {variant}"
+            for name, _, variants in clauses
+            for variant in variants[self.max_terms_per_bucket:]
+        ]
+        clauses = [
+            (name, priority, variants[:self.max_terms_per_bucket])
+            for name, priority, variants in clauses
+        ]
+
+        def size() -> Tuple[int, int]:
+            total = sum(len(variants) for _, _, variants in clauses)
+            length = len(" AND ".join(_clause(v) for _, _, v in clauses))
+            length += len(_clause(request.locations)) + 5 if request.locations else 0
+            length += len(_clause(request.exclusions)) + 9 if request.exclusions else 0
+            return total, length
+
+        for priority in ("OPTIONAL", "STRONG"):
+            for index in range(len(clauses) - 1, -1, -1):
+                name, clause_priority, variants = clauses[index]
+                while clause_priority == priority and variants:
+                    total, length = size()
+                    if total <= self.max_total_terms and length <= self.max_length:
+                        return [c for c in clauses if c[2]], dropped
+                    dropped.append(f"{name}: {variants.pop()}")
+        return [c for c in clauses if c[2]], dropped
+
+    @staticmethod
+    def _warnings(clauses: List[Tuple[str, str, List[str]]], boolean: str) -> List[str]:
+        names = {name for name, _, _ in clauses}
+        warnings = []
+        if not clauses:
+            warnings.append("No non-empty buckets: nothing to search for")
+        elif names == {"TITLES"}:
+            warnings.append("Extremely broad: titles only, no tech filters")
+        if len(clauses) >= 10:
+            warnings.append("Extremely narrow: 10+ AND clauses may return zero results")
+        if clauses and "CORE_TECH" not in names:
+            warnings.append("CORE_TECH bucket is empty")
+        if boolean.count("(") != boolean.count(")") or boolean.count('"') % 2:
+            warnings.append("Unbalanced parentheses or quotes")
+        return warnings
+
+
+def _dedupe(terms: List[str]) -> List[str]:
+    """Case-insensitive dedupe keeping the first spelling."""
+    seen = set()
+    result = []
+    for term in terms:
+        if term.lower() not in seen:
+            seen.add(term.lower())
+            result.append(term)
+    return result
+
+
+def _quote(term: str) -> str:
+    """Quote multi-word terms and terms with special characters."""
+    return term if _PLAIN_TERM_RE.match(term) else f'"{term}"'
+
+
+def _clause(terms: List[str]) -> str:
+    return "(" + " OR ".join(_quote(term) for term in terms) + ")"
+
+
+def format_compiled(compiled: CompiledBoolean) -> str:
+    """Recruiter-facing text: bucket preview, then the Boolean line(s)."""
+    lines = ["**Bucket preview**", *[f"- {line}" for line in compiled.preview], ""]
+    if compiled.stages:
+        for name, boolean in compiled.stages.items():
+            lines.extend([f"**{name.replace('_', ' ').title()}**", "```", boolean, "```"])
+    else:
+        lines.extend(["**Boolean**", "```", compiled.boolean, "```"])
+    if compiled.warnings:
+        lines.extend(["", *[f"⚠️ {warning}" for warning in compiled.warnings]])
+    if compiled.dropped:
+        lines.append(f"Dropped for length limits: {', '.join(compiled.dropped)}")
+    return "\n".join(lines)
+
+
+# Global Boolean compiler instance
+_boolean_compiler: Optional[BooleanCompiler] = None
+
+
+def get_boolean_compiler() -> BooleanCompiler:
+    """Get or create global Boolean compiler instance."""
+    global _boolean_compiler
+    if _boolean_compiler is None:
+        _boolean_compiler = BooleanCompiler()
+    return _boolean_compiler
+
+
+__all__ = [
+    "BooleanBucket",
+    "BooleanCompiler",
+    "BooleanRequest",
+    "CompiledBoolean",
+    "format_compiled",
+    "get_boolean_compiler",
+]
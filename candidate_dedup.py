@@ -0,0 +1,503 @@
+"""Candidate deduplication with MinHash signatures and LSH banding.
+
+`create_candidate` only catches duplicates by exact email, so the same
+person under a personal and a work address, or with a typo in their name,
+becomes a second record. This index finds them locally:
+
+- Each candidate record gets two MinHash signatures: name character
+  trigrams (order-insensitive, accents and middle initials dropped) and
+  resume word 3-shingles
+- Signatures are split into LSH bands; a lookup only compares records that
+  share a band bucket, an email or a phone number, so checking a new
+  candidate costs a few dict lookups instead of a remote search
+- Candidate pairs are confirmed with the estimated Jaccard similarities
+  (see `CandidateDedupIndex.compare` for the rules)
+- `find_clusters` runs the same comparisons over every bucket and groups
+  duplicates with union-find
+
+The index is built from `resume_documents` and `dedup_candidates` (JobDiva
+candidates created through the API). Other workers and worker.py jobs store
+rows too, so `load` runs before every lookup and indexes the rows above the
+last indexed IDs.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import or_, select
+
+from database import DatabaseManager, DedupCandidate, ResumeDocument, get_db_manager
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_PHONE_RE = re.compile(r"\d[\d \t().-]{8,18}\d")
+_GMAIL_DOMAINS = ("gmail.com", "googlemail.com")
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+# ==============================================
+# NORMALIZATION
+# ==============================================
+
+def normalize_email(email: str) -> str:
+    """Lowercase; drop +tags, and dots for Gmail ("J.Doe+jobs@gmail.com" -> "jdoe@gmail.com")."""
+    local, _, domain = email.strip().lower().partition("@")
+    local = local.split("+", 1)[0]
+    if domain in _GMAIL_DOMAINS:
+        local, domain = local.replace(".", ""), "gmail.com"
+    return f"{local}@{domain}"
+
+
+def normalize_phone(phone: str) -> Optional[str]:
+    """Last 10 digits (national number); None if too short to identify anyone."""
+    digits = re.sub(r"\D", "", phone)
+    return digits[-10:] if 10 <= len(digits) <= 15 else None
+
+
+def normalize_name(name: str) -> str:
+    """Accent-free, lowercase name tokens in sorted order, initials dropped."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    tokens = [t for t in re.findall(r"[a-z]+", ascii_name.lower()) if len(t) > 1]
+    return " ".join(sorted(tokens))
+
+
+def name_shingles(name: str) -> np.ndarray:
+    """Hashed character trigrams of the normalized name."""
+    normalized = normalize_name(name)
+    if not normalized:
+        return np.empty(0, dtype=np.uint64)
+    padded = f" {normalized} "
+    grams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def text_shingles(text: str, size: int = 3) -> np.ndarray:
+    """Hashed word `size`-shingles; each word is hashed once and the shingle
+    hash is a rolling combination of its word hashes."""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(w.encode()) for w in words), dtype=np.uint64, count=len(words))
+    if len(words) < size:
+        return hashes[:1]
+    combined = hashes[: len(words) - size + 1].copy()
+    for offset in range(1, size):
+        combined = combined * _SHINGLE_MULTIPLIER + hashes[offset: len(words) - size + 1 + offset]
+    return np.unique(combined)
+
+
+# ==============================================
+# MINHASH + LSH
+# ==============================================
+
+class MinHasher:
+    """MinHash signatures with seeded multiply-shift hashes (vectorized).
+
+    Permutation i maps a 64-bit shingle hash x to the top 32 bits of
+    a_i * x + b_i (mod 2^64, odd a_i); the signature keeps the minimum per
+    permutation.
+    """
+
+    def __init__(self, num_perm: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(0, 2**64 - 1, size=(num_perm, 1), dtype=np.uint64, endpoint=True) | np.uint64(1)
+        self._b = rng.integers(0, 2**64 - 1, size=(num_perm, 1), dtype=np.uint64, endpoint=True)
+
+    def signature(self, hashes: np.ndarray) -> Optional[np.ndarray]:
+        """uint32 signature of a set of shingle hashes (None for an empty set)."""
+        if hashes.size == 0:
+            return None
+        with np.errstate(over="ignore"):
+            permuted = (self._a * hashes + self._b) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(left: Optional[np.ndarray], right: Optional[np.ndarray]) -> float:
+    """Estimated Jaccard similarity of two signatures (0.0 if either is missing)."""
+    if left is None or right is None:
+        return 0.0
+    return float(np.count_nonzero(left == right)) / left.size
+
+
+@dataclass
+class CandidateRecord:
+    """One candidate record (a stored resume or a JobDiva candidate)."""
+    key: str  # "resume:<id>" or "jobdiva:<candidateId>"
+    name: Optional[str] = None
+    emails: List[str] = field(default_factory=list)
+    phones: List[str] = field(default_factory=list)
+    text: Optional[str] = None
+    candidate_id: Optional[str] = None
+    resume_id: Optional[int] = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "candidate_id": self.candidate_id,
+            "resume_id": self.resume_id,
+            "name": self.name,
+            "emails": self.emails,
+        }
+
+
+@dataclass
+class _Entry:
+    record: CandidateRecord
+    emails: Set[str]
+    phones: Set[str]
+    name_signature: Optional[np.ndarray]
+    text_signature: Optional[np.ndarray]
+    bucket_keys: List[Tuple[str, int, bytes]]
+
+
+@dataclass
+class DuplicateMatch:
+    """A confirmed duplicate of the checked record."""
+    record: CandidateRecord
+    reasons: List[str]
+    name_similarity: float
+    resume_similarity: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.record.summary(),
+            "reasons": self.reasons,
+            "name_similarity": round(self.name_similarity, 3),
+            "resume_similarity": round(self.resume_similarity, 3),
+        }
+
+
+class CandidateDedupIndex:
+    """In-memory MinHash-LSH index over candidate records."""
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 32,
+        name_perm: int = 32,
+        name_bands: int = 16,
+        resume_threshold: float = 0.7,
+        name_threshold: float = 0.5,
+        max_bucket_size: int = 200,
+        db_manager: Optional[DatabaseManager] = None,
+        reread_window: int = 1000,
+    ):
+        """Initialize dedup index.
+
+        Args:
+            num_perm: Resume signature length
+            bands: Resume LSH bands (num_perm / bands rows each; 32 x 4
+                catches pairs from ~0.45 Jaccard up)
+            name_perm: Name signature length
+            name_bands: Name LSH bands
+            resume_threshold: Resume similarity that alone marks a duplicate
+            name_threshold: Name similarity that counts as the same name
+                ("Jon Smith" / "John A. Smith" is ~0.6)
+            max_bucket_size: Larger buckets (very common names) are skipped
+                by `find_clusters`
+            db_manager: Database manager to load records from
+            reread_window: IDs below the highest loaded one that are
+                re-checked on each load; concurrent inserts can commit a
+                lower ID after a higher one
+        """
+        if num_perm % bands or name_perm % name_bands:
+            raise ValueError("Signature length must be a multiple of the band count")
+        self.resume_hasher = MinHasher(num_perm, seed=0)
+        self.name_hasher = MinHasher(name_perm, seed=1)
+        self.bands = bands
+        self.name_bands = name_bands
+        self.resume_threshold = resume_threshold
+        self.name_threshold = name_threshold
+        self.max_bucket_size = max_bucket_size
+        self.db_manager = db_manager or get_db_manager()
+        self.reread_window = reread_window
+
+        self._entries: Dict[str, _Entry] = {}
+        self._buckets: Dict[Tuple[str, int, bytes], Set[str]] = {}
+        self._by_email: Dict[str, Set[str]] = {}
+        self._by_phone: Dict[str, Set[str]] = {}
+        self._loaded_resume_ids: Set[int] = set()
+        self._loaded_candidate_ids: Set[int] = set()
+        self._last_resume_id = 0
+        self._last_candidate_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _entry(self, record: CandidateRecord) -> _Entry:
+        emails = {normalize_email(e) for e in record.emails if e}
+        phones = {p for p in map(normalize_phone, record.phones) if p}
+        if record.text:
+            if "@" in record.text:
+                emails |= {normalize_email(e) for e in _EMAIL_RE.findall(record.text)}
+            phones |= {p for p in map(normalize_phone, _PHONE_RE.findall(record.text)) if p}
+
+        name_signature = self.name_hasher.signature(name_shingles(record.name)) if record.name else None
+        text_signature = self.resume_hasher.signature(text_shingles(record.text)) if record.text else None
+
+        bucket_keys = []
+        for kind, signature, bands in (
+            ("name", name_signature, self.name_bands),
+            ("resume", text_signature, self.bands),
+        ):
+            if signature is None:
+                continue
+            rows = signature.size // bands
+            bucket_keys.extend(
+                (kind, band, signature[band * rows:(band + 1) * rows].tobytes())
+                for band in range(bands)
+            )
+        return _Entry(record, emails, phones, name_signature, text_signature, bucket_keys)
+
+    def add(self, record: CandidateRecord) -> None:
+        """Insert or replace a record."""
+        if record.key in self._entries:
+            self.remove(record.key)
+        entry = self._entry(record)
+        self._entries[record.key] = entry
+        for bucket in entry.bucket_keys:
+            self._buckets.setdefault(bucket, set()).add(record.key)
+        for email in entry.emails:
+            self._by_email.setdefault(email, set()).add(record.key)
+        for phone in entry.phones:
+            self._by_phone.setdefault(phone, set()).add(record.key)
+
+    def remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table, keys in (
+            (self._buckets, entry.bucket_keys),
+            (self._by_email, entry.emails),
+            (self._by_phone, entry.phones),
+        ):
+            for bucket in keys:
+                members = table.get(bucket)
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del table[bucket]
+
+    async def _unloaded(self, conn, column, last_id: int, loaded: Set[int]):
+        """Filter for rows above `last_id` plus late-committed ones below it."""
+        condition = column > last_id
+        if last_id:
+            window = await conn.execute(
+                select(column).where(column > last_id - self.reread_window, column <= last_id)
+            )
+            late = [row_id for row_id in window.scalars() if row_id not in loaded]
+            if late:
+                condition = or_(condition, column.in_(late))
+        return condition
+
+    async def load(self) -> int:
+        """Index resumes and JobDiva candidates stored since the last call."""
+        async with self.db_manager.engine.connect() as conn:
+            result = await conn.stream(
+                select(
+                    ResumeDocument.id,
+                    ResumeDocument.candidate_id,
+                    ResumeDocument.candidate_email,
+                    ResumeDocument.candidate_name,
+                    ResumeDocument.text,
+                )
+                .where(await self._unloaded(
+                    conn, ResumeDocument.id, self._last_resume_id, self._loaded_resume_ids
+                ))
+                .order_by(ResumeDocument.id)
+            )
+            async for row in result:
+                self.add(record_for_resume(row))
+                self._loaded_resume_ids.add(row.id)
+                self._last_resume_id = max(self._last_resume_id, row.id)
+
+            result = await conn.stream(
+                select(DedupCandidate)
+                .where(await self._unloaded(
+                    conn, DedupCandidate.id, self._last_candidate_id, self._loaded_candidate_ids
+                ))
+                .order_by(DedupCandidate.id)
+            )
+            async for row in result:
+                self.add(CandidateRecord(
+                    key=f"jobdiva:{row.candidate_id}",
+                    name=row.name,
+                    emails=row.emails or [],
+                    phones=row.phones or [],
+                    text=row.text,
+                    candidate_id=row.candidate_id,
+                ))
+                self._loaded_candidate_ids.add(row.id)
+                self._last_candidate_id = max(self._last_candidate_id, row.id)
+        return len(self)
+
+    async def register_candidate(self, record: CandidateRecord) -> None:
+        """Persist a JobDiva candidate created through the API and index it."""
+        async with self.db_manager.async_session() as db:
+            row = DedupCandidate(
+                candidate_id=record.candidate_id,
+                name=record.name,
+                emails=record.emails,
+                phones=record.phones,
+                text=record.text,
+            )
+            db.add(row)
+            await db.commit()
+        self.add(record)
+        self._loaded_candidate_ids.add(row.id)
+
+    async def add_resume(self, document: ResumeDocument) -> List[DuplicateMatch]:
+        """Index a newly stored resume; returns the records it duplicates."""
+        await self.load()
+        record = record_for_resume(document)
+        matches = self.check(record)
+        self.add(record)
+        self._loaded_resume_ids.add(document.id)
+        return matches
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def compare(self, left: _Entry, right: _Entry) -> Optional[DuplicateMatch]:
+        """Duplicate rules (any one suffices):
+
+        - A shared normalized email
+        - A shared phone number and a similar name (>= name_threshold)
+        - Near-identical resumes (>= resume_threshold)
+        - A similar name and a related resume (>= 0.5)
+        """
+        name_sim = similarity(left.name_signature, right.name_signature)
+        resume_sim = similarity(left.text_signature, right.text_signature)
+        reasons = []
+        if left.emails & right.emails:
+            reasons.append("email")
+        if left.phones & right.phones and name_sim >= self.name_threshold:
+            reasons.append("phone+name")
+        if resume_sim >= self.resume_threshold:
+            reasons.append("resume")
+        elif name_sim >= self.name_threshold and resume_sim >= 0.5:
+            reasons.append("name+resume")
+        if not reasons:
+            return None
+        return DuplicateMatch(right.record, reasons, name_sim, resume_sim)
+
+    def _candidate_keys(self, entry: _Entry) -> Set[str]:
+        keys: Set[str] = set()
+        for bucket in entry.bucket_keys:
+            keys |= self._buckets.get(bucket, set())
+        for email in entry.emails:
+            keys |= self._by_email.get(email, set())
+        for phone in entry.phones:
+            keys |= self._by_phone.get(phone, set())
+        keys.discard(entry.record.key)
+        return keys
+
+    def check(self, record: CandidateRecord) -> List[DuplicateMatch]:
+        """Confirmed duplicates of a (possibly unindexed) record, best first."""
+        entry = self._entry(record)
+        matches = [
+            match for match in (
+                self.compare(entry, self._entries[key]) for key in self._candidate_keys(entry)
+            )
+            if match is not None
+        ]
+        matches.sort(key=lambda m: (len(m.reasons), m.resume_similarity, m.name_similarity), reverse=True)
+        return matches
+
+    def find_clusters(self) -> List[List[CandidateRecord]]:
+        """Group every indexed record with its duplicates (clusters of 2+)."""
+        parent = {key: key for key in self._entries}
+
+        def find(key: str) -> str:
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        compared: Set[Tuple[str, str]] = set()
+        groups = [
+            members for members in (
+                *self._buckets.values(), *self._by_email.values(), *self._by_phone.values()
+            )
+            if 1 < len(members) <= self.max_bucket_size
+        ]
+        for members in groups:
+            ordered = sorted(members)
+            for i, left in enumerate(ordered):
+                for right in ordered[i + 1:]:
+                    if (left, right) in compared or find(left) == find(right):
+                        continue
+                    compared.add((left, right))
+                    if self.compare(self._entries[left], self._entries[right]) is not None:
+                        parent[find(right)] = find(left)
+
+        clusters: Dict[str, List[CandidateRecord]] = {}
+        for key, entry in self._entries.items():
+            clusters.setdefault(find(key), []).append(entry.record)
+        return sorted(
+            (members for members in clusters.values() if len(members) > 1),
+            key=len, reverse=True,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "records": len(self._entries),
+            "buckets": len(self._buckets),
+            "emails": len(self._by_email),
+            "phones": len(self._by_phone),
+        }
+
+
+def record_for_resume(document: Any) -> CandidateRecord:
+    """CandidateRecord for a ResumeDocument (row or ORM object)."""
+    return CandidateRecord(
+        key=f"resume:{document.id}",
+        name=document.candidate_name,
+        emails=[document.candidate_email] if document.candidate_email else [],
+        text=document.text,
+        candidate_id=document.candidate_id,
+        resume_id=document.id,
+    )
+
+
+# Global dedup index instance
+_dedup_index: Optional[CandidateDedupIndex] = None
+
+
+def get_dedup_index() -> CandidateDedupIndex:
+    """Get or create global candidate dedup index instance."""
+    global _dedup_index
+    if _dedup_index is None:
+        _dedup_index = CandidateDedupIndex(
+            num_perm=int(os.getenv("DEDUP_NUM_PERM", "128")),
+            bands=int(os.getenv("DEDUP_BANDS", "32")),
+            resume_threshold=float(os.getenv("DEDUP_RESUME_THRESHOLD", "0.7")),
+            name_threshold=float(os.getenv("DEDUP_NAME_THRESHOLD", "0.5")),
+        )
+    return _dedup_index
+
+
+__all__ = [
+    "CandidateDedupIndex",
+    "CandidateRecord",
+    "DuplicateMatch",
+    "MinHasher",
+    "get_dedup_index",
+    "normalize_email",
+    "normalize_name",
+    "normalize_phone",
+    "record_for_resume",
+]
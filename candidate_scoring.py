@@ -0,0 +1,540 @@
+"""Vectorized candidate-to-JD scoring.
+
+Implements the skills taxonomy and scoring rules of
+s1ngularity-advanced-matching.json with NumPy, so ranking hundreds of
+applicants needs no LLM call (the LLM only explains the shortlist):
+
+- The taxonomy is compiled once into a skill x skill weight matrix:
+  exact and equivalent skills score 1.0, adjacent skills their
+  `transferability`, complementary inference 0.5
+- Candidates are encoded as skill indicator vectors; a JD is a list of
+  required / preferred skill indices
+- Per-skill coverage for every candidate is the best weight any of their
+  skills gives the JD skill (one broadcast max over a chunk of candidates);
+  skill_match is the weighted coverage, match_score blends it with
+  experience_match
+- Sub-scores are written to `CandidateInteraction` (0-100 scale), with the
+  JD text's bias-scan flags in `bias_flags`
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bias_scanner import get_bias_scanner
+from database import CandidateInteraction, JobAnalysis, ResumeDocument, get_db_manager
+from skill_index import SkillNormalizer, display_name, get_skill_normalizer, load_spec, skill_tokens
+
+SPEC_FILE = "s1ngularity-advanced-matching.json"
+
+# Relation codes (strongest first for explanations)
+NO_MATCH, EXACT, EQUIVALENT, ADJACENT, COMPLEMENTARY = range(5)
+
+COMPLEMENTARY_SCORE = 0.5  # "complementary_inference" matching_logic
+
+# candidate_ranking_logic thresholds on the 0-10 scale
+TIERS = (
+    (9.0, "tier_1_perfect_match"),
+    (7.5, "tier_2_strong_match"),
+    (6.0, "tier_3_potential_match"),
+    (0.0, "tier_4_weak_match"),
+)
+
+_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:years?|yrs?)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=65536)
+def skill_key(name: str) -> str:
+    """Lookup key for a canonical skill name ("CI/CD" -> "ci cd")."""
+    return " ".join(token.lower() for token in skill_tokens(name))
+
+
+def extract_years(text: str) -> Optional[float]:
+    """Largest "N years" / "N+ yrs" figure in a text."""
+    years = [int(match) for match in _YEARS_RE.findall(text)]
+    return float(max(years)) if years else None
+
+
+class SkillTaxonomy:
+    """Skill vocabulary with a compiled weight matrix.
+
+    `weights[j, c]` is the credit a candidate skill `c` gives a required
+    skill `j`; `relations[j, c]` records why. Skill names are canonical
+    names from the shared skill index (skill_index.py).
+    """
+
+    def __init__(
+        self,
+        skills: List[str],
+        weights: np.ndarray,
+        relations: np.ndarray,
+        normalizer: SkillNormalizer,
+        extra_normalizer: Optional[SkillNormalizer] = None,
+    ):
+        self.skills = skills
+        self.weights = weights
+        self.relations = relations
+        self.normalizer = normalizer
+        self.extra_normalizer = extra_normalizer
+        self.index = {skill_key(name): i for i, name in enumerate(skills)}
+
+    @classmethod
+    def from_spec(
+        cls, spec_path: Optional[Path] = None, normalizer: Optional[SkillNormalizer] = None
+    ) -> "SkillTaxonomy":
+        """Compile the taxonomy of s1ngularity-advanced-matching.json."""
+        spec_path = spec_path or Path(os.getenv("MODULES_DIR", ".")) / SPEC_FILE
+        normalizer = normalizer or get_skill_normalizer()
+        relationships = load_spec(spec_path)["skills_taxonomy"]["skill_relationships"]
+
+        skills: List[str] = []
+        index: Dict[str, int] = {}
+        edges: List[Tuple[str, str, float, int]] = []
+
+        def add(name: str) -> str:
+            canonical = normalizer.canonical(display_name(name))
+            key = skill_key(canonical)
+            if key not in index:
+                index[key] = len(skills)
+                skills.append(canonical)
+            return key
+
+        for canonical, aliases in relationships["equivalent_skills"]["examples"].items():
+            for alias in aliases:
+                edges.append((add(canonical), add(alias), 1.0, EQUIVALENT))
+                edges.append((add(alias), add(canonical), 1.0, EQUIVALENT))
+
+        for skill, config in relationships["adjacent_skills"]["examples"].items():
+            add(skill)
+            transferability = float(config.get("transferability", 0.6))
+            for other in config.get("adjacent", []):
+                edges.append((add(skill), add(other), transferability, ADJACENT))
+                edges.append((add(other), add(skill), transferability, ADJACENT))
+
+        for skill, config in relationships["complementary_skills"]["examples"].items():
+            add(skill)
+            for suggested in config.get("suggests_familiarity_with", []):
+                # Having `skill` suggests the candidate knows `suggested`
+                edges.append((add(suggested), add(skill), COMPLEMENTARY_SCORE, COMPLEMENTARY))
+
+        size = len(skills)
+        weights = np.eye(size, dtype=np.float32)
+        relations = np.zeros((size, size), dtype=np.int8)
+        np.fill_diagonal(relations, EXACT)
+        for required, held, weight, relation in edges:
+            j, c = index[required], index[held]
+            if weight > weights[j, c]:
+                weights[j, c] = weight
+                relations[j, c] = relation
+        return cls(skills, weights, relations, normalizer)
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def with_skills(self, names: Iterable[str]) -> "SkillTaxonomy":
+        """Taxonomy extended with skills outside the spec (exact match only)."""
+        extra, seen = [], set(self.index)
+        for name in names:
+            canonical = self.normalizer.canonical(name)
+            key = skill_key(canonical)
+            if key and key not in seen:
+                seen.add(key)
+                extra.append(canonical)
+        if not extra:
+            return self
+        size = len(self) + len(extra)
+        weights = np.eye(size, dtype=np.float32)
+        weights[: len(self), : len(self)] = self.weights
+        relations = np.zeros((size, size), dtype=np.int8)
+        np.fill_diagonal(relations, EXACT)
+        relations[: len(self), : len(self)] = self.relations
+        return SkillTaxonomy(
+            self.skills + extra, weights, relations, self.normalizer, SkillNormalizer.from_terms(extra)
+        )
+
+    def lookup(self, name: str) -> Optional[int]:
+        return self.index.get(skill_key(self.normalizer.canonical(name)))
+
+    def extract(self, text: str) -> Set[int]:
+        """Indices of vocabulary skills mentioned in a text."""
+        names = self.normalizer.extract(text)
+        if self.extra_normalizer is not None:
+            names += self.extra_normalizer.extract(text)
+        return {self.index[key] for key in map(skill_key, names) if key in self.index}
+
+
+class ScoringCandidate(BaseModel):
+    """A candidate to score (resume text and/or explicit skills)."""
+    candidate_id: Optional[str] = Field(None, description="JobDiva candidate ID")
+    candidate_email: Optional[str] = None
+    candidate_name: Optional[str] = None
+    resume_text: Optional[str] = None
+    skills: List[str] = Field(default_factory=list)
+    years_experience: Optional[float] = None
+
+
+class ScoringRequest(BaseModel):
+    """Rank candidates against one JD."""
+    session_id: str
+    job_id: Optional[str] = Field(None, description="JobDiva job ID (also used to reuse a stored JD analysis)")
+    jd_text: Optional[str] = None
+    required_skills: List[str] = Field(default_factory=list)
+    preferred_skills: List[str] = Field(default_factory=list)
+    min_years: Optional[float] = None
+    candidates: List[ScoringCandidate] = Field(default_factory=list)
+    resume_ids: List[int] = Field(default_factory=list, description="IDs from the local resume corpus")
+    top_k: int = Field(20, ge=1, le=500)
+    persist: bool = Field(True, description="Write scores to candidate_interactions")
+
+
+class CandidateScore(BaseModel):
+    """Scores and evidence for one candidate (scores on a 0-100 scale)."""
+    candidate_id: Optional[str] = None
+    candidate_email: Optional[str] = None
+    candidate_name: Optional[str] = None
+    match_score: float
+    skill_match: float
+    experience_match: float
+    tier: str
+    matched: List[str] = Field(default_factory=list)
+    adjacent: List[str] = Field(default_factory=list)
+    inferred: List[str] = Field(default_factory=list)
+    gaps: List[Dict[str, str]] = Field(default_factory=list)
+
+
+class ScoringResponse(BaseModel):
+    """Ranked shortlist."""
+    job_id: Optional[str] = None
+    required_skills: List[str]
+    preferred_skills: List[str]
+    min_years: Optional[float] = None
+    scored: int
+    took_ms: float
+    results: List[CandidateScore]
+    bias_flags: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class CandidateScorer:
+    """Scores candidate batches against a JD with one matrix pass per chunk."""
+
+    def __init__(
+        self,
+        taxonomy: Optional[SkillTaxonomy] = None,
+        skill_weight: float = 0.8,
+        preferred_weight: float = 0.5,
+        chunk_size: int = 1024,
+    ):
+        """Initialize candidate scorer.
+
+        Args:
+            taxonomy: Compiled skill taxonomy (default: from the spec file)
+            skill_weight: Share of match_score from skill_match (rest is experience)
+            preferred_weight: Weight of a preferred skill relative to a required one
+            chunk_size: Candidates per broadcast block (bounds memory)
+        """
+        self.taxonomy = taxonomy or SkillTaxonomy.from_spec()
+        self.skill_weight = skill_weight
+        self.preferred_weight = preferred_weight
+        self.chunk_size = chunk_size
+
+    # ------------------------------------------------------------------
+    # Vector scoring
+    # ------------------------------------------------------------------
+
+    def coverage(self, taxonomy: SkillTaxonomy, candidates: np.ndarray, jd_skills: Sequence[int]) -> np.ndarray:
+        """Best credit per (candidate, JD skill).
+
+        Args:
+            candidates: (n, S) skill indicator matrix
+            jd_skills: Vocabulary indices of the JD skills
+
+        Returns:
+            (n, k) coverage matrix in [0, 1]
+        """
+        required = taxonomy.weights[list(jd_skills)]  # (k, S)
+        result = np.empty((candidates.shape[0], len(jd_skills)), dtype=np.float32)
+        for start in range(0, candidates.shape[0], self.chunk_size):
+            block = candidates[start:start + self.chunk_size]
+            result[start:start + len(block)] = (block[:, None, :] * required[None, :, :]).max(axis=2)
+        return result
+
+    def score(
+        self,
+        taxonomy: SkillTaxonomy,
+        candidates: np.ndarray,
+        years: np.ndarray,
+        required: Sequence[int],
+        preferred: Sequence[int],
+        min_years: Optional[float],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized sub-scores in [0, 1].
+
+        Returns:
+            (match_score, skill_match, experience_match, coverage)
+        """
+        jd_skills = list(required) + list(preferred)
+        n = candidates.shape[0]
+        if jd_skills:
+            coverage = self.coverage(taxonomy, candidates, jd_skills)
+            weights = np.array(
+                [1.0] * len(required) + [self.preferred_weight] * len(preferred), dtype=np.float32
+            )
+            skill_match = coverage @ weights / weights.sum()
+        else:
+            coverage = np.zeros((n, 0), dtype=np.float32)
+            skill_match = np.ones(n, dtype=np.float32)
+
+        if min_years:
+            # Unknown experience scores neutral
+            experience_match = np.where(
+                np.isnan(years), 0.5, np.clip(np.nan_to_num(years) / min_years, 0.0, 1.0)
+            ).astype(np.float32)
+        else:
+            experience_match = np.ones(n, dtype=np.float32)
+
+        match_score = self.skill_weight * skill_match + (1 - self.skill_weight) * experience_match
+        return match_score, skill_match, experience_match, coverage
+
+    # ------------------------------------------------------------------
+    # Request handling
+    # ------------------------------------------------------------------
+
+    async def _resolve_jd(
+        self, db: AsyncSession, request: ScoringRequest
+    ) -> Tuple[List[str], List[str], Optional[float]]:
+        """JD skills from the request, else the stored analysis, else the JD text."""
+        required, preferred = list(request.required_skills), list(request.preferred_skills)
+        min_years = request.min_years
+
+        if not required and request.job_id:
+            analysis = (await db.execute(
+                select(JobAnalysis).where(JobAnalysis.job_id == request.job_id)
+            )).scalar_one_or_none()
+            if analysis is not None:
+                required = self._skills_from_items(analysis.core_skills or [])
+                preferred = preferred or self._skills_from_items(analysis.nice_to_have or [])
+                if min_years is None and analysis.analysis:
+                    min_years = extract_years(analysis.analysis)
+
+        if request.jd_text:
+            if not required:
+                required = self.taxonomy.normalizer.extract(request.jd_text)
+            if min_years is None:
+                min_years = extract_years(request.jd_text)
+        return required, preferred, min_years
+
+    def _skills_from_items(self, items: List) -> List[str]:
+        """Canonical skills from parsed JD bullets ("5+ yrs AWS or Azure" -> AWS, Azure).
+
+        Bullets naming no known skill are kept if short enough to be a skill.
+        """
+        skills: List[str] = []
+        for item in items:
+            found = self.taxonomy.normalizer.extract(str(item))
+            if found:
+                skills.extend(found)
+            elif len(str(item).split()) <= 4:
+                skills.append(str(item).strip())
+        return list(dict.fromkeys(skills))
+
+    async def _load_candidates(self, db: AsyncSession, request: ScoringRequest) -> List[ScoringCandidate]:
+        candidates = list(request.candidates)
+        if request.resume_ids:
+            result = await db.execute(
+                select(ResumeDocument).where(ResumeDocument.id.in_(request.resume_ids))
+            )
+            for document in result.scalars():
+                candidates.append(ScoringCandidate(
+                    candidate_id=document.candidate_id,
+                    candidate_email=document.candidate_email,
+                    candidate_name=document.candidate_name,
+                    resume_text=document.text,
+                    skills=document.skills or [],
+                ))
+        return candidates
+
+    async def rank(self, db: AsyncSession, request: ScoringRequest) -> ScoringResponse:
+        """Score all candidates, persist sub-scores and return the shortlist."""
+        started = time.perf_counter()
+        required_names, preferred_names, min_years = await self._resolve_jd(db, request)
+        if not required_names and not preferred_names:
+            raise ValueError("No JD skills: pass required_skills, jd_text or a job_id with a stored analysis")
+        candidates = await self._load_candidates(db, request)
+        bias_flags = get_bias_scanner().scan(request.jd_text).to_flags() if request.jd_text else []
+
+        taxonomy = self.taxonomy.with_skills(
+            required_names + preferred_names
+            + [skill for candidate in candidates for skill in candidate.skills]
+        )
+        required = [i for i in dict.fromkeys(map(taxonomy.lookup, required_names)) if i is not None]
+        preferred = [
+            i for i in dict.fromkeys(map(taxonomy.lookup, preferred_names))
+            if i is not None and i not in required
+        ]
+
+        matrix = np.zeros((len(candidates), len(taxonomy)), dtype=np.float32)
+        years = np.full(len(candidates), np.nan, dtype=np.float32)
+        for row, candidate in enumerate(candidates):
+            held = {taxonomy.lookup(skill) for skill in candidate.skills} - {None}
+            if candidate.resume_text:
+                held |= taxonomy.extract(candidate.resume_text)
+            matrix[row, list(held)] = 1.0
+            if candidate.years_experience is not None:
+                years[row] = candidate.years_experience
+            elif candidate.resume_text:
+                years[row] = extract_years(candidate.resume_text) or np.nan
+
+        match_score, skill_match, experience_match, coverage = self.score(
+            taxonomy, matrix, years, required, preferred, min_years
+        )
+        order = np.argsort(-match_score, kind="stable")
+
+        if request.persist and candidates:
+            await self._persist(
+                db, request, candidates, match_score, skill_match, experience_match, bias_flags
+            )
+
+        results = [
+            self._explain(
+                taxonomy, candidates[i], matrix[i], coverage[i], required, preferred,
+                float(match_score[i]), float(skill_match[i]), float(experience_match[i]),
+            )
+            for i in order[: request.top_k]
+        ]
+        return ScoringResponse(
+            job_id=request.job_id,
+            required_skills=[taxonomy.skills[i] for i in required],
+            preferred_skills=[taxonomy.skills[i] for i in preferred],
+            min_years=min_years,
+            scored=len(candidates),
+            took_ms=round((time.perf_counter() - started) * 1000, 3),
+            results=results,
+            bias_flags=bias_flags,
+        )
+
+    def _explain(
+        self,
+        taxonomy: SkillTaxonomy,
+        candidate: ScoringCandidate,
+        held: np.ndarray,
+        coverage: np.ndarray,
+        required: List[int],
+        preferred: List[int],
+        match_score: float,
+        skill_match: float,
+        experience_match: float,
+    ) -> CandidateScore:
+        """Evidence for a shortlisted candidate (which skill gave each credit)."""
+        matched, adjacent, inferred, gaps = [], [], [], []
+        critical = False
+        for position, j in enumerate(required + preferred):
+            name = taxonomy.skills[j]
+            is_required = position < len(required)
+            credits = held * taxonomy.weights[j]
+            source = int(credits.argmax())
+            relation = int(taxonomy.relations[j, source]) if credits[source] > 0 else NO_MATCH
+
+            if relation in (EXACT, EQUIVALENT):
+                matched.append(name if relation == EXACT else f"{name} (via {taxonomy.skills[source]})")
+                continue
+            label = f"{taxonomy.skills[source]} → {name} ({coverage[position]:.0%})"
+            if relation == ADJACENT:
+                adjacent.append(label)
+            elif relation == COMPLEMENTARY:
+                inferred.append(label)
+
+            # gap_categories: complementary inference is a non-gap
+            if not is_required:
+                if relation == NO_MATCH:
+                    gaps.append({"skill": name, "severity": "minor"})
+            elif relation == NO_MATCH:
+                gaps.append({"skill": name, "severity": "critical"})
+                critical = True
+            elif relation == ADJACENT:
+                gaps.append({"skill": name, "severity": "significant"})
+
+        score_10 = match_score * 10
+        tier = next(name for threshold, name in TIERS if score_10 >= threshold)
+        if critical and tier in ("tier_1_perfect_match", "tier_2_strong_match"):
+            tier = "tier_3_potential_match"
+
+        return CandidateScore(
+            candidate_id=candidate.candidate_id,
+            candidate_email=candidate.candidate_email,
+            candidate_name=candidate.candidate_name,
+            match_score=round(match_score * 100, 2),
+            skill_match=round(skill_match * 100, 2),
+            experience_match=round(experience_match * 100, 2),
+            tier=tier,
+            matched=matched,
+            adjacent=adjacent,
+            inferred=inferred,
+            gaps=gaps,
+        )
+
+    async def _persist(
+        self,
+        db: AsyncSession,
+        request: ScoringRequest,
+        candidates: List[ScoringCandidate],
+        match_score: np.ndarray,
+        skill_match: np.ndarray,
+        experience_match: np.ndarray,
+        bias_flags: List[Dict[str, Any]],
+    ) -> None:
+        """Bulk insert one CandidateInteraction row per scored candidate."""
+        rows = [
+            {
+                "session_id": request.session_id,
+                "candidate_id": candidate.candidate_id,
+                "candidate_email": candidate.candidate_email,
+                "job_id": request.job_id,
+                "match_score": round(float(match), 2),
+                "skill_match": round(float(skill), 2),
+                "experience_match": round(float(experience), 2),
+                "bias_flags": bias_flags or None,
+            }
+            for candidate, match, skill, experience in zip(
+                candidates, match_score * 100, skill_match * 100, experience_match * 100
+            )
+        ]
+        await db.execute(insert(CandidateInteraction), rows)
+        await db.commit()
+        await get_db_manager().mark_write(request.session_id)
+
+
+# Global candidate scorer instance
+_candidate_scorer: Optional[CandidateScorer] = None
+
+
+def get_candidate_scorer() -> CandidateScorer:
+    """Get or create global candidate scorer instance."""
+    global _candidate_scorer
+    if _candidate_scorer is None:
+        _candidate_scorer = CandidateScorer(
+            skill_weight=float(os.getenv("SCORING_SKILL_WEIGHT", "0.8")),
+            preferred_weight=float(os.getenv("SCORING_PREFERRED_WEIGHT", "0.5")),
+        )
+    return _candidate_scorer
+
+
+__all__ = [
+    "CandidateScore",
+    "CandidateScorer",
+    "ScoringCandidate",
+    "ScoringRequest",
+    "ScoringResponse",
+    "SkillTaxonomy",
+    "get_candidate_scorer",
+    "load_spec",
+]
@@ -0,0 +1,332 @@
+"""Bounded per-session conversation memory.
+
+Implements the conversation continuity rules from
+s1ngularity-context-awareness.json within a fixed token budget:
+- Recent turns are kept verbatim
+- Older turns are folded into a running summary once a token threshold is
+  crossed (the summary itself is capped, so prompt size stays bounded)
+- Large artifacts (resumes, JDs) are stored once per session, deduplicated
+  by content hash, and referenced by ID in the turns
+
+State lives compactly in `SessionHistory.conversation_state`. Every save
+bumps its `revision`, so a stale copy (another worker's LRU, a compaction
+that raced a newer turn) never replaces a newer one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import SessionHistory
+
+STATE_VERSION = 1
+
+# async (previous_summary, turns) -> new summary
+Summarizer = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_JD_MARKERS = (
+    "responsibilities", "requirements", "qualifications", "we are looking",
+    "job description", "what you'll do", "about the role", "benefits",
+)
+_RESUME_MARKERS = (
+    "education", "work experience", "professional experience", "summary",
+    "certifications", "linkedin.com", "references", "employment history",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (4 chars = 1 token, as in ModuleLoader)."""
+    return len(text) // 4
+
+
+def state_revision(state: Optional[Dict[str, Any]]) -> int:
+    """Revision of a stored conversation state (0 for none)."""
+    return int((state or {}).get("revision") or 0)
+
+
+def _classify_artifact(text: str) -> str:
+    lowered = text.lower()
+    jd_score = sum(marker in lowered for marker in _JD_MARKERS)
+    resume_score = sum(marker in lowered for marker in _RESUME_MARKERS)
+    if jd_score > resume_score:
+        return "job_description"
+    if resume_score > 0:
+        return "resume"
+    return "document"
+
+
+def _truncate(text: str, limit: int) -> str:
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+async def extractive_summary(previous: str, turns: List[Dict[str, str]]) -> str:
+    """LLM-free fallback summarizer: first sentence of each folded turn."""
+    lines = [previous] if previous else []
+    for turn in turns:
+        first_sentence = re.split(r"(?<=[.!?])\s", turn["content"].strip(), maxsplit=1)[0]
+        lines.append(f"- {turn['role']}: {_truncate(first_sentence, 200)}")
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """Compact conversation state for one session."""
+
+    def __init__(
+        self,
+        summary: str = "",
+        turns: Optional[List[Dict[str, str]]] = None,
+        artifacts: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_turn_tokens: int = 2000,
+        keep_recent_turns: int = 4,
+        max_summary_tokens: int = 400,
+        artifact_min_chars: int = 1500,
+        max_context_artifacts: int = 3,
+        max_stored_artifacts: int = 20,
+        revision: int = 0,
+    ):
+        """Initialize conversation memory.
+
+        Args:
+            summary: Running summary of folded turns
+            turns: Verbatim recent turns ({"role", "content"})
+            artifacts: Stored artifacts by ID
+            max_turn_tokens: Fold older turns once verbatim turns exceed this
+            keep_recent_turns: Turns always kept verbatim
+            max_summary_tokens: Cap on the running summary
+            artifact_min_chars: Message blocks at least this long become artifacts
+            max_context_artifacts: Most recent artifacts included in full
+            max_stored_artifacts: Oldest artifacts are dropped beyond this
+            revision: Revision of the state this memory was loaded from
+        """
+        self.summary = summary
+        self.turns = turns or []
+        self.artifacts = artifacts or {}
+        self.max_turn_tokens = max_turn_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.max_summary_tokens = max_summary_tokens
+        self.artifact_min_chars = artifact_min_chars
+        self.max_context_artifacts = max_context_artifacts
+        self.max_stored_artifacts = max_stored_artifacts
+        self.revision = revision
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_state(cls, state: Optional[Dict[str, Any]], **settings) -> "ConversationMemory":
+        """Rebuild memory from `SessionHistory.conversation_state`."""
+        state = state or {}
+        if state.get("version") != STATE_VERSION:
+            return cls(**settings)
+        return cls(
+            summary=state.get("summary", ""),
+            turns=[dict(turn) for turn in state.get("turns", [])],
+            artifacts=dict(state.get("artifacts", {})),
+            revision=state_revision(state),
+            **settings,
+        )
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serialize memory for `SessionHistory.conversation_state`."""
+        return {
+            "version": STATE_VERSION,
+            "revision": self.revision,
+            "summary": self.summary,
+            "turns": self.turns,
+            "artifacts": self.artifacts,
+        }
+
+    # ------------------------------------------------------------------
+    # Turns and artifacts
+    # ------------------------------------------------------------------
+
+    def store_artifact(self, content: str, kind: Optional[str] = None) -> str:
+        """Store an artifact once (deduplicated by content hash); return its ID."""
+        normalized = _WHITESPACE_RE.sub(" ", content).strip()
+        digest = hashlib.sha256(normalized.encode()).hexdigest()
+        artifact_id = f"A{digest[:8]}"
+        if artifact_id not in self.artifacts:
+            self.artifacts[artifact_id] = {
+                "kind": kind or _classify_artifact(content),
+                "content": content.strip(),
+                "tokens": estimate_tokens(content),
+            }
+        # Move to the end: most recently referenced artifacts stay in context
+        self.artifacts[artifact_id] = self.artifacts.pop(artifact_id)
+        while len(self.artifacts) > self.max_stored_artifacts:
+            self.artifacts.pop(next(iter(self.artifacts)))
+        return artifact_id
+
+    def compact_message(self, message: str) -> str:
+        """Replace large pasted blocks in a message with artifact references.
+
+        A short instruction followed by a long block ("Screen this resume:
+        <resume>") keeps the instruction and references the block.
+        """
+        if len(message) < self.artifact_min_chars:
+            return message
+
+        head, block = "", message
+        split = re.split(r"\n\s*\n|:\s*\n", message, maxsplit=1)
+        if len(split) == 2 and len(split[0]) < 300 and len(split[1]) >= self.artifact_min_chars:
+            head, block = split
+
+        artifact_id = self.store_artifact(block)
+        kind = self.artifacts[artifact_id]["kind"].replace("_", " ")
+        reference = f"[artifact {artifact_id}: {kind}, see CONVERSATION ARTIFACTS]"
+        return f"{head.strip()}\n{reference}".strip()
+
+    def add_turn(self, role: str, content: str) -> None:
+        """Append a verbatim turn."""
+        self.turns.append({"role": role, "content": content})
+
+    @property
+    def turn_tokens(self) -> int:
+        return sum(estimate_tokens(turn["content"]) for turn in self.turns)
+
+    def needs_compaction(self) -> bool:
+        """Whether verbatim turns exceed the token threshold."""
+        return (
+            self.turn_tokens > self.max_turn_tokens
+            and len(self.turns) > self.keep_recent_turns
+        )
+
+    async def compact(self, summarizer: Optional[Summarizer] = None) -> bool:
+        """Fold all but the most recent turns into the running summary.
+
+        Returns:
+            True if turns were folded
+        """
+        if not self.needs_compaction():
+            return False
+
+        folded = self.turns[:-self.keep_recent_turns]
+        self.turns = self.turns[-self.keep_recent_turns:]
+        summarize = summarizer or extractive_summary
+        try:
+            summary = await summarize(self.summary, folded)
+        except Exception:
+            summary = await extractive_summary(self.summary, folded)
+        # Keep the newest part of an over-long summary
+        max_chars = self.max_summary_tokens * 4
+        self.summary = summary if len(summary) <= max_chars else "…" + summary[-max_chars:]
+        return True
+
+    # ------------------------------------------------------------------
+    # Prompt assembly
+    # ------------------------------------------------------------------
+
+    def context_block(self) -> str:
+        """System prompt section with the summary and artifacts."""
+        parts = []
+        if self.summary:
+            parts.append(f"## CONVERSATION SUMMARY\n{self.summary}\n")
+        if self.artifacts:
+            ids = list(self.artifacts)
+            in_context = ids[-self.max_context_artifacts:]
+            parts.append("## CONVERSATION ARTIFACTS\n")
+            for artifact_id in ids:
+                artifact = self.artifacts[artifact_id]
+                if artifact_id in in_context:
+                    parts.append(
+                        f"### {artifact_id} ({artifact['kind']})\n{artifact['content']}\n"
+                    )
+                else:
+                    parts.append(
+                        f"### {artifact_id} ({artifact['kind']}) - stored, ask to recall\n"
+                    )
+        if not parts:
+            return ""
+        return "\n\n# CONVERSATION MEMORY\n" + "\n".join(parts)
+
+    def history_messages(self) -> List[Dict[str, str]]:
+        """Verbatim turns as chat messages (excluding the current one)."""
+        return [dict(turn) for turn in self.turns]
+
+
+class ConversationStore:
+    """Loads and saves `ConversationMemory` on `SessionHistory`.
+
+    Saves go through the session history write-behind buffer; a small
+    in-process LRU keeps the latest state so the next turn never reads a
+    stale row before the buffer flushes. Loads still read the row and keep
+    whichever copy has the higher revision, since other workers write the
+    same sessions.
+    """
+
+    def __init__(self, max_cached_sessions: int = 1000, **memory_settings):
+        """Initialize conversation store.
+
+        Args:
+            max_cached_sessions: Sessions kept in the in-process LRU
+            **memory_settings: Passed through to ConversationMemory
+        """
+        self.max_cached_sessions = max_cached_sessions
+        self.memory_settings = memory_settings
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def load(self, db: AsyncSession, session_id: str) -> ConversationMemory:
+        """Load memory for a session (empty for new sessions)."""
+        result = await db.execute(
+            select(SessionHistory.conversation_state)
+            .where(SessionHistory.session_id == session_id)
+        )
+        state = result.scalar_one_or_none()
+        cached = self._cache.get(session_id)
+        if cached is not None:
+            if state_revision(cached) >= state_revision(state):
+                # Not flushed yet (or flushed and unchanged since)
+                state = cached
+                self._cache.move_to_end(session_id)
+            else:
+                del self._cache[session_id]
+        return ConversationMemory.from_state(state, **self.memory_settings)
+
+    def save(self, session_id: str, memory: ConversationMemory) -> Dict[str, Any]:
+        """Bump the revision, cache the latest state and return it for persisting."""
+        memory.revision += 1
+        state = memory.to_state()
+        self._cache[session_id] = state
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.max_cached_sessions:
+            self._cache.popitem(last=False)
+        return state
+
+
+# Global conversation store instance
+_conversation_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """Get or create global conversation store instance."""
+    global _conversation_store
+    if _conversation_store is None:
+        _conversation_store = ConversationStore(
+            max_cached_sessions=int(os.getenv("CONVERSATION_CACHE_SESSIONS", "1000")),
+            max_turn_tokens=int(os.getenv("CONVERSATION_MAX_TURN_TOKENS", "2000")),
+            keep_recent_turns=int(os.getenv("CONVERSATION_KEEP_RECENT_TURNS", "4")),
+            max_summary_tokens=int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "400")),
+            artifact_min_chars=int(os.getenv("CONVERSATION_ARTIFACT_MIN_CHARS", "1500")),
+        )
+    return _conversation_store
+
+
+__all__ = [
+    "ConversationMemory",
+    "ConversationStore",
+    "Summarizer",
+    "estimate_tokens",
+    "extractive_summary",
+    "get_conversation_store",
+    "state_revision",
+]
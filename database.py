@@ -7,14 +7,35 @@ Implements feedback logging and analytics as described in:
 
 from __future__ import annotations
 
+import hashlib
+import itertools
 import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from typing import AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional
 
-from sqlalchemy import Boolean, Column, DateTime, Float, Integer, String, Text, JSON
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from fastapi import Request
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String, Text, JSON, event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: SQLite maintenance jobs rely on in-process locks
+    FCNTL_AVAILABLE = False
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+_RECENT_WRITE_PREFIX = "s1ngularity:recent-write"
 
 # Base class for models
 Base = declarative_base()
@@ -26,6 +47,9 @@ class FeedbackLog(Base):
     Implements logging structure from s1ngularity-security-feedback.json
     """
     __tablename__ = "feedback_logs"
+    __table_args__ = (
+        Index("ix_feedback_logs_session_timestamp", "session_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -54,6 +78,12 @@ class FeedbackLog(Base):
 class SessionHistory(Base):
     """User session history and conversation state."""
     __tablename__ = "session_history"
+    __table_args__ = (
+        # Keyset pagination on (last_active, id), optionally filtered
+        Index("ix_session_history_last_active_id", "last_active", "id"),
+        Index("ix_session_history_user_last_active", "user_id", "last_active", "id"),
+        Index("ix_session_history_task_last_active", "task_type", "last_active", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String(255), unique=True, nullable=False, index=True)
@@ -78,6 +108,9 @@ class CandidateInteraction(Base):
     Supports analytics from s1ngularity-analytics-insights.json
     """
     __tablename__ = "candidate_interactions"
+    __table_args__ = (
+        Index("ix_candidate_interactions_session_timestamp", "session_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -131,6 +164,10 @@ class JobAnalysis(Base):
     boolean_query = Column(Text, nullable=True)
     ideal_profile = Column(JSON, nullable=True)
 
+    # Content-addressed cache (jd_cache.py): SHA-256 of the normalized JD
+    jd_hash = Column(String(64), nullable=True, index=True)
+    analysis = Column(Text, nullable=True)  # Full JD_ANALYSIS response
+
 
 class AnalyticsMetric(Base):
     """Store aggregate analytics metrics.
@@ -138,6 +175,12 @@ class AnalyticsMetric(Base):
     Implements analytics from s1ngularity-analytics-insights.json
     """
     __tablename__ = "analytics_metrics"
+    __table_args__ = (
+        Index(
+            "ix_analytics_metrics_rollup",
+            "period", "dimension_type", "metric_name", "period_start",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -156,32 +199,173 @@ class AnalyticsMetric(Base):
     period_end = Column(DateTime, nullable=True)
 
 
+class SalaryBenchmark(Base):
+    """Structured salary ranges extracted from web search results.
+
+    Serves salary research from local indexed lookups instead of repeated
+    searches (s1ngularity-web-search-integration.json salary validation).
+    """
+    __tablename__ = "salary_benchmarks"
+    __table_args__ = (
+        Index("ix_salary_benchmarks_lookup", "title_key", "location_key", "level_key", "extracted_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    extracted_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # Lookup keys (normalized title/location/experience level)
+    job_title = Column(String(255), nullable=False)
+    title_key = Column(String(255), nullable=False)
+    location = Column(String(255), nullable=True)
+    location_key = Column(String(255), nullable=False, default="")
+    experience_level = Column(String(50), nullable=True)
+    level_key = Column(String(50), nullable=False, default="")
+
+    # Salary figures
+    salary_min = Column(Float, nullable=False)
+    salary_max = Column(Float, nullable=False)
+    currency = Column(String(10), default="USD")
+    pay_period = Column(String(20), default="annual")  # annual, hourly
+    percentile = Column(Integer, nullable=True)  # 50 = median, None = range/average
+    statistic = Column(String(20), nullable=True)  # range, median, average, percentile
+
+    # Provenance
+    source_url = Column(String(1024), nullable=True)
+    source_title = Column(String(512), nullable=True)
+    published_date = Column(String(50), nullable=True)
+    snippet = Column(Text, nullable=True)
+    query = Column(String(512), nullable=True)
+
+
+class ResumeDocument(Base):
+    """Locally stored resume text.
+
+    Backs the Boolean query engine (resume_index.py) so search strings can
+    be tested before running them on JobDiva.
+    """
+    __tablename__ = "resume_documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # Candidate info
+    candidate_id = Column(String(100), nullable=True, index=True)  # JobDiva candidate ID
+    candidate_email = Column(String(255), nullable=True, index=True)
+    candidate_name = Column(String(255), nullable=True)
+
+    # Content
+    source = Column(String(255), nullable=True)  # filename, jobdiva, manual
+    content_hash = Column(String(64), nullable=False, unique=True, index=True)  # SHA-256 of normalized text
+    text = Column(Text, nullable=False)
+    skills = Column(JSON, nullable=True)  # Canonical skills (skill_index.py)
+
+
+class DedupCandidate(Base):
+    """JobDiva candidate created through the API, as seen by the dedup index.
+
+    Resumes are indexed from `resume_documents`; candidates created without a
+    stored resume are kept here so every worker (and restarts) see them.
+    """
+    __tablename__ = "dedup_candidates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    candidate_id = Column(String(100), nullable=False, index=True)  # JobDiva candidate ID
+    name = Column(String(255), nullable=True)
+    emails = Column(JSON, nullable=True)
+    phones = Column(JSON, nullable=True)
+    text = Column(Text, nullable=True)  # Narrative / resume text, if provided
+
+
+class BackgroundJob(Base):
+    """Durable background job (job_queue.py).
+
+    queued -> running -> succeeded | failed | cancelled. A running job whose
+    lease expires (its worker died) is queued again until it runs out of
+    attempts.
+    """
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        Index("ix_background_jobs_claim", "status", "priority", "run_after"),
+    )
+
+    id = Column(String(36), primary_key=True)  # UUID
+    kind = Column(String(100), nullable=False, index=True)  # Registered handler name
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Retries
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # Backoff / delayed start
+
+    # Progress & control
+    progress = Column(Float, nullable=False, default=0.0)  # 0-100
+    progress_message = Column(String(500), nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    worker_id = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+@dataclass
+class ReplicaEngine:
+    """A read replica and its health state."""
+    url: str
+    engine: AsyncEngine
+    async_session: async_sessionmaker
+    ejected_until: float = 0.0
+    failures: int = 0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+
 # Database connection and session management
 class DatabaseManager:
     """Manages database connections and sessions."""
 
-    def __init__(self, database_url: Optional[str] = None):
+    def __init__(
+        self,
+        database_url: Optional[str] = None,
+        replica_urls: Optional[List[str]] = None,
+        replica_eject_seconds: Optional[float] = None,
+        read_your_writes_seconds: Optional[float] = None,
+        redis_url: Optional[str] = None,
+    ):
         """Initialize database manager.
 
         Args:
             database_url: Database connection URL (defaults to DATABASE_URL env var)
+            replica_urls: Read replica URLs (defaults to comma-separated
+                DATABASE_REPLICA_URLS env var)
+            replica_eject_seconds: How long a failing replica is skipped
+            read_your_writes_seconds: Reads for a recently written session go
+                to the primary for this long (0 disables)
+            redis_url: Redis shared by every worker process for recent-write
+                markers (defaults to DB_READ_YOUR_WRITES_REDIS_URL, else
+                REDIS_URL); without it only this process's writes are seen
         """
-        self.database_url = database_url or os.getenv(
+        self.database_url = self._async_url(database_url or os.getenv(
             "DATABASE_URL",
             "sqlite+aiosqlite:///./s1ngularity.db"  # Fallback to SQLite
-        )
+        ))
 
-        # Auto-convert sync PostgreSQL URLs to async (for Railway compatibility)
-        if self.database_url.startswith("postgresql://"):
-            self.database_url = self.database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        self.is_sqlite = self.database_url.startswith("sqlite")
+        self.pool_settings = self._pool_settings()
 
         # Create async engine
-        self.engine = create_async_engine(
-            self.database_url,
-            echo=os.getenv("DEBUG", "false").lower() == "true",
-            poolclass=NullPool if "sqlite" in self.database_url else None,
-            pool_pre_ping=True,
-        )
+        self.engine = self._create_engine(self.database_url)
 
         # Create session maker
         self.async_session = async_sessionmaker(
@@ -190,6 +374,127 @@ class DatabaseManager:
             expire_on_commit=False,
         )
 
+        # Read replicas (read-only endpoints fall back to the primary)
+        if replica_urls is None:
+            replica_urls = [
+                url.strip()
+                for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+                if url.strip()
+            ]
+        self.replicas: List[ReplicaEngine] = []
+        for url in replica_urls:
+            url = self._async_url(url)
+            engine = self._create_engine(url)
+            self.replicas.append(ReplicaEngine(
+                url=url,
+                engine=engine,
+                async_session=async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+            ))
+        self.replica_eject_seconds = (
+            replica_eject_seconds if replica_eject_seconds is not None
+            else float(os.getenv("DB_REPLICA_EJECT_SECONDS", "30"))
+        )
+        self.read_your_writes_seconds = (
+            read_your_writes_seconds if read_your_writes_seconds is not None
+            else float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+        )
+        self.redis_url = (
+            redis_url if redis_url is not None
+            else os.getenv("DB_READ_YOUR_WRITES_REDIS_URL") or os.getenv("REDIS_URL")
+        )
+        self._round_robin = itertools.count()
+        self._recent_writes: Dict[str, float] = {}
+        self._redis = None
+        self._redis_checked = False
+
+    @staticmethod
+    def _async_url(url: str) -> str:
+        """Auto-convert sync PostgreSQL URLs to async (for Railway compatibility)."""
+        if url.startswith("postgresql://"):
+            return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        return url
+
+    def _create_engine(self, url: str) -> AsyncEngine:
+        engine = create_async_engine(
+            url,
+            echo=os.getenv("DEBUG", "false").lower() == "true",
+            **self._engine_options(url),
+        )
+        if self.is_sqlite:
+            event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        return engine
+
+    def _pool_settings(self) -> Dict[str, Any]:
+        """Read pool configuration from environment variables.
+
+        SQLite keeps several persistent connections: WAL lets readers run
+        alongside the one active writer, and busy_timeout queues competing
+        writers inside SQLite instead of behind the pool. Postgres skips
+        pre-ping by default and relies on pool recycling.
+        """
+        if self.is_sqlite:
+            return {
+                "pool_size": int(os.getenv("DB_SQLITE_POOL_SIZE", "5")),
+                "max_overflow": int(os.getenv("DB_SQLITE_MAX_OVERFLOW", "10")),
+                "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+                "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+                "pool_pre_ping": False,
+                "statement_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "128")),
+                "mmap_size": int(os.getenv("DB_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+            }
+        return {
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+            "statement_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+        }
+
+    def _engine_options(self, url: str) -> Dict[str, Any]:
+        """Build create_async_engine keyword arguments from pool settings."""
+        settings = self.pool_settings
+
+        if self.is_sqlite:
+            connect_args = {
+                "check_same_thread": False,
+                "cached_statements": settings["statement_cache_size"],
+            }
+            if ":memory:" in url or url.rstrip("/").endswith("sqlite+aiosqlite:"):
+                # In-memory databases live and die with one connection
+                return {"poolclass": StaticPool, "connect_args": connect_args}
+            return {
+                "poolclass": AsyncAdaptedQueuePool,
+                "pool_size": settings["pool_size"],
+                "max_overflow": settings["max_overflow"],
+                "pool_timeout": settings["pool_timeout"],
+                "pool_recycle": settings["pool_recycle"],
+                "pool_pre_ping": settings["pool_pre_ping"],
+                "connect_args": connect_args,
+            }
+
+        options: Dict[str, Any] = {
+            "pool_size": settings["pool_size"],
+            "max_overflow": settings["max_overflow"],
+            "pool_timeout": settings["pool_timeout"],
+            "pool_recycle": settings["pool_recycle"],
+            "pool_pre_ping": settings["pool_pre_ping"],
+        }
+        if "asyncpg" in url:
+            options["connect_args"] = {
+                "prepared_statement_cache_size": settings["statement_cache_size"],
+                "statement_cache_size": settings["statement_cache_size"],
+            }
+        return options
+
+    def describe_pool(self) -> str:
+        """Human-readable summary of the pool settings in effect."""
+        backend = "sqlite" if self.is_sqlite else self.engine.dialect.name
+        pool = type(self.engine.pool).__name__
+        details = ", ".join(f"{k}={v}" for k, v in self.pool_settings.items())
+        replicas = f", {len(self.replicas)} read replica(s)" if self.replicas else ""
+        return f"{backend} {pool} ({details}){replicas}"
+
     async def create_tables(self):
         """Create all database tables."""
         async with self.engine.begin() as conn:
@@ -212,6 +517,173 @@ class DatabaseManager:
             finally:
                 await session.close()
 
+    # ------------------------------------------------------------------
+    # Cross-process locks
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def exclusive(self, name: str) -> AsyncIterator[bool]:
+        """Try to take a lock shared by every worker process on this database.
+
+        Background jobs (rollups, archiving, partition DDL) run in every
+        uvicorn worker; only the holder should do the work. Postgres uses a
+        session-level advisory lock on a dedicated connection, SQLite an
+        exclusive lock file next to the database.
+
+        Yields:
+            False if another process holds the lock (skip the work)
+        """
+        if not self.is_sqlite:
+            key = int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+            async with self.engine.connect() as conn:
+                acquired = bool((await conn.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": key}
+                )).scalar())
+                await conn.commit()
+                try:
+                    yield acquired
+                finally:
+                    if acquired:
+                        await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                        await conn.commit()
+            return
+
+        database = self.engine.url.database
+        if not FCNTL_AVAILABLE or not database or database == ":memory:":
+            yield True
+            return
+        fd = os.open(f"{database}.{name}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    # ------------------------------------------------------------------
+    # Read routing
+    # ------------------------------------------------------------------
+
+    async def _redis_client(self):
+        if not self._redis_checked:
+            self._redis_checked = True
+            if REDIS_AVAILABLE and self.redis_url and self.replicas:
+                try:
+                    client = aioredis.from_url(self.redis_url, decode_responses=True)
+                    await client.ping()
+                    self._redis = client
+                except Exception as e:
+                    print(f"Read-your-writes Redis unavailable ({e}); tracking writes per process")
+        return self._redis
+
+    async def mark_write(self, consistency_key: Optional[str]) -> None:
+        """Pin reads for `consistency_key` (a session ID) to the primary for a while.
+
+        The marker goes to Redis when configured, so a read served by another
+        worker process sees it too.
+        """
+        if not consistency_key or not self.replicas or self.read_your_writes_seconds <= 0:
+            return
+        now = time.monotonic()
+        self._recent_writes[consistency_key] = now
+        if len(self._recent_writes) > 10_000:
+            cutoff = now - self.read_your_writes_seconds
+            self._recent_writes = {
+                key: ts for key, ts in self._recent_writes.items() if ts >= cutoff
+            }
+        client = await self._redis_client()
+        if client is not None:
+            try:
+                await client.set(
+                    f"{_RECENT_WRITE_PREFIX}:{consistency_key}", 1,
+                    px=int(self.read_your_writes_seconds * 1000),
+                )
+            except Exception as e:
+                print(f"Read-your-writes marker failed for {consistency_key}: {e}")
+
+    async def _needs_primary(self, consistency_key: Optional[str]) -> bool:
+        if not consistency_key or self.read_your_writes_seconds <= 0:
+            return False
+        written = self._recent_writes.get(consistency_key)
+        if written is not None and time.monotonic() - written < self.read_your_writes_seconds:
+            return True
+        client = await self._redis_client()
+        if client is None:
+            return False
+        try:
+            return bool(await client.exists(f"{_RECENT_WRITE_PREFIX}:{consistency_key}"))
+        except Exception:
+            return True  # Unknown: the primary is always consistent
+
+    def _next_replica(self) -> Optional[ReplicaEngine]:
+        """Round-robin over healthy replicas (None if all are ejected)."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def _eject(self, replica: ReplicaEngine, error: Exception) -> None:
+        replica.failures += 1
+        replica.ejected_until = time.monotonic() + self.replica_eject_seconds
+        print(f"⚠️  Read replica ejected for {self.replica_eject_seconds:.0f}s: {error}")
+
+    async def get_read_session(
+        self,
+        consistency_key: Optional[str] = None,
+        require_primary: bool = False,
+    ) -> AsyncGenerator[AsyncSession, None]:
+        """Get a read-only session, routed to a replica when possible.
+
+        Falls back to the primary when no replica is configured or healthy,
+        when `require_primary` is set, or when `consistency_key` was written
+        within the read-your-writes window.
+        """
+        replica = None
+        if self.replicas and not require_primary and not await self._needs_primary(consistency_key):
+            replica = self._next_replica()
+
+        session = None
+        if replica is not None:
+            session = replica.async_session()
+            try:
+                # Check out a connection now so a dead replica falls back
+                await session.connection()
+                replica.failures = 0
+            except (OSError, DBAPIError) as e:
+                await session.close()
+                self._eject(replica, e)
+                replica, session = None, None
+
+        if session is None:
+            session = self.async_session()
+
+        try:
+            yield session
+        except DBAPIError as e:
+            if replica is not None and e.connection_invalidated:
+                self._eject(replica, e)
+            raise
+        finally:
+            await session.close()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply WAL and performance pragmas on every new SQLite connection."""
+    mmap_size = int(os.getenv("DB_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={mmap_size}")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
 
 # Global database manager instance
 _db_manager: Optional[DatabaseManager] = None
@@ -232,6 +704,22 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_read_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency for read-only endpoints (routed to replicas).
+
+    Requests for a `session_id` written moments ago read from the primary;
+    clients can force this with the `X-Read-Consistency: strong` header.
+    """
+    db_manager = get_db_manager()
+    consistency_key = (
+        request.path_params.get("session_id")
+        or request.query_params.get("session_id")
+    )
+    require_primary = request.headers.get("x-read-consistency", "").lower() == "strong"
+    async for session in db_manager.get_read_session(consistency_key, require_primary):
+        yield session
+
+
 # Initialize database on import (optional)
 async def init_db():
     """Initialize database tables."""
@@ -247,8 +735,14 @@ __all__ = [
     "CandidateInteraction",
     "JobAnalysis",
     "AnalyticsMetric",
+    "SalaryBenchmark",
+    "ResumeDocument",
+    "DedupCandidate",
+    "BackgroundJob",
     "DatabaseManager",
+    "ReplicaEngine",
     "get_db_manager",
     "get_db_session",
+    "get_read_db_session",
     "init_db",
 ]
@@ -6,9 +6,13 @@ This script:
 2. Verifies Redis connection
 3. Seeds initial data (if needed)
 4. Runs health checks
+
+Pass --partition to convert feedback_logs and candidate_interactions to
+monthly range partitions (Postgres).
 """
 
 import asyncio
+import os
 import sys
 from datetime import datetime
 
@@ -21,6 +25,7 @@ from database import (
     JobAnalysis,
     AnalyticsMetric,
 )
+from archival import ARCHIVED_TABLES, PartitionManager
 
 try:
     import redis
@@ -51,6 +56,20 @@ async def init_database():
         print(f"❌ Error creating tables: {e}\n")
         return False
 
+    # Convert append-only tables to monthly partitions (Postgres only)
+    if "--partition" in sys.argv and db_manager.engine.dialect.name == "postgresql":
+        print("🗂️  Partitioning append-only tables by month...")
+        partitions = PartitionManager(
+            months_ahead=int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+        )
+        async with db_manager.engine.begin() as conn:
+            for table in ARCHIVED_TABLES:
+                if await partitions.ensure_partitioned(conn, table):
+                    print(f"   ✓ {table} converted")
+                else:
+                    print(f"   ✓ {table} already partitioned")
+        print()
+
     # Verify tables exist
     print("🔍 Verifying tables...")
     async with db_manager.engine.begin() as conn:
@@ -0,0 +1,239 @@
+"""Content-addressed cache of job description analyses.
+
+JD text is normalized (Unicode, case, whitespace and bullet markers) and
+hashed; completed JD_ANALYSIS responses are stored in `JobAnalysis` keyed by
+that hash and the JobDiva `job_id`, so repeat analyses of the same JD - from
+any recruiter or session, after cosmetic edits - are served from the table
+instead of a new LLM call.
+
+Only plain analysis requests are keyed: a JD pasted with any other
+instruction ("write outreach for this JD", "check this JD for bias") is a
+different question about the same JD and goes to the LLM.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import JobAnalysis
+
+_BULLET_RE = re.compile(r"^\s*(?:[-*•·▪●◦]|\d+[.)])\s+", re.MULTILINE)
+_WHITESPACE_RE = re.compile(r"\s+")
+_HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s*|\*\*)?(?P<title>[^\n*#:|]{3,60}?)(?:\*\*)?\s*:?\s*$")
+_ITEM_RE = re.compile(r"^\s*(?:[-*•·▪●◦]|\d+[.)])\s+(?P<item>.+?)\s*$")
+_CODE_BLOCK_RE = re.compile(r"```[a-z]*\n(?P<body>.*?)```", re.DOTALL)
+_WORD_RE = re.compile(r"[a-z]+")
+# Instruction words that still mean "analyze this JD" and nothing more
+_ANALYSIS_WORDS = frozenset("""
+    analyze analyse analysis analyzing parse break down breakdown review
+    intake summarize summarise summary jd jds job description descriptions
+    posting role position req requisition opening this the a an these
+    following below here is are it of for me please can could you do run
+    on new
+""".split())
+_TITLE_RE = re.compile(r"(?:job\s+title|position|role)\s*[:\-]\s*(?P<title>[^\n]{3,120})", re.IGNORECASE)
+
+# Report headings (s1ngularity-jd-intelligence.json) -> JobAnalysis columns
+_SECTIONS = {
+    "core_skills": ("core", "must have", "must-have", "required"),
+    "nice_to_have": ("nice to have", "nice-to-have", "preferred", "secondary"),
+    "tools_platforms": ("tools", "platforms", "tech stack"),
+    "red_flags": ("red flag",),
+    "ideal_profile": ("ideal candidate", "ideal profile"),
+}
+
+
+def normalize_jd(text: str) -> str:
+    """Canonical form of a JD: NFKC, lowercase, no bullets, single spaces."""
+    text = unicodedata.normalize("NFKC", text)
+    text = _BULLET_RE.sub("", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def jd_hash(text: str) -> str:
+    """SHA-256 of the normalized JD text."""
+    return hashlib.sha256(normalize_jd(text).encode()).hexdigest()
+
+
+def _split_instruction(message: str) -> Tuple[str, str]:
+    split = re.split(r"\n\s*\n|:\s*\n", message, maxsplit=1)
+    if len(split) == 2 and len(split[0]) < 300 and len(split[1]) > len(split[0]):
+        return split[0], split[1]
+    return "", message
+
+
+def extract_jd_text(message: str) -> str:
+    """Strip a short leading instruction ("Analyze this JD:") from a message."""
+    return _split_instruction(message)[1]
+
+
+def is_plain_analysis(message: str) -> bool:
+    """Whether a message only asks for an analysis of the pasted JD."""
+    instruction = _split_instruction(message)[0]
+    return set(_WORD_RE.findall(instruction.lower())) <= _ANALYSIS_WORDS
+
+
+def parse_analysis(analysis: str) -> Dict[str, Any]:
+    """Best-effort extraction of the report sections into JobAnalysis columns."""
+    parsed: Dict[str, Any] = {}
+    section: Optional[str] = None
+    items: Dict[str, List[str]] = {}
+
+    for line in analysis.splitlines():
+        item = _ITEM_RE.match(line)
+        if item and section:
+            items.setdefault(section, []).append(item.group("item").strip("*` "))
+            continue
+        heading = _HEADING_RE.match(line)
+        if heading:
+            title = heading.group("title").lower()
+            section = next(
+                (column for column, keys in _SECTIONS.items() if any(k in title for k in keys)),
+                None,
+            )
+
+    for column, values in items.items():
+        parsed[column] = values[:50]
+    if "ideal_profile" in parsed:
+        parsed["ideal_profile"] = {"summary": parsed["ideal_profile"]}
+
+    boolean = [
+        block.group("body").strip()
+        for block in _CODE_BLOCK_RE.finditer(analysis)
+        if re.search(r"\b(?:AND|OR)\b", block.group("body"))
+    ]
+    if boolean:
+        parsed["boolean_query"] = "\n\n".join(boolean)
+    return parsed
+
+
+def guess_job_title(jd_text: str) -> str:
+    """Job title from a "Job Title:" line, else the first short line."""
+    match = _TITLE_RE.search(jd_text)
+    if match:
+        return match.group("title").strip()[:255]
+    for line in jd_text.splitlines():
+        line = line.strip(" #*")
+        if 3 <= len(line) <= 120:
+            return line[:255]
+    return "Unknown"
+
+
+class JDAnalysisCache:
+    """Stores and serves JD analyses from `JobAnalysis` by content hash."""
+
+    def __init__(self, min_chars: int = 200):
+        """Initialize JD analysis cache.
+
+        Args:
+            min_chars: Shorter messages are not treated as a pasted JD
+        """
+        self.min_chars = min_chars
+
+    def key_for(self, message: str) -> Optional[str]:
+        """Hash of the JD pasted in a message.
+
+        None if there is no JD, or the instruction asks for more than an
+        analysis of it.
+        """
+        if not is_plain_analysis(message):
+            return None
+        return self.key_for_jd(extract_jd_text(message))
+
+    def key_for_jd(self, jd_text: str) -> Optional[str]:
+        """Hash of a bare JD, exactly as given (None if too short)."""
+        if len(jd_text.strip()) < self.min_chars:
+            return None
+        return jd_hash(jd_text)
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        content_hash: str,
+        job_id: Optional[str] = None,
+    ) -> Optional[JobAnalysis]:
+        """Latest analysis for a JD hash, preferring the row for `job_id`."""
+        order = [JobAnalysis.timestamp.desc()]
+        if job_id:
+            order.insert(0, case((JobAnalysis.job_id == job_id, 0), else_=1))
+        stmt = (
+            select(JobAnalysis)
+            .where(JobAnalysis.jd_hash == content_hash, JobAnalysis.analysis.is_not(None))
+            .order_by(*order)
+            .limit(1)
+        )
+        return (await db.execute(stmt)).scalar_one_or_none()
+
+    async def store(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        content_hash: str,
+        jd_text: str,
+        analysis: str,
+        job_id: Optional[str] = None,
+        job_title: Optional[str] = None,
+        company: Optional[str] = None,
+    ) -> None:
+        """Insert or refresh the analysis row for (job_id or hash)."""
+        stmt = select(JobAnalysis)
+        if job_id:
+            stmt = stmt.where(JobAnalysis.job_id == job_id)
+        else:
+            stmt = stmt.where(JobAnalysis.jd_hash == content_hash, JobAnalysis.job_id.is_(None))
+        row = (await db.execute(stmt.limit(1))).scalar_one_or_none()
+
+        if row is None:
+            row = JobAnalysis(job_id=job_id)
+            db.add(row)
+        row.session_id = session_id
+        row.jd_hash = content_hash
+        row.analysis = analysis
+        row.job_title = job_title or row.job_title or guess_job_title(jd_text)
+        row.company = company or row.company
+        for column in ("core_skills", "nice_to_have", "tools_platforms", "red_flags",
+                       "ideal_profile", "boolean_query"):
+            setattr(row, column, None)
+        for column, value in parse_analysis(analysis).items():
+            setattr(row, column, value)
+        row.timestamp = datetime.utcnow()
+
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent request stored the same job_id first
+            await db.rollback()
+
+
+# Global JD analysis cache instance
+_jd_cache: Optional[JDAnalysisCache] = None
+
+
+def get_jd_cache() -> JDAnalysisCache:
+    """Get or create global JD analysis cache instance."""
+    global _jd_cache
+    if _jd_cache is None:
+        _jd_cache = JDAnalysisCache(
+            min_chars=int(os.getenv("JD_CACHE_MIN_CHARS", "200")),
+        )
+    return _jd_cache
+
+
+__all__ = [
+    "JDAnalysisCache",
+    "extract_jd_text",
+    "get_jd_cache",
+    "is_plain_analysis",
+    "jd_hash",
+    "normalize_jd",
+    "parse_analysis",
+]
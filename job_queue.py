@@ -0,0 +1,585 @@
+"""Durable background job queue.
+
+Long operations (bulk imports, batch screening, rollups, index warming)
+run as jobs instead of FastAPI `BackgroundTasks`, so they survive web
+worker restarts, can be monitored and cancelled, and run in separate
+worker processes (`python worker.py`):
+
+- `background_jobs` is the source of truth: priority, attempts, progress,
+  cancellation and a lease per running job. Claims are optimistic
+  (`UPDATE ... WHERE status = 'queued'`), which is safe across workers on
+  SQLite and Postgres
+- Redis, when reachable, only carries wakeups (workers block on a list
+  instead of polling) and progress events for SSE; without it workers poll
+  the table and watchers re-read the row
+- A worker heartbeats its leases; jobs of a dead worker are re-queued when
+  the lease expires. Failures retry with exponential backoff until
+  `max_attempts`
+
+Handlers are registered with `@job_handler("kind")` and receive a
+`JobContext` for progress reporting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+
+from database import BackgroundJob, DatabaseManager, get_db_manager
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+TERMINAL_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+_KEY_PREFIX = "s1ngularity:jobs"
+
+
+class UnknownJobKind(ValueError):
+    """Raised when enqueuing a job without a registered handler."""
+
+
+class JobContext:
+    """Handed to a running handler for progress reporting."""
+
+    def __init__(self, queue: "JobQueue", job: Dict[str, Any]):
+        self.queue = queue
+        self.job_id: str = job["id"]
+        self.kind: str = job["kind"]
+        self.attempt: int = job["attempts"]
+        self.worker_id: Optional[str] = job.get("worker_id")
+        self.cancel_requested = False
+        self.lease_lost = False
+        self._last_write = 0.0
+
+    async def progress(self, percent: float, message: Optional[str] = None, force: bool = False) -> None:
+        """Report progress (0-100). Writes are throttled to one per
+        `queue.progress_interval` seconds unless `force` is set."""
+        loop = asyncio.get_running_loop()
+        if not force and percent < 100 and loop.time() - self._last_write < self.queue.progress_interval:
+            return
+        self._last_write = loop.time()
+        await self.queue._update(
+            self.job_id,
+            lease_owner=self.worker_id,
+            progress=round(max(0.0, min(100.0, percent)), 2),
+            progress_message=message[:500] if message else None,
+        )
+
+
+JobHandler = Callable[[JobContext, Dict[str, Any]], Awaitable[Any]]
+_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register an async handler `(ctx, payload) -> JSON-serializable result`."""
+    def register(handler: JobHandler) -> JobHandler:
+        _HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+def registered_kinds() -> List[str]:
+    return sorted(_HANDLERS)
+
+
+def job_to_dict(job: BackgroundJob) -> Dict[str, Any]:
+    def iso(value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() if value else None
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "priority": job.priority,
+        "progress": job.progress,
+        "progress_message": job.progress_message,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "cancel_requested": job.cancel_requested,
+        "payload": job.payload,
+        "result": job.result,
+        "error": job.error,
+        "worker_id": job.worker_id,
+        "created_at": iso(job.created_at),
+        "updated_at": iso(job.updated_at),
+        "started_at": iso(job.started_at),
+        "finished_at": iso(job.finished_at),
+        "run_after": iso(job.run_after),
+    }
+
+
+class JobQueue:
+    """Enqueue, claim, update and watch jobs."""
+
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        redis_url: Optional[str] = None,
+        lease_seconds: int = 120,
+        retry_backoff_seconds: float = 30.0,
+        progress_interval: float = 1.0,
+    ):
+        """Initialize job queue.
+
+        Args:
+            db_manager: Database manager holding `background_jobs`
+            redis_url: Redis for wakeups and progress events (optional)
+            lease_seconds: A running job is re-queued if its worker stops
+                heartbeating for this long
+            retry_backoff_seconds: Delay before the first retry (doubles
+                per attempt)
+            progress_interval: Minimum seconds between progress writes
+        """
+        self.db_manager = db_manager or get_db_manager()
+        self.redis_url = redis_url
+        self.lease_seconds = lease_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.progress_interval = progress_interval
+        self._redis = None
+        self._redis_checked = False
+
+    async def _redis_client(self):
+        if not self._redis_checked:
+            self._redis_checked = True
+            if REDIS_AVAILABLE and self.redis_url:
+                try:
+                    client = aioredis.from_url(self.redis_url, decode_responses=True)
+                    await client.ping()
+                    self._redis = client
+                except Exception as e:
+                    print(f"Job queue Redis unavailable ({e}); using database polling")
+        return self._redis
+
+    @property
+    def backend(self) -> str:
+        return "redis+db" if self._redis is not None else "db"
+
+    async def _publish(self, job: Dict[str, Any], wakeup: bool = False) -> None:
+        client = await self._redis_client()
+        if client is None:
+            return
+        try:
+            if wakeup:
+                await client.lpush(f"{_KEY_PREFIX}:wakeup", job["id"])
+            await client.publish(f"{_KEY_PREFIX}:events:{job['id']}", json.dumps(job))
+        except Exception as e:
+            print(f"Job queue Redis publish failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Producer API
+    # ------------------------------------------------------------------
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        max_attempts: int = 3,
+        delay_seconds: float = 0,
+    ) -> Dict[str, Any]:
+        """Store a new job and wake a worker.
+
+        Raises:
+            UnknownJobKind: No handler registered for `kind`
+        """
+        if kind not in _HANDLERS:
+            raise UnknownJobKind(f"Unknown job kind: {kind} (available: {', '.join(registered_kinds())})")
+        now = datetime.utcnow()
+        job = BackgroundJob(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            status=QUEUED,
+            priority=priority,
+            payload=payload or {},
+            max_attempts=max(1, max_attempts),
+            run_after=now + timedelta(seconds=delay_seconds),
+            progress=0.0,
+            attempts=0,
+            cancel_requested=False,
+            created_at=now,
+            updated_at=now,
+        )
+        async with self.db_manager.async_session() as db:
+            db.add(job)
+            await db.commit()
+            snapshot = job_to_dict(job)
+        await self._publish(snapshot, wakeup=True)
+        return snapshot
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        async with self.db_manager.async_session() as db:
+            job = await db.get(BackgroundJob, job_id)
+            return job_to_dict(job) if job is not None else None
+
+    async def list(self, status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        stmt = select(BackgroundJob).order_by(BackgroundJob.created_at.desc()).limit(limit)
+        if status:
+            stmt = stmt.where(BackgroundJob.status == status)
+        if kind:
+            stmt = stmt.where(BackgroundJob.kind == kind)
+        async with self.db_manager.async_session() as db:
+            return [job_to_dict(job) for job in (await db.execute(stmt)).scalars()]
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job now; ask a running job's worker to stop it."""
+        now = datetime.utcnow()
+        async with self.db_manager.async_session() as db:
+            await db.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job_id, BackgroundJob.status == QUEUED)
+                .values(status=CANCELLED, cancel_requested=True, finished_at=now, updated_at=now)
+            )
+            await db.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job_id, BackgroundJob.status == RUNNING)
+                .values(cancel_requested=True, updated_at=now)
+            )
+            await db.commit()
+        job = await self.get(job_id)
+        if job is not None:
+            await self._publish(job)
+        return job
+
+    # ------------------------------------------------------------------
+    # Worker API
+    # ------------------------------------------------------------------
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Take the highest-priority runnable job (None if there is none)."""
+        now = datetime.utcnow()
+        async with self.db_manager.async_session() as db:
+            await self._recover_expired(db, now)
+            candidates = (await db.execute(
+                select(BackgroundJob.id)
+                .where(BackgroundJob.status == QUEUED, BackgroundJob.run_after <= now)
+                .order_by(BackgroundJob.priority.desc(), BackgroundJob.created_at)
+                .limit(8)
+            )).scalars().all()
+            for job_id in candidates:
+                claimed = await db.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job_id, BackgroundJob.status == QUEUED)
+                    .values(
+                        status=RUNNING,
+                        worker_id=worker_id,
+                        attempts=BackgroundJob.attempts + 1,
+                        started_at=now,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        updated_at=now,
+                    )
+                )
+                if claimed.rowcount == 1:
+                    await db.commit()
+                    job = job_to_dict(await db.get(BackgroundJob, job_id, populate_existing=True))
+                    await self._publish(job)
+                    return job
+            await db.commit()
+        return None
+
+    async def _recover_expired(self, db, now: datetime) -> None:
+        """Re-queue (or fail, if out of attempts) jobs whose worker stopped heartbeating."""
+        expired = (BackgroundJob.status == RUNNING, BackgroundJob.lease_expires_at < now)
+        await db.execute(
+            update(BackgroundJob)
+            .where(*expired, BackgroundJob.attempts >= BackgroundJob.max_attempts)
+            .values(status=FAILED, error="Worker lease expired", finished_at=now, updated_at=now)
+        )
+        await db.execute(
+            update(BackgroundJob)
+            .where(*expired)
+            .values(status=QUEUED, worker_id=None, lease_expires_at=None, run_after=now, updated_at=now)
+        )
+
+    async def wait_for_work(self, timeout: float) -> None:
+        """Block until a wakeup arrives (Redis) or `timeout` passes."""
+        client = await self._redis_client()
+        if client is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await client.brpop(f"{_KEY_PREFIX}:wakeup", timeout=max(1, int(timeout)))
+        except Exception:
+            await asyncio.sleep(timeout)
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> Tuple[bool, bool]:
+        """Extend a running job's lease.
+
+        Returns:
+            (cancellation requested, lease lost to lease recovery)
+        """
+        now = datetime.utcnow()
+        async with self.db_manager.async_session() as db:
+            extended = await db.execute(
+                update(BackgroundJob)
+                .where(
+                    BackgroundJob.id == job_id,
+                    BackgroundJob.worker_id == worker_id,
+                    BackgroundJob.status == RUNNING,
+                )
+                .values(lease_expires_at=now + timedelta(seconds=self.lease_seconds))
+            )
+            await db.commit()
+            cancel = (await db.execute(
+                select(BackgroundJob.cancel_requested).where(BackgroundJob.id == job_id)
+            )).scalar_one_or_none()
+        return bool(cancel), extended.rowcount == 0
+
+    async def _update(self, job_id: str, lease_owner: Optional[str] = None, **values: Any) -> Optional[Dict[str, Any]]:
+        """Update a job and publish it.
+
+        With `lease_owner`, only a job still RUNNING on that worker is
+        updated: once lease recovery has handed the job on, a stalled
+        worker's late result or progress is dropped (returns None).
+        """
+        values["updated_at"] = datetime.utcnow()
+        stmt = update(BackgroundJob).where(BackgroundJob.id == job_id)
+        if lease_owner is not None:
+            stmt = stmt.where(BackgroundJob.worker_id == lease_owner, BackgroundJob.status == RUNNING)
+        async with self.db_manager.async_session() as db:
+            updated = await db.execute(stmt.values(**values))
+            await db.commit()
+            if updated.rowcount == 0:
+                if lease_owner is not None:
+                    print(f"Job {job_id} no longer leased to {lease_owner}; update dropped")
+                return None
+            job = await db.get(BackgroundJob, job_id, populate_existing=True)
+            snapshot = job_to_dict(job) if job is not None else None
+        if snapshot is not None:
+            await self._publish(snapshot)
+        return snapshot
+
+    async def complete(self, job_id: str, worker_id: str, result: Any) -> Optional[Dict[str, Any]]:
+        return await self._update(
+            job_id, worker_id, status=SUCCEEDED, result=result, error=None, progress=100.0,
+            finished_at=datetime.utcnow(), lease_expires_at=None,
+        )
+
+    async def mark_cancelled(self, job_id: str, worker_id: str) -> None:
+        await self._update(
+            job_id, worker_id, status=CANCELLED, finished_at=datetime.utcnow(), lease_expires_at=None,
+        )
+
+    async def fail(self, job_id: str, worker_id: str, error: str) -> None:
+        """Schedule a retry with backoff, or fail the job for good."""
+        job = await self.get(job_id)
+        if job is None:
+            return
+        if job["attempts"] < job["max_attempts"] and not job["cancel_requested"]:
+            delay = self.retry_backoff_seconds * 2 ** (job["attempts"] - 1)
+            await self._update(
+                job_id, worker_id, status=QUEUED, error=error, worker_id=None, lease_expires_at=None,
+                run_after=datetime.utcnow() + timedelta(seconds=delay),
+            )
+        else:
+            await self._update(
+                job_id, worker_id, status=FAILED, error=error, finished_at=datetime.utcnow(),
+                lease_expires_at=None,
+            )
+
+    async def release(self, job_id: str, worker_id: str) -> None:
+        """Put a job back without counting the attempt (worker shutdown)."""
+        released = await self._update(
+            job_id, worker_id, status=QUEUED, worker_id=None, lease_expires_at=None,
+            attempts=BackgroundJob.attempts - 1, run_after=datetime.utcnow(),
+        )
+        client = await self._redis_client()
+        if released is not None and client is not None:
+            await self._publish({"id": job_id}, wakeup=True)
+
+    # ------------------------------------------------------------------
+    # Watching
+    # ------------------------------------------------------------------
+
+    async def watch(self, job_id: str, poll_interval: float = 1.0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job on every change until it reaches a terminal status.
+
+        Redis events trigger an immediate re-read; without Redis (or between
+        events) the row is polled every `poll_interval` seconds.
+        """
+        client = await self._redis_client()
+        pubsub = None
+        if client is not None:
+            pubsub = client.pubsub()
+            await pubsub.subscribe(f"{_KEY_PREFIX}:events:{job_id}")
+        try:
+            last_seen = None
+            while True:
+                job = await self.get(job_id)
+                if job is None:
+                    return
+                if job["updated_at"] != last_seen:
+                    last_seen = job["updated_at"]
+                    yield job
+                if job["status"] in TERMINAL_STATUSES:
+                    return
+                if pubsub is not None:
+                    await pubsub.get_message(ignore_subscribe_messages=True, timeout=poll_interval)
+                else:
+                    await asyncio.sleep(poll_interval)
+        finally:
+            if pubsub is not None:
+                await pubsub.unsubscribe()
+                await pubsub.close()
+
+
+class JobWorker:
+    """Runs claimed jobs with bounded concurrency."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int = 2,
+        poll_interval: float = 2.0,
+        shutdown_grace_seconds: float = 30.0,
+        worker_id: Optional[str] = None,
+    ):
+        """Initialize job worker.
+
+        Args:
+            queue: Job queue to consume
+            concurrency: Jobs run at the same time
+            poll_interval: Seconds between claims when idle
+            shutdown_grace_seconds: Time running jobs get to finish on stop
+                before they are released back to the queue
+            worker_id: Lease owner name (default: host:pid:random)
+        """
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.shutdown_grace_seconds = shutdown_grace_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+
+    async def run(self) -> None:
+        """Claim and run jobs until `stop()`."""
+        print(f"🛠️ Job worker {self.worker_id} started (concurrency={self.concurrency})")
+        slots = asyncio.Semaphore(self.concurrency)
+        while not self._stopping.is_set():
+            await slots.acquire()
+            if self._stopping.is_set():
+                slots.release()
+                break
+            try:
+                job = await self.queue.claim(self.worker_id)
+            except Exception as e:
+                print(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                slots.release()
+                await self._idle()
+                continue
+            task = asyncio.create_task(self._execute(job))
+            self._running[job["id"]] = task
+            task.add_done_callback(lambda _, job_id=job["id"]: (self._running.pop(job_id, None), slots.release()))
+
+    async def _idle(self) -> None:
+        waiter = asyncio.create_task(self.queue.wait_for_work(self.poll_interval))
+        stopper = asyncio.create_task(self._stopping.wait())
+        await asyncio.wait({waiter, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        for task in (waiter, stopper):
+            task.cancel()
+
+    async def stop(self) -> None:
+        """Stop claiming; give running jobs the grace period, then release them."""
+        self._stopping.set()
+        tasks = list(self._running.values())
+        if tasks:
+            print(f"⏳ Waiting for {len(tasks)} running job(s)")
+            await asyncio.wait(tasks, timeout=self.shutdown_grace_seconds)
+        for job_id, task in list(self._running.items()):
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await self.queue.release(job_id, self.worker_id)
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        ctx = JobContext(self.queue, job)
+        handler = _HANDLERS.get(job["kind"])
+        if handler is None:
+            await self.queue.fail(job["id"], self.worker_id, f"No handler for job kind: {job['kind']}")
+            return
+
+        work = asyncio.create_task(handler(ctx, job["payload"] or {}))
+        heartbeat = asyncio.create_task(self._heartbeat(ctx, work))
+        try:
+            result = await work
+        except asyncio.CancelledError:
+            if ctx.lease_lost:
+                print(f"⚠️ Job {job['id']} ({job['kind']}) lease expired; another worker owns it now")
+                return
+            if ctx.cancel_requested:
+                await self.queue.mark_cancelled(job["id"], self.worker_id)
+                print(f"🛑 Job {job['id']} ({job['kind']}) cancelled")
+                return
+            if not work.done():
+                work.cancel()
+            raise  # worker shutdown: stop() releases the job
+        except Exception as e:
+            print(f"❌ Job {job['id']} ({job['kind']}) failed: {e}")
+            await self.queue.fail(job["id"], self.worker_id, str(e) or e.__class__.__name__)
+        else:
+            if await self.queue.complete(job["id"], self.worker_id, result) is not None:
+                print(f"✅ Job {job['id']} ({job['kind']}) succeeded")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, ctx: JobContext, work: asyncio.Task) -> None:
+        interval = max(1.0, min(self.queue.lease_seconds / 3, 5.0))
+        while not work.done():
+            await asyncio.sleep(interval)
+            try:
+                cancel, lease_lost = await self.queue.heartbeat(ctx.job_id, self.worker_id)
+                if cancel or lease_lost:
+                    # A lost lease means the job was requeued: stop duplicating it
+                    ctx.cancel_requested = cancel
+                    ctx.lease_lost = lease_lost
+                    work.cancel()
+                    return
+            except Exception as e:
+                print(f"Job heartbeat failed: {e}")
+
+
+# Global job queue instance
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create global job queue instance."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            redis_url=os.getenv("JOBS_REDIS_URL") or os.getenv("REDIS_URL"),
+            lease_seconds=int(os.getenv("JOB_LEASE_SECONDS", "120")),
+            retry_backoff_seconds=float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30")),
+        )
+    return _job_queue
+
+
+__all__ = [
+    "CANCELLED",
+    "FAILED",
+    "QUEUED",
+    "RUNNING",
+    "SUCCEEDED",
+    "TERMINAL_STATUSES",
+    "JobContext",
+    "JobQueue",
+    "JobWorker",
+    "UnknownJobKind",
+    "get_job_queue",
+    "job_handler",
+    "job_to_dict",
+    "registered_kinds",
+]
@@ -0,0 +1,230 @@
+"""Exact-match LLM result cache for deterministic task types.
+
+Boolean generation and JD parsing are meant to be deterministic ("same
+input produces same structure"), yet they ran at ANTHROPIC_TEMPERATURE and
+always called the provider. Task types with a policy here:
+
+- Run at temperature 0
+- Are answered from the cache when the same request was seen before. The
+  key is (model, compiled system prompt hash, normalized message, context
+  hash); history and max_tokens are part of the context hash, so editing a
+  module or a different conversation never reuses an answer
+- Are cached in two tiers: an in-process LRU in front of Redis (shared
+  across workers, optional), both with the policy's TTL
+
+Callers can bypass the lookup explicitly (the fresh answer is still stored).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from module_loader import TaskType
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_KEY_PREFIX = "s1ngularity:llm-cache"
+
+# Deterministic task types and their TTL (seconds)
+DEFAULT_POLICIES = {
+    TaskType.BOOLEAN_SEARCH: 7 * 86400,
+    TaskType.JD_ANALYSIS: 7 * 86400,
+}
+
+
+@dataclass
+class TaskPolicy:
+    """How a deterministic task type is generated and cached."""
+    ttl_seconds: float
+    temperature: float = 0.0
+
+
+def normalize_message(message: str) -> str:
+    """Unicode- and whitespace-normalized message (case is kept)."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", message)).strip()
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+class LLMResultCache:
+    """Two-tier (LRU + Redis) exact-match cache of LLM results."""
+
+    def __init__(
+        self,
+        policies: Optional[Dict[TaskType, float]] = None,
+        redis_url: Optional[str] = None,
+        max_entries: int = 2000,
+    ):
+        """Initialize LLM result cache.
+
+        Args:
+            policies: Deterministic task type -> TTL seconds
+            redis_url: Shared second tier (optional)
+            max_entries: In-process LRU capacity
+        """
+        ttls = policies if policies is not None else DEFAULT_POLICIES
+        self.policies = {task: TaskPolicy(ttl_seconds=ttl) for task, ttl in ttls.items()}
+        self.redis_url = redis_url
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._redis = None
+        self._redis_checked = False
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def policy_for(self, task_type: TaskType) -> Optional[TaskPolicy]:
+        return self.policies.get(task_type)
+
+    @staticmethod
+    def key_for(
+        model: str,
+        system_prompt: str,
+        message: str,
+        context: Optional[Dict[str, Any]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """Cache key for one fully compiled request."""
+        context_hash = _digest(json.dumps(
+            {"context": context or {}, "history": history or [], "max_tokens": max_tokens},
+            sort_keys=True, default=str,
+        ))
+        return _digest("\x1f".join((model, _digest(system_prompt), normalize_message(message), context_hash)))
+
+    async def _redis_client(self):
+        if not self._redis_checked:
+            self._redis_checked = True
+            if REDIS_AVAILABLE and self.redis_url:
+                try:
+                    client = aioredis.from_url(self.redis_url, decode_responses=True)
+                    await client.ping()
+                    self._redis = client
+                except Exception as e:
+                    print(f"LLM cache Redis unavailable ({e}); using in-process cache only")
+        return self._redis
+
+    async def get(self, task_type: TaskType, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result (with `"tier": "memory" | "redis"`), or None."""
+        policy = self.policy_for(task_type)
+        if policy is None:
+            return None
+        stats = self._stats[task_type.value]
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                stats["memory_hits"] += 1
+                return {**value, "tier": "memory"}
+            del self._entries[key]
+
+        client = await self._redis_client()
+        if client is not None:
+            try:
+                raw = await client.get(f"{_KEY_PREFIX}:{key}")
+            except Exception as e:
+                print(f"LLM cache Redis read failed: {e}")
+                raw = None
+            if raw:
+                value = json.loads(raw)
+                self._remember(key, value, now + policy.ttl_seconds)
+                stats["redis_hits"] += 1
+                return {**value, "tier": "redis"}
+
+        stats["misses"] += 1
+        return None
+
+    async def set(self, task_type: TaskType, key: str, value: Dict[str, Any]) -> None:
+        """Store a result in both tiers with the task type's TTL."""
+        policy = self.policy_for(task_type)
+        if policy is None:
+            return
+        self._remember(key, value, time.time() + policy.ttl_seconds)
+        self._stats[task_type.value]["stores"] += 1
+        client = await self._redis_client()
+        if client is not None:
+            try:
+                await client.set(f"{_KEY_PREFIX}:{key}", json.dumps(value), ex=int(policy.ttl_seconds))
+            except Exception as e:
+                print(f"LLM cache Redis write failed: {e}")
+
+    def record_bypass(self, task_type: TaskType) -> None:
+        self._stats[task_type.value]["bypasses"] += 1
+
+    def _remember(self, key: str, value: Dict[str, Any], expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rates per task type and tier."""
+        per_task = {}
+        for task, stats in self._stats.items():
+            hits = stats["memory_hits"] + stats["redis_hits"]
+            lookups = hits + stats["misses"]
+            per_task[task] = {
+                **{name: int(value) for name, value in stats.items()},
+                "hit_rate": round(hits / lookups, 4) if lookups else None,
+            }
+        return {
+            "entries": len(self._entries),
+            "backend": "memory+redis" if self._redis is not None else "memory",
+            "policies": {task.value: policy.ttl_seconds for task, policy in self.policies.items()},
+            "task_types": per_task,
+        }
+
+
+def _parse_policies(raw: str) -> Dict[TaskType, float]:
+    """Parse "boolean_search:604800,jd_analysis:604800" (task type:TTL seconds)."""
+    policies = {}
+    for item in raw.split(","):
+        if ":" not in item:
+            continue
+        name, value = item.split(":", 1)
+        try:
+            policies[TaskType(name.strip())] = float(value)
+        except ValueError:
+            print(f"Warning: ignoring LLM cache policy {item!r}")
+    return policies
+
+
+# Global LLM result cache instance
+_llm_cache: Optional[LLMResultCache] = None
+
+
+def get_llm_cache() -> LLMResultCache:
+    """Get or create global LLM result cache instance."""
+    global _llm_cache
+    if _llm_cache is None:
+        raw_policies = os.getenv("LLM_CACHE_POLICIES")
+        _llm_cache = LLMResultCache(
+            policies=_parse_policies(raw_policies) if raw_policies is not None else None,
+            redis_url=os.getenv("LLM_CACHE_REDIS_URL") or os.getenv("REDIS_URL"),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000")),
+        )
+    return _llm_cache
+
+
+__all__ = [
+    "LLMResultCache",
+    "TaskPolicy",
+    "get_llm_cache",
+    "normalize_message",
+]
@@ -0,0 +1,480 @@
+"""LLM provider routing with failover and hedged requests.
+
+`S1NGULARITYAgent` used to bind to a single `LLM_PROVIDER`, so a slow or
+failing provider was our outage and our p99. `ProviderRouter` holds every
+configured provider (Anthropic, OpenAI) and:
+
+- Streams each call, so time-to-first-token is observable per provider
+- Fails over to the alternate provider on 5xx, 429, connection errors and
+  timeouts (client errors like 400 are raised, not retried elsewhere)
+- Optionally hedges: if the primary has not produced a token after its
+  observed p95 time-to-first-token, the same request goes to the alternate
+  provider; the first to produce a token wins and the other is cancelled
+- Reports which provider (and model) served each answer
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ANTHROPIC = "anthropic"
+OPENAI = "openai"
+
+# Model tiers (model_routing.py picks one per request)
+LARGE = "large"
+SMALL = "small"
+
+# Finish reasons meaning the output hit max_tokens
+TRUNCATED = ("max_tokens", "length")
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised when no configured provider could serve a request."""
+
+
+@dataclass
+class LLMRequest:
+    """Provider-neutral chat request."""
+    system_prompt: str
+    user_message: str
+    context: Optional[Dict[str, Any]] = None
+    history: Optional[List[Dict[str, str]]] = None
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    cache_system: bool = False  # Mark the system prompt as a cacheable prefix
+    tier: str = LARGE  # Model tier
+    stop: Tuple[str, ...] = ()  # Stop sequences
+
+
+@dataclass
+class LLMResult:
+    """Generated text and how it was served."""
+    text: str
+    provider: str
+    model: str
+    hedged: bool = False  # A hedge request was sent
+    failovers: List[str] = field(default_factory=list)  # Providers that failed first
+    first_token_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    finish_reason: Optional[str] = None  # Provider stop reason (max_tokens/length = truncated)
+
+    @property
+    def truncated(self) -> bool:
+        return self.finish_reason in TRUNCATED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "finish_reason": self.finish_reason,
+            "hedged": self.hedged,
+            "failovers": self.failovers,
+            "first_token_ms": self.first_token_ms,
+            "total_ms": self.total_ms,
+        }
+
+
+class Finish(str):
+    """Last item of a provider stream: the finish reason, not text."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether another provider might succeed: 5xx, 429, timeouts, connection errors."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name or "Overloaded" in name
+
+
+class AnthropicProvider:
+    """Anthropic Messages API (streaming)."""
+
+    name = ANTHROPIC
+
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+        from anthropic import AsyncAnthropic
+        self.client = AsyncAnthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
+        self.model = model or os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20250101")
+        self.models = {
+            LARGE: self.model,
+            SMALL: os.getenv("ANTHROPIC_SMALL_MODEL", "claude-3-5-haiku-latest"),
+        }
+
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
+        messages = list(request.history or [])
+        messages.append({"role": "user", "content": request.user_message})
+        if request.context:
+            messages[-1]["content"] += f"\n\nContext: {request.context}"
+
+        options = {"stop_sequences": list(request.stop)} if request.stop else {}
+        stream = await self.client.messages.create(
+            model=self.models.get(request.tier, self.model),
+            max_tokens=request.max_tokens or int(os.getenv("ANTHROPIC_MAX_TOKENS", "4096")),
+            temperature=(
+                request.temperature if request.temperature is not None
+                else float(os.getenv("ANTHROPIC_TEMPERATURE", "0.7"))
+            ),
+            system=(
+                [{"type": "text", "text": request.system_prompt, "cache_control": {"type": "ephemeral"}}]
+                if request.cache_system else request.system_prompt
+            ),
+            messages=messages,
+            stream=True,
+            **options,
+        )
+        try:
+            async for event in stream:
+                if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    yield event.delta.text
+                elif event.type == "message_delta" and getattr(event.delta, "stop_reason", None):
+                    yield Finish(event.delta.stop_reason)
+        finally:
+            # Closes the HTTP response, so an abandoned call stops generating
+            await stream.close()
+
+
+class OpenAIProvider:
+    """OpenAI Chat Completions API (streaming; prefixes are cached automatically)."""
+
+    name = OPENAI
+
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o")
+        self.models = {LARGE: self.model, SMALL: os.getenv("OPENAI_SMALL_MODEL", "gpt-4o-mini")}
+
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
+        messages = [{"role": "system", "content": request.system_prompt}]
+        messages.extend(request.history or [])
+        messages.append({"role": "user", "content": request.user_message})
+        if request.context:
+            messages.append({"role": "system", "content": f"Context: {request.context}"})
+
+        options = {"stop": list(request.stop[:4])} if request.stop else {}
+        stream = await self.client.chat.completions.create(
+            model=self.models.get(request.tier, self.model),
+            messages=messages,
+            max_tokens=request.max_tokens or int(os.getenv("OPENAI_MAX_TOKENS", "4096")),
+            temperature=(
+                request.temperature if request.temperature is not None
+                else float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
+            ),
+            stream=True,
+            **options,
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if chunk.choices[0].finish_reason:
+                    yield Finish(chunk.choices[0].finish_reason)
+        finally:
+            await stream.close()
+
+
+def _model_of(provider, tier: str) -> str:
+    return getattr(provider, "models", {}).get(tier, provider.model)
+
+
+PROVIDER_CLASSES = {ANTHROPIC: AnthropicProvider, OPENAI: OpenAIProvider}
+_API_KEY_VARS = {ANTHROPIC: "ANTHROPIC_API_KEY", OPENAI: "OPENAI_API_KEY"}
+
+
+class _Attempt:
+    """One in-flight streaming call, started eagerly so its first token can be awaited."""
+
+    def __init__(self, provider, request: LLMRequest, first_token_timeout: float):
+        self.provider = provider
+        self.request = request
+        self.started = time.perf_counter()
+        self.first_token_ms: Optional[float] = None
+        self._stream = provider.stream(request)
+        self.first = asyncio.ensure_future(asyncio.wait_for(self._next(), first_token_timeout))
+
+    async def _next(self) -> str:
+        try:
+            return await self._stream.__anext__()
+        except StopAsyncIteration:
+            return ""  # Empty response
+
+    async def rest(self, timeout: float) -> Tuple[str, Optional[str]]:
+        """Collect the remaining text after the first token (text, finish reason)."""
+        parts = [self.first.result()]
+
+        async def drain() -> None:
+            async for text in self._stream:
+                parts.append(text)
+
+        await asyncio.wait_for(drain(), timeout)
+        finish = [part for part in parts if isinstance(part, Finish)]
+        text = "".join(part for part in parts if not isinstance(part, Finish))
+        return text, (str(finish[-1]) if finish else None)
+
+    async def cancel(self) -> None:
+        self.first.cancel()
+        await asyncio.gather(self.first, return_exceptions=True)
+        try:
+            await self._stream.aclose()
+        except Exception:
+            pass
+
+
+class ProviderRouter:
+    """Routes requests across providers with failover and optional hedging."""
+
+    def __init__(
+        self,
+        providers: Dict[str, Any],
+        default_provider: str = ANTHROPIC,
+        hedge_enabled: bool = False,
+        hedge_min_delay: float = 0.5,
+        hedge_default_delay: float = 2.0,
+        first_token_timeout: float = 30.0,
+        request_timeout: float = 120.0,
+        latency_window: int = 200,
+    ):
+        """Initialize provider router.
+
+        Args:
+            providers: Provider name -> provider (anything with `name`,
+                `model` and an async `stream(request)` yielding text)
+            default_provider: Tried first unless a call names another
+            hedge_enabled: Send a second request to the alternate provider
+                when the first is slow to produce a token
+            hedge_min_delay: Lower bound for the hedge delay (seconds)
+            hedge_default_delay: Hedge delay before enough latency samples
+            first_token_timeout: A provider with no token by then has failed
+            request_timeout: Limit for the rest of the response
+            latency_window: Recent time-to-first-token samples per provider
+        """
+        self.providers = providers
+        self.default_provider = default_provider
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.first_token_timeout = first_token_timeout
+        self.request_timeout = request_timeout
+        self._first_token: Dict[str, Deque[float]] = {name: deque(maxlen=latency_window) for name in providers}
+        self._stats: Dict[str, Dict[str, int]] = {
+            name: {"served": 0, "errors": 0, "hedges_sent": 0, "hedges_won": 0} for name in providers
+        }
+
+    def has(self, provider: str) -> bool:
+        return provider in self.providers
+
+    def model_for(self, provider: Optional[str] = None, tier: str = LARGE) -> Optional[str]:
+        """Model (of `tier`) of the provider a call naming `provider` is tried on first."""
+        order = self._order(provider)
+        return _model_of(self.providers[order[0]], tier) if order else None
+
+    def hedge_delay(self, provider: str) -> float:
+        """p95 time-to-first-token of `provider` (seconds), once it has 20+ samples."""
+        samples = self._first_token.get(provider)
+        if not samples or len(samples) < 20:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, float(np.percentile(samples, 95)))
+
+    def _order(self, primary: Optional[str]) -> List[str]:
+        primary = primary if primary in self.providers else self.default_provider
+        names = [primary] if primary in self.providers else []
+        return names + [name for name in self.providers if name not in names]
+
+    async def generate(self, request: LLMRequest, provider: Optional[str] = None) -> LLMResult:
+        """Generate a completion, failing over / hedging across providers.
+
+        Raises:
+            ProviderUnavailableError: No provider is configured
+            Exception: The last provider error when every provider failed, or
+                a non-retryable error (bad request, auth) from the provider
+        """
+        order = self._order(provider)
+        if not order:
+            raise ProviderUnavailableError("No LLM provider configured")
+        started = time.perf_counter()
+        pending = list(order)
+        failovers: List[str] = []
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            attempts = [self._start(pending.pop(0), request)]
+            try:
+                winner, losers_failed = await self._first_token_race(attempts, pending)
+            except Exception as e:
+                failed = [a.provider.name for a in attempts]
+                hedged = hedged or len(attempts) > 1
+                failovers.extend(failed)
+                last_error = e
+                if not is_retryable(e):
+                    raise
+                continue
+            hedged = hedged or len(attempts) > 1
+            failovers.extend(losers_failed)
+
+            try:
+                text, finish_reason = await winner.rest(self.request_timeout)
+            except Exception as e:
+                self._stats[winner.provider.name]["errors"] += 1
+                print(f"⚠️ LLM provider {winner.provider.name} failed mid-response: {e}")
+                failovers.append(winner.provider.name)
+                last_error = e
+                if not is_retryable(e):
+                    raise
+                continue
+
+            name = winner.provider.name
+            self._stats[name]["served"] += 1
+            if len(attempts) > 1:
+                self._stats[name]["hedges_won"] += 1
+            if failovers:
+                print(f"🔀 LLM request served by {name} after {', '.join(failovers)} failed")
+            return LLMResult(
+                text=text,
+                provider=name,
+                model=_model_of(winner.provider, request.tier),
+                hedged=hedged,
+                failovers=failovers,
+                first_token_ms=winner.first_token_ms,
+                total_ms=round((time.perf_counter() - started) * 1000, 3),
+                finish_reason=finish_reason,
+            )
+
+        raise last_error or ProviderUnavailableError("All LLM providers failed")
+
+    def _start(self, name: str, request: LLMRequest) -> _Attempt:
+        return _Attempt(self.providers[name], request, self.first_token_timeout)
+
+    async def _first_token_race(self, attempts: List[_Attempt], pending: List[str]) -> Tuple[_Attempt, List[str]]:
+        """Wait for the first token, hedging to `pending[0]` after the p95 delay.
+
+        Returns the winning attempt and the providers that errored meanwhile;
+        raises the last error if every started attempt failed. The hedge
+        provider is removed from `pending`.
+        """
+        primary = attempts[0]
+        failed: List[str] = []
+        hedge_at = None
+        if self.hedge_enabled and pending:
+            hedge_at = primary.started + self.hedge_delay(primary.provider.name)
+
+        try:
+            while True:
+                running = [a for a in attempts if not a.first.done()]
+                finished = [a for a in attempts if a.first.done()]
+                for attempt in finished:
+                    if attempt.first.cancelled() or attempt.first.exception() is not None:
+                        continue
+                    attempt.first_token_ms = round((time.perf_counter() - attempt.started) * 1000, 3)
+                    self._first_token[attempt.provider.name].append(attempt.first_token_ms / 1000)
+                    for other in attempts:
+                        if other is not attempt:
+                            await other.cancel()
+                    return attempt, failed
+                for attempt in finished:
+                    name = attempt.provider.name
+                    if name not in failed:
+                        failed.append(name)
+                        self._stats[name]["errors"] += 1
+                        print(f"⚠️ LLM provider {name} failed: {attempt.first.exception()!r}")
+                if not running:
+                    raise attempts[-1].first.exception()
+
+                timeout = None
+                if hedge_at is not None:
+                    timeout = max(0.0, hedge_at - time.perf_counter())
+                done, _ = await asyncio.wait(
+                    [a.first for a in running], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done and hedge_at is not None:
+                    hedge_name = pending.pop(0)
+                    self._stats[hedge_name]["hedges_sent"] += 1
+                    attempts.append(self._start(hedge_name, primary.request))
+                    hedge_at = None
+        except BaseException:
+            for attempt in attempts:
+                await attempt.cancel()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider served/error/hedge counters and latency."""
+        providers = {}
+        for name, provider in self.providers.items():
+            samples = self._first_token[name]
+            providers[name] = {
+                "models": getattr(provider, "models", {LARGE: provider.model}),
+                **self._stats[name],
+                "first_token_p50_ms": round(float(np.percentile(samples, 50)) * 1000, 3) if samples else None,
+                "first_token_p95_ms": round(float(np.percentile(samples, 95)) * 1000, 3) if samples else None,
+                "hedge_delay_ms": round(self.hedge_delay(name) * 1000, 3),
+            }
+        return {
+            "default_provider": self.default_provider,
+            "hedge_enabled": self.hedge_enabled,
+            "providers": providers,
+        }
+
+
+def build_providers() -> Dict[str, Any]:
+    """Every provider with an API key and an installed SDK."""
+    providers: Dict[str, Any] = {}
+    for name, provider_class in PROVIDER_CLASSES.items():
+        if not os.getenv(_API_KEY_VARS[name]):
+            continue
+        try:
+            providers[name] = provider_class()
+        except ImportError:
+            print(f"⚠️ {name} package not installed; provider disabled")
+    return providers
+
+
+# Global provider router instance
+_llm_router: Optional[ProviderRouter] = None
+
+
+def get_llm_router() -> ProviderRouter:
+    """Get or create global provider router instance."""
+    global _llm_router
+    if _llm_router is None:
+        _llm_router = ProviderRouter(
+            build_providers(),
+            default_provider=os.getenv("LLM_PROVIDER", ANTHROPIC),
+            hedge_enabled=os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true",
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5")),
+            hedge_default_delay=float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "2.0")),
+            first_token_timeout=float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT", "30")),
+            request_timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", "120")),
+        )
+    return _llm_router
+
+
+__all__ = [
+    "ANTHROPIC",
+    "LARGE",
+    "OPENAI",
+    "SMALL",
+    "TRUNCATED",
+    "AnthropicProvider",
+    "Finish",
+    "LLMRequest",
+    "LLMResult",
+    "OpenAIProvider",
+    "PROVIDER_CLASSES",
+    "ProviderRouter",
+    "ProviderUnavailableError",
+    "build_providers",
+    "get_llm_router",
+    "is_retryable",
+]
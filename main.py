@@ -9,20 +9,26 @@ Main application orchestrating:
 
 from __future__ import annotations
 
+import asyncio
+import json
 import os
+import time
 import uuid
 from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, File, Form, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import our custom modules
 from database import (
+    get_db_manager,
     get_db_session,
+    get_read_db_session,
     init_db,
     FeedbackLog,
     SessionHistory,
@@ -30,9 +36,37 @@ from database import (
 )
 from module_loader import ModuleLoader, TaskType, get_module_loader
 from web_search_tool import WebSearchTool, get_web_search_tool
+from market_data import get_market_data_store
+from session_writer import get_session_writer
+from conversation_memory import ConversationMemory, get_conversation_store
+from analytics_rollup import PERIODS, get_analytics_rollup
+from jd_cache import extract_jd_text, get_jd_cache
+from boolean_compiler import BooleanRequest, CompiledBoolean, format_compiled, get_boolean_compiler
+from response_cache import CacheHit, get_response_cache
+from resume_index import BooleanSyntaxError, get_resume_search
+from candidate_scoring import ScoringRequest, ScoringResponse, get_candidate_scorer
+from skill_index import get_skill_normalizer
+from bias_scanner import BiasScan, format_bias_report, get_bias_scanner
+from candidate_dedup import CandidateRecord, get_dedup_index
+from batch_screening import ScreeningBatchRequest, ScreeningResume, get_batch_screener
+from llm_router import LARGE, PROVIDER_CLASSES, LLMRequest, LLMResult, get_llm_router
+from model_routing import Route, get_model_router
+from admission import BACKGROUND_CALLER, AdmissionRejected, Caller, estimate_tokens, get_admission_controller
+from llm_cache import get_llm_cache
+from job_queue import TERMINAL_STATUSES, JobContext, JobWorker, UnknownJobKind, get_job_queue, job_handler
+from resume_ingest import ExtractedResume, ResumeExtractionError, find_email, get_resume_ingestor
+from archival import ARCHIVED_TABLES, get_archive_manager
+from pagination import CountCache, InvalidCursorError, decode_cursor, encode_cursor
+from session_detail import fetch_feedback_page, fetch_interactions_page, fetch_session_detail
 from jobdiva_client import JobDivaClient, SearchCandidateRequest, CreateCandidateRequest
 from jobdiva_auth import get_auth
 
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as FastJSONResponse
+
 
 # ==============================================
 # REQUEST/RESPONSE MODELS
@@ -49,8 +83,12 @@ class ChatRequest(BaseModel):
     """Chat request from user."""
     message: str = Field(..., description="User message", min_length=1)
     session_id: Optional[str] = Field(None, description="Session ID for conversation continuity")
+    user_id: Optional[str] = Field(None, description="Recruiter ID (fair share of LLM capacity)")
     task_type: Optional[str] = Field(None, description="Task type hint: jd_analysis, resume_screening, etc.")
     context: Optional[Dict[str, Any]] = Field(None, description="Additional context (job_id, candidate_id, etc.)")
+    reanalyze: bool = Field(False, description="Bypass the stored JD analysis and run a fresh one")
+    bypass_cache: bool = Field(False, description="Skip cached LLM results (response and exact-match caches)")
+    response_mode: Optional[str] = Field(None, description="brief, standard or detailed (detected if omitted)")
 
 
 class ChatResponse(BaseModel):
@@ -72,6 +110,48 @@ class FeedbackRequest(BaseModel):
     severity: str = Field(default="info", description="Severity: info, warning, error, critical")
 
 
+class ResumeRequest(BaseModel):
+    """Resume text to store in the local search corpus."""
+    text: str = Field(..., description="Resume text", min_length=1)
+    candidate_id: Optional[str] = Field(None, description="JobDiva candidate ID")
+    candidate_email: Optional[str] = None
+    candidate_name: Optional[str] = None
+    source: Optional[str] = Field(None, description="Origin: filename, jobdiva, manual")
+
+
+class CandidateDedupRequest(BaseModel):
+    """Candidate details to check against the dedup index."""
+    name: Optional[str] = None
+    emails: List[str] = Field(default_factory=list)
+    phones: List[str] = Field(default_factory=list)
+    resume_text: Optional[str] = None
+
+
+class BooleanExecuteRequest(BaseModel):
+    """Boolean string to run against the local resume corpus."""
+    query: str = Field(..., description="Boolean string (AND/OR/NOT, quotes, parentheses, wildcards)", min_length=1)
+    limit: int = Field(20, ge=1, le=200, description="Number of top documents to return")
+
+
+class SkillNormalizeRequest(BaseModel):
+    """Texts (JD, resume, skill lists) to map onto canonical skills."""
+    texts: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class BiasScanRequest(BaseModel):
+    """JDs or outreach drafts to check for bias-coded language."""
+    texts: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class JobRequest(BaseModel):
+    """Background job to enqueue."""
+    kind: str = Field(..., description="Job kind: batch_screening, resume_import, analytics_rollup, archive, warm_indexes")
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    priority: int = Field(0, description="Higher runs first")
+    max_attempts: int = Field(3, ge=1, le=20)
+    delay_seconds: float = Field(0, ge=0, description="Run no earlier than this many seconds from now")
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
     status: str
@@ -90,11 +170,38 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting S1NGULARITY...")
     await init_db()
     print("✅ Database initialized")
+    print(f"🔌 Database pool: {get_db_manager().describe_pool()}")
+    skill_index = get_skill_normalizer()
+    print(f"🧠 Skill index: {len(skill_index)} surface forms, {len(skill_index.skills)} skills")
+    session_writer = get_session_writer()
+    session_writer.start()
+    analytics_rollup = get_analytics_rollup()
+    analytics_rollup.start()
+    archive_manager = get_archive_manager()
+    await archive_manager.maintain_partitions()
+    if os.getenv("ARCHIVE_ENABLED", "false").lower() == "true":
+        archive_manager.start()
+    job_worker = None
+    if os.getenv("JOB_WORKER_IN_PROCESS", "false").lower() == "true":
+        job_worker = JobWorker(
+            get_job_queue(),
+            concurrency=int(os.getenv("JOB_WORKER_CONCURRENCY", "2")),
+            poll_interval=float(os.getenv("JOB_POLL_INTERVAL", "2")),
+        )
+        job_worker_task = asyncio.create_task(job_worker.run())
 
     yield
 
     # Shutdown
     print("👋 Shutting down S1NGULARITY...")
+    if job_worker is not None:
+        await job_worker.stop()
+        await job_worker_task
+    await archive_manager.stop()
+    get_resume_ingestor().shutdown()
+    await analytics_rollup.stop()
+    await session_writer.stop()
+    print("✅ Session history drained")
 
 
 # ==============================================
@@ -110,6 +217,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc: AdmissionRejected):
+    """LLM capacity shedding: 503 with Retry-After before any provider call."""
+    return FastJSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -124,6 +240,9 @@ app.add_middleware(
 # AGENT ORCHESTRATION (Simplified - LangGraph would go here)
 # ==============================================
 
+# Task types whose input and response go through the local bias scan
+BIAS_PRESCAN_TASKS = (TaskType.JD_ANALYSIS, TaskType.CANDIDATE_OUTREACH)
+
 class S1NGULARITYAgent:
     """Main agent orchestrating JobDiva, Web Search, and Module Loading.
 
@@ -146,23 +265,11 @@ class S1NGULARITYAgent:
         self.jobdiva = jobdiva_client
         self.llm_provider = llm_provider
 
-        # Initialize LLM (Anthropic or OpenAI)
-        if llm_provider == "anthropic":
-            try:
-                from anthropic import AsyncAnthropic
-                self.llm = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-                self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20250101")
-            except ImportError:
-                raise RuntimeError("anthropic package not installed")
-        elif llm_provider == "openai":
-            try:
-                from openai import AsyncOpenAI
-                self.llm = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-                self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
-            except ImportError:
-                raise RuntimeError("openai package not installed")
-        else:
+        # Both configured providers sit behind the router; llm_provider is
+        # tried first and the other takes over on 5xx/429/timeouts
+        if llm_provider not in PROVIDER_CLASSES:
             raise ValueError(f"Unsupported LLM provider: {llm_provider}")
+        self.router = get_llm_router()
 
     def detect_task_type(self, message: str) -> TaskType:
         """Detect task type from user message."""
@@ -190,7 +297,12 @@ class S1NGULARITYAgent:
         message: str,
         session_id: str,
         task_type: Optional[TaskType] = None,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        memory: Optional[ConversationMemory] = None,
+        bias_scan: Optional[BiasScan] = None,
+        caller: Optional[Caller] = None,
+        bypass_cache: bool = False,
+        response_mode: Optional[str] = None
     ) -> Dict[str, Any]:
         """Process user message and generate response.
 
@@ -201,6 +313,24 @@ class S1NGULARITYAgent:
         if task_type is None:
             task_type = self.detect_task_type(message)
 
+        # Structured Boolean requests are compiled locally (no LLM call)
+        if task_type == TaskType.BOOLEAN_SEARCH and context and context.get("buckets"):
+            compiled = self.compile_boolean(context)
+            return {
+                "response": format_compiled(compiled),
+                "task_type": task_type.value,
+                "modules_loaded": [],
+                "boolean": compiled.model_dump(),
+            }
+
+        # Bias checks on a pasted document are answered from the local scan (no LLM call)
+        if task_type == TaskType.BIAS_CHECK and bias_scan is not None:
+            return {
+                "response": format_bias_report(bias_scan),
+                "task_type": task_type.value,
+                "modules_loaded": [],
+            }
+
         # 2. Load relevant modules
         system_prompt = self.module_loader.build_system_prompt(
             task_type=task_type,
@@ -216,77 +346,153 @@ class S1NGULARITYAgent:
         tools_available = []
         if task_type == TaskType.SALARY_RESEARCH:
             tools_available.append("web_search_salary")
+        if task_type in [TaskType.BOOLEAN_SEARCH, TaskType.JD_ANALYSIS]:
+            tools_available.append("compile_boolean_search")
         if task_type in [TaskType.RESUME_SCREENING, TaskType.JD_ANALYSIS]:
             tools_available.append("search_jobdiva_candidates")
 
         tools_context = f"\n\n# AVAILABLE TOOLS\n{', '.join(tools_available)}" if tools_available else ""
-
-        # 4. Call LLM
-        if self.llm_provider == "anthropic":
-            response = await self._call_anthropic(
-                system_prompt + tools_context,
-                message,
-                context
-            )
-        else:
-            response = await self._call_openai(
-                system_prompt + tools_context,
-                message,
-                context
+        if bias_scan is not None:
+            tools_context += bias_scan.prompt_block()
+
+        # 4. Conversation memory (summary + artifacts in system, recent turns as history)
+        memory_context = memory.context_block() if memory else ""
+        history = memory.history_messages() if memory else None
+
+        # 5. Model tier, token budget and stop sequences for task + response mode
+        model_router = get_model_router()
+        mode = model_router.mode_for(message, response_mode)
+        route = model_router.route(task_type, mode) or Route(tier=LARGE, max_tokens=None)
+        if model_router.enabled:
+            tools_context += model_router.instruction(mode)
+
+        # 6. Deterministic task types: temperature 0, exact-match result cache
+        full_prompt = system_prompt + tools_context + memory_context
+        llm_cache = get_llm_cache()
+        policy = llm_cache.policy_for(task_type)
+        cache_key = None
+        if policy is not None:
+            model = self.router.model_for(self.llm_provider, route.tier) or ""
+            cache_key = llm_cache.key_for(model, full_prompt, message, context, history, route.max_tokens)
+            if bypass_cache:
+                llm_cache.record_bypass(task_type)
+            else:
+                cached = await llm_cache.get(task_type, cache_key)
+                if cached is not None:
+                    return {
+                        "response": cached["text"],
+                        "task_type": task_type.value,
+                        "modules_loaded": modules_loaded,
+                        "llm": {"provider": cached["provider"], "model": cached["model"], "cache": cached["tier"]},
+                    }
+
+        # 7. Call LLM; small-tier answers that fail validation are redone on the large tier
+        temperature = policy.temperature if policy is not None else None
+        llm = await self._call_llm(
+            full_prompt, message, context, history=history, max_tokens=route.max_tokens,
+            temperature=temperature, tier=route.tier, stop=route.stop, caller=caller
+        )
+        routing = {"mode": mode.value, **route.to_dict()}
+        failure = model_router.validate(task_type, llm) if model_router.enabled else None
+        escalation = model_router.escalation(route) if failure else None
+        if escalation is not None:
+            print(f"⬆️ Escalating {task_type.value}/{mode.value} to the {escalation.tier} tier: {failure}")
+            llm = await self._call_llm(
+                full_prompt, message, context, history=history, max_tokens=escalation.max_tokens,
+                temperature=temperature, tier=escalation.tier, stop=escalation.stop, caller=caller
             )
+            routing["escalated"] = {"reason": failure, **escalation.to_dict()}
+
+        if cache_key is not None:
+            await llm_cache.set(task_type, cache_key, {"text": llm.text, "provider": llm.provider, "model": llm.model})
 
         return {
-            "response": response,
+            "response": llm.text,
             "task_type": task_type.value,
             "modules_loaded": modules_loaded,
+            "llm": {**llm.to_dict(), "route": routing},
         }
 
-    async def _call_anthropic(
+    def compile_boolean(self, arguments: Dict[str, Any]) -> CompiledBoolean:
+        """compile_boolean_search tool: deterministic Boolean from concept buckets."""
+        fields = BooleanRequest.model_fields
+        return get_boolean_compiler().compile(
+            BooleanRequest(**{k: v for k, v in arguments.items() if k in fields})
+        )
+
+    async def _call_llm(
         self,
         system_prompt: str,
         user_message: str,
-        context: Optional[Dict[str, Any]]
-    ) -> str:
-        """Call Anthropic API."""
-        messages = [{"role": "user", "content": user_message}]
-
-        if context:
-            context_str = f"\n\nContext: {context}"
-            messages[0]["content"] += context_str
-
-        response = await self.llm.messages.create(
-            model=self.model,
-            max_tokens=int(os.getenv("ANTHROPIC_MAX_TOKENS", "4096")),
-            temperature=float(os.getenv("ANTHROPIC_TEMPERATURE", "0.7")),
-            system=system_prompt,
-            messages=messages
+        context: Optional[Dict[str, Any]],
+        history: Optional[List[Dict[str, str]]] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        cache_system: bool = False,
+        tier: str = LARGE,
+        stop: Tuple[str, ...] = (),
+        caller: Optional[Caller] = None
+    ) -> LLMResult:
+        """Call the LLM through admission control and the provider router
+        (cache_system marks the system prompt as a cacheable prefix).
+
+        Raises:
+            AdmissionRejected: The caller's deadline cannot be met (503)
+        """
+        request = LLMRequest(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            context=context,
+            history=history,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            cache_system=cache_system,
+            tier=tier,
+            stop=stop,
         )
+        async with get_admission_controller().admit(caller or BACKGROUND_CALLER, estimate_tokens(request)):
+            return await self.router.generate(request, provider=self.llm_provider)
 
-        return response.content[0].text
-
-    async def _call_openai(
+    async def complete(
         self,
         system_prompt: str,
         user_message: str,
-        context: Optional[Dict[str, Any]]
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        caller: Optional[Caller] = None
     ) -> str:
-        """Call OpenAI API."""
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ]
+        """Single-turn call with a provider-cached system prompt (batch work).
 
-        if context:
-            messages.append({"role": "system", "content": f"Context: {context}"})
+        OpenAI caches repeated prompt prefixes automatically; Anthropic needs
+        the system block marked.
+        """
+        llm = await self._call_llm(
+            system_prompt, user_message, None,
+            max_tokens=max_tokens, temperature=temperature, cache_system=True, caller=caller
+        )
+        return llm.text
 
-        response = await self.llm.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "4096")),
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
+    async def summarize_turns(
+        self,
+        previous_summary: str,
+        turns: List[Dict[str, str]]
+    ) -> str:
+        """Fold conversation turns into a running summary (ConversationMemory)."""
+        transcript = "\n".join(f"{t['role'].upper()}: {t['content']}" for t in turns)
+        prompt = (
+            f"Previous summary:\n{previous_summary or '(none)'}\n\n"
+            f"New turns:\n{transcript}\n\n"
+            "Return the updated summary."
         )
+        system_prompt = (
+            "You maintain a running summary of a recruiting conversation. Keep "
+            "decisions, candidate and role facts, scores, open questions and "
+            "artifact IDs (e.g. A1b2c3d4). Be terse; bullet points; no preamble."
+        )
+        max_tokens = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "400"))
 
-        return response.choices[0].message.content
+        llm = await self._call_llm(system_prompt, prompt, None, max_tokens=max_tokens, temperature=0.0)
+        return llm.text
 
 
 # ==============================================
@@ -346,32 +552,145 @@ async def chat(
             task_type = TaskType(request.task_type)
         except ValueError:
             pass
+    if task_type is None:
+        task_type = agent.detect_task_type(request.message)
+
+    # Load bounded conversation memory; large pasted blocks become artifacts
+    conversation_store = get_conversation_store()
+    memory = await conversation_store.load(db, session_id)
+    message = memory.compact_message(request.message)
+
+    # Local bias pre-pass over the original text (compaction swaps pasted
+    # documents for artifact references)
+    context = request.context or {}
+    bias_scanner = get_bias_scanner()
+    bias_scan = None
+    if task_type in BIAS_PRESCAN_TASKS:
+        bias_scan = bias_scanner.scan(request.message)
+    elif task_type == TaskType.BIAS_CHECK:
+        document = extract_jd_text(request.message)
+        if bias_scanner.answers_locally(document, context):
+            bias_scan = bias_scanner.scan(document)
+
+    # Serve repeat JD analyses from JobAnalysis by content hash (plain
+    # analysis requests only: earlier turns can change what is being asked)
+    jd_cache = get_jd_cache()
+    jd_hash = None
+    if task_type == TaskType.JD_ANALYSIS and not memory.turns and not memory.summary:
+        jd_hash = jd_cache.key_for(request.message)
+    cached_analysis = None
+    if jd_hash and not request.reanalyze:
+        cached_analysis = await jd_cache.lookup(db, jd_hash, job_id=context.get("job_id"))
+
+    # Reuse responses to near-duplicate standalone questions (safe task types only)
+    response_cache = get_response_cache()
+    prompt_version = None
+    cache_hit = None
+    if (
+        response_cache.enabled_for(task_type)
+        and not request.bypass_cache
+        and not request.context
+        and not memory.turns
+        and not memory.summary
+    ):
+        prompt_version = agent.module_loader.prompt_version(task_type)
+        cache_hit = response_cache.lookup(request.message, task_type, prompt_version)
 
     # Process message with agent
     try:
-        result = await agent.process_message(
-            message=request.message,
-            session_id=session_id,
-            task_type=task_type,
-            context=request.context
-        )
-
-        # Update session history in background
-        background_tasks.add_task(
-            update_session_history,
-            db=db,
-            session_id=session_id,
-            task_type=result["task_type"]
+        if cached_analysis is not None:
+            result = {
+                "response": cached_analysis.analysis,
+                "task_type": task_type.value,
+                "modules_loaded": [],
+            }
+        elif cache_hit is not None:
+            result = {
+                "response": cache_hit.entry.response,
+                "task_type": task_type.value,
+                "modules_loaded": [],
+            }
+            if cache_hit.audit:
+                background_tasks.add_task(
+                    audit_cached_response,
+                    agent=agent,
+                    hit=cache_hit,
+                    message=request.message,
+                    task_type=task_type
+                )
+        else:
+            result = await agent.process_message(
+                message=message,
+                session_id=session_id,
+                task_type=task_type,
+                context=request.context,
+                memory=memory,
+                bias_scan=bias_scan,
+                caller=get_admission_controller().caller_for(request.user_id, session_id),
+                bypass_cache=request.bypass_cache,
+                response_mode=request.response_mode
+            )
+            if prompt_version:
+                response_cache.store(request.message, task_type, prompt_version, result["response"])
+            if jd_hash:
+                await jd_cache.store(
+                    db,
+                    session_id=session_id,
+                    content_hash=jd_hash,
+                    jd_text=extract_jd_text(request.message),
+                    analysis=result["response"],
+                    job_id=context.get("job_id"),
+                    job_title=context.get("job_title"),
+                    company=context.get("company"),
+                )
+
+        bias = None
+        if bias_scan is not None:
+            bias = {"input": bias_scan.to_dict()}
+            bias_flags = [{**flag, "source": "input"} for flag in bias_scan.to_flags()]
+            if task_type in BIAS_PRESCAN_TASKS:
+                response_scan = bias_scanner.scan(result["response"])
+                bias["response"] = response_scan.to_dict()
+                bias_flags += [{**flag, "source": "response"} for flag in response_scan.to_flags()]
+            if bias_flags and (context.get("candidate_id") or context.get("candidate_email")):
+                await record_bias_flags(db, session_id, context, bias_flags)
+
+        memory.add_turn("user", message)
+        memory.add_turn("assistant", result["response"])
+        state = conversation_store.save(session_id, memory)
+
+        # Buffer session history update (flushed in batches)
+        get_session_writer().record(
+            session_id, task_type=result["task_type"], user_id=request.user_id,
+            conversation_state=state,
         )
+        if memory.needs_compaction():
+            background_tasks.add_task(
+                compact_conversation,
+                agent=agent,
+                session_id=session_id,
+                memory=memory
+            )
 
         return ChatResponse(
             session_id=session_id,
             message=result["response"],
             task_type=result["task_type"],
             modules_loaded=result["modules_loaded"],
-            metadata={"context": request.context}
+            metadata={
+                "context": request.context,
+                **({"jd_hash": jd_hash, "cached": cached_analysis is not None} if jd_hash else {}),
+                **({"response_cache": {
+                    "hit": True, "similarity": round(cache_hit.similarity, 3)
+                }} if cache_hit else {}),
+                **({"boolean": result["boolean"]} if "boolean" in result else {}),
+                **({"bias": bias} if bias else {}),
+                **({"llm": result["llm"]} if "llm" in result else {}),
+            }
         )
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         # Log error
         background_tasks.add_task(
@@ -402,6 +721,7 @@ async def submit_feedback(
 
     db.add(feedback_log)
     await db.commit()
+    await get_db_manager().mark_write(request.session_id)
 
     return {"status": "success", "message": "Feedback recorded. Thank you!"}
 
@@ -419,27 +739,109 @@ async def search_candidates(
         raise HTTPException(status_code=500, detail=f"JobDiva search failed: {str(e)}")
 
 
+@app.post("/jobdiva/create-candidate")
+async def create_candidate(
+    request: CreateCandidateRequest,
+    force: bool = False,
+    jobdiva_client: JobDivaClient = Depends(lambda: JobDivaClient(auth=get_auth()))
+):
+    """Create a JobDiva candidate unless the dedup index already knows them.
+
+    A duplicate with a JobDiva ID is returned instead of creating a record;
+    duplicates only known locally (stored resumes) return 409. force=true
+    creates the candidate regardless (e.g. relatives sharing a home phone).
+    """
+    dedup = get_dedup_index()
+    await dedup.load()
+    record = CandidateRecord(
+        key="",
+        name=f"{request.first_name} {request.last_name}",
+        emails=[request.email],
+        phones=[p for p in (request.cellphone, request.homephone, request.workphone) if p],
+        text=request.narrative,
+    )
+    duplicates = dedup.check(record)
+    existing = next((m for m in duplicates if m.record.candidate_id), None)
+    if existing is not None and not force:
+        return {
+            "candidate_id": existing.record.candidate_id,
+            "created": False,
+            "duplicates": [m.to_dict() for m in duplicates],
+        }
+    if duplicates and not force:
+        raise HTTPException(status_code=409, detail={
+            "message": "Possible duplicate candidate; pass force=true to create anyway",
+            "duplicates": [m.to_dict() for m in duplicates],
+        })
+
+    try:
+        candidate_id = str(jobdiva_client.create_candidate(request))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"JobDiva create failed: {str(e)}")
+    record.key = f"jobdiva:{candidate_id}"
+    record.candidate_id = candidate_id
+    await dedup.register_candidate(record)
+    return {
+        "candidate_id": candidate_id,
+        "created": True,
+        "duplicates": [m.to_dict() for m in duplicates],
+    }
+
+
 # ==============================================
 # SESSION & HISTORY ENDPOINTS (Database Persistence)
 # ==============================================
 
+_session_counts = CountCache(ttl=float(os.getenv("SESSION_COUNT_CACHE_TTL", "30")))
+
+
 @app.get("/sessions")
 async def list_sessions(
     limit: int = 20,
-    offset: int = 0,
-    db: AsyncSession = Depends(get_db_session)
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    task_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db_session)
 ):
-    """List all user sessions (proves database persistence)."""
-    from sqlalchemy import select, desc
-
-    stmt = (
-        select(SessionHistory)
-        .order_by(desc(SessionHistory.last_active))
-        .limit(limit)
-        .offset(offset)
+    """List user sessions, most recently active first (keyset paginated).
+
+    Pass `next_cursor` from the previous page as `cursor` to continue.
+    """
+    from sqlalchemy import select, tuple_
+
+    limit = max(1, min(limit, 100))
+    stmt = select(
+        SessionHistory.id,
+        SessionHistory.session_id,
+        SessionHistory.task_type,
+        SessionHistory.message_count,
+        SessionHistory.created_at,
+        SessionHistory.last_active,
+    )
+    if user_id is not None:
+        stmt = stmt.where(SessionHistory.user_id == user_id)
+    if task_type is not None:
+        stmt = stmt.where(SessionHistory.task_type == task_type)
+    if cursor:
+        try:
+            last_active, last_id = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        stmt = stmt.where(
+            tuple_(SessionHistory.last_active, SessionHistory.id) < tuple_(last_active, last_id)
+        )
+    stmt = stmt.order_by(
+        SessionHistory.last_active.desc(), SessionHistory.id.desc()
+    ).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].last_active, rows[-1].id) if has_more else None
+
+    total, total_estimated = await _session_counts.count(
+        db, SessionHistory, {"user_id": user_id, "task_type": task_type}
     )
-    result = await db.execute(stmt)
-    sessions = result.scalars().all()
 
     return {
         "sessions": [
@@ -450,119 +852,627 @@ async def list_sessions(
                 "created_at": s.created_at.isoformat(),
                 "last_active": s.last_active.isoformat(),
             }
-            for s in sessions
+            for s in rows
         ],
-        "total": len(sessions),
+        "total": total,
+        "total_estimated": total_estimated,
         "limit": limit,
-        "offset": offset,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
     }
 
 
 @app.get("/sessions/{session_id}")
 async def get_session_detail(
     session_id: str,
-    db: AsyncSession = Depends(get_db_session)
+    limit: int = 50,
+    db: AsyncSession = Depends(get_read_db_session)
 ):
-    """Get detailed session information (proves memory)."""
-    from sqlalchemy import select
-
-    # Get session
-    stmt = select(SessionHistory).where(SessionHistory.session_id == session_id)
-    result = await db.execute(stmt)
-    session = result.scalar_one_or_none()
+    """Get session detail with the first page of interactions and feedback.
 
-    if not session:
+    Fetched in one round trip; page further with the child endpoints.
+    """
+    detail = await fetch_session_detail(db, session_id, limit=limit)
+    if detail is None:
         raise HTTPException(status_code=404, detail="Session not found")
+    return FastJSONResponse(detail)
+
+
+@app.get("/sessions/{session_id}/interactions")
+async def list_session_interactions(
+    session_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db_session)
+):
+    """Page through a session's candidate interactions (newest first)."""
+    try:
+        page = await fetch_interactions_page(db, session_id, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(page)
+
+
+@app.get("/sessions/{session_id}/feedback")
+async def list_session_feedback(
+    session_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db_session)
+):
+    """Page through a session's feedback logs (newest first)."""
+    try:
+        page = await fetch_feedback_page(db, session_id, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(page)
 
-    # Get candidate interactions for this session
-    stmt = select(CandidateInteraction).where(
-        CandidateInteraction.session_id == session_id
+
+@app.get("/analytics/summary")
+async def get_analytics_summary(db: AsyncSession = Depends(get_read_db_session)):
+    """Get analytics summary (served from pre-aggregated rollups)."""
+    summary = await get_analytics_rollup().read_summary(db)
+    return {
+        **summary,
+        "database_status": "operational",
+        "persistence_enabled": True,
+    }
+
+
+@app.get("/analytics/dashboard")
+async def get_analytics_dashboard(
+    metric: str = "interaction_count",
+    period: str = "daily",
+    dimension_type: str = "all",
+    days: int = 30,
+    db: AsyncSession = Depends(get_read_db_session)
+):
+    """Get a rolled-up metric as a time series for dashboards."""
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported period: {period}")
+
+    since = datetime.utcnow() - timedelta(days=days)
+    series = await get_analytics_rollup().read_series(
+        db,
+        metric_name=metric,
+        period=period,
+        dimension_type=dimension_type,
+        since=since,
     )
-    result = await db.execute(stmt)
-    interactions = result.scalars().all()
+    return {
+        "metric": metric,
+        "period": period,
+        "dimension_type": dimension_type,
+        "series": series,
+    }
+
+
+@app.post("/analytics/rollup")
+async def run_analytics_rollup():
+    """Run the incremental analytics rollup immediately."""
+    processed = await get_analytics_rollup().run()
+    # Empty when another worker is running the rollup
+    return {"status": "success" if processed else "skipped", "processed": processed}
+
+
+@app.get("/llm/providers")
+async def get_llm_provider_stats():
+    """Configured LLM providers: answers served, errors, hedges and first-token latency."""
+    return get_llm_router().stats()
 
-    # Get feedback logs for this session
-    stmt = select(FeedbackLog).where(FeedbackLog.session_id == session_id)
-    result = await db.execute(stmt)
-    feedback_logs = result.scalars().all()
 
+@app.get("/llm/admission")
+async def get_llm_admission_stats():
+    """LLM admission control: queue depth, in-flight calls, wait times, rejections."""
+    return get_admission_controller().stats()
+
+
+@app.get("/cache/response/stats")
+async def get_response_cache_stats():
+    """Near-duplicate response cache hit rate, savings and audit results."""
+    return get_response_cache().stats()
+
+
+@app.get("/cache/llm/stats")
+async def get_llm_cache_stats():
+    """Exact-match LLM result cache (deterministic task types) hit rates."""
+    return get_llm_cache().stats()
+
+
+# ==============================================
+# ARCHIVE ENDPOINTS
+# ==============================================
+
+@app.get("/archive")
+async def list_archives():
+    """List archived months per table."""
+    archive_manager = get_archive_manager()
     return {
-        "session": {
-            "session_id": session.session_id,
-            "task_type": session.task_type,
-            "message_count": session.message_count,
-            "token_usage": session.token_usage,
-            "created_at": session.created_at.isoformat(),
-            "last_active": session.last_active.isoformat(),
-        },
-        "interactions": [
-            {
-                "candidate_email": i.candidate_email,
-                "job_id": i.job_id,
-                "match_score": i.match_score,
-                "action": i.action,
-                "timestamp": i.timestamp.isoformat(),
-            }
-            for i in interactions
-        ],
-        "feedback_logs": [
-            {
-                "error_type": f.error_type,
-                "severity": f.severity,
-                "user_input": f.user_input,
-                "timestamp": f.timestamp.isoformat(),
-            }
-            for f in feedback_logs
-        ],
+        "archives": archive_manager.list_archives(),
+        "retention_months": archive_manager.retention_months,
     }
 
 
-@app.get("/analytics/summary")
-async def get_analytics_summary(db: AsyncSession = Depends(get_db_session)):
-    """Get analytics summary (proves database aggregation)."""
-    from sqlalchemy import select, func
-
-    # Total sessions
-    stmt = select(func.count(SessionHistory.id))
-    result = await db.execute(stmt)
-    total_sessions = result.scalar()
-
-    # Total messages
-    stmt = select(func.sum(SessionHistory.message_count))
-    result = await db.execute(stmt)
-    total_messages = result.scalar() or 0
-
-    # Total candidate interactions
-    stmt = select(func.count(CandidateInteraction.id))
-    result = await db.execute(stmt)
-    total_interactions = result.scalar()
-
-    # Average match score
-    stmt = select(func.avg(CandidateInteraction.match_score))
-    result = await db.execute(stmt)
-    avg_match_score = result.scalar() or 0
-
-    # Total feedback logs
-    stmt = select(func.count(FeedbackLog.id))
-    result = await db.execute(stmt)
-    total_feedback = result.scalar()
-
-    # Feedback by type
-    stmt = select(
-        FeedbackLog.error_type, func.count(FeedbackLog.id)
-    ).group_by(FeedbackLog.error_type)
-    result = await db.execute(stmt)
-    feedback_by_type = {row[0]: row[1] for row in result}
+@app.get("/archive/{table}")
+async def export_archive(
+    table: str,
+    from_month: Optional[str] = None,
+    to_month: Optional[str] = None,
+    session_id: Optional[str] = None,
+):
+    """Stream archived rows as JSON lines (months are YYYY-MM, inclusive)."""
+    if table not in ARCHIVED_TABLES:
+        raise HTTPException(status_code=404, detail=f"No archive for table: {table}")
+
+    rows = get_archive_manager().iter_archive(
+        table,
+        from_month=from_month,
+        to_month=to_month,
+        filters={"session_id": session_id},
+    )
+    return StreamingResponse(rows, media_type="application/x-ndjson")
+
+
+@app.post("/archive/run")
+async def run_archive():
+    """Archive every month older than the retention window immediately."""
+    archived = await get_archive_manager().run()
+    # Empty when another worker holds the archive lock
+    return {"status": "success" if archived else "skipped", "archived": archived}
+
+
+# ==============================================
+# BOOLEAN SEARCH ENDPOINTS
+# ==============================================
+
+@app.post("/boolean/compile", response_model=CompiledBoolean)
+async def compile_boolean(request: BooleanRequest):
+    """Compile concept buckets into a platform-specific Boolean string (no LLM)."""
+    try:
+        return get_boolean_compiler().compile(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+
+@app.post("/boolean/execute")
+async def execute_boolean(request: BooleanExecuteRequest):
+    """Run a Boolean string against the local resume index (hit count + top documents)."""
+    try:
+        return await get_resume_search().search(request.query, limit=request.limit)
+    except BooleanSyntaxError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/resumes")
+async def add_resume(request: ResumeRequest, db: AsyncSession = Depends(get_db_session)):
+    """Store a resume in the local corpus used by /boolean/execute."""
+    document, created = await get_resume_search().add_resume(
+        db,
+        request.text,
+        candidate_email=request.candidate_email,
+        candidate_name=request.candidate_name,
+        candidate_id=request.candidate_id,
+        source=request.source,
+    )
+    duplicates = await get_dedup_index().add_resume(document) if created else []
     return {
-        "total_sessions": total_sessions,
-        "total_messages": int(total_messages),
-        "total_candidate_interactions": total_interactions,
-        "average_match_score": float(avg_match_score),
-        "total_feedback_logs": total_feedback,
-        "feedback_by_type": feedback_by_type,
-        "database_status": "operational",
-        "persistence_enabled": True,
+        "resume_id": document.id,
+        "created": created,
+        "duplicates": [m.to_dict() for m in duplicates],
+    }
+
+
+# ==============================================
+# RESUME INGESTION ENDPOINTS
+# ==============================================
+
+async def store_extracted_resume(db: AsyncSession, extracted: ExtractedResume) -> Dict[str, Any]:
+    """Add extracted text to the local resume corpus (deduplicated)."""
+    document, created = await get_resume_search().add_resume(
+        db,
+        extracted.text,
+        candidate_email=find_email(extracted.text),
+        source=extracted.filename,
+    )
+    duplicates = await get_dedup_index().add_resume(document) if created else []
+    return {
+        "resume_id": document.id,
+        "created": created,
+        "skills": document.skills,
+        "duplicates": [m.to_dict() for m in duplicates],
+    }
+
+
+@app.post("/upload-resume")
+async def upload_resume(
+    file: UploadFile = File(...),
+    store: bool = True,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Extract text from an uploaded resume (PDF or plain text)."""
+    try:
+        extracted = await get_resume_ingestor().extract(file.filename or "resume", await file.read())
+    except ResumeExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = {
+        "text": extracted.text,
+        "filename": extracted.filename,
+        "content_hash": extracted.content_hash,
+        "cached": extracted.cached,
+    }
+    if store:
+        result.update(await store_extracted_resume(db, extracted))
+    return result
+
+
+@app.post("/upload-resumes")
+async def upload_resumes(files: List[UploadFile] = File(...), store: bool = True):
+    """Extract a batch of resumes; streams one JSON line per file as it completes."""
+    uploads = [(upload.filename or f"resume-{i}", await upload.read()) for i, upload in enumerate(files)]
+
+    async def progress():
+        succeeded = failed = 0
+        # Own session: the response outlives request-scoped dependencies
+        async with get_db_manager().async_session() as db:
+            async for index, extracted, error in get_resume_ingestor().ingest_batch(uploads):
+                event = {"index": index, "filename": uploads[index][0]}
+                if extracted is None:
+                    failed += 1
+                    event.update(status="error", error=error)
+                else:
+                    succeeded += 1
+                    event.update(
+                        status="ok",
+                        content_hash=extracted.content_hash,
+                        cached=extracted.cached,
+                        chars=len(extracted.text),
+                    )
+                    if store:
+                        event.update(await store_extracted_resume(db, extracted))
+                event["completed"] = succeeded + failed
+                event["total"] = len(uploads)
+                yield json.dumps(event) + "\n"
+        yield json.dumps({"done": True, "succeeded": succeeded, "failed": failed, "total": len(uploads)}) + "\n"
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
+# ==============================================
+# BATCH SCREENING ENDPOINTS
+# ==============================================
+
+def screening_stream(
+    agent: S1NGULARITYAgent,
+    request: ScreeningBatchRequest,
+    preface: Optional[List[Dict[str, Any]]] = None
+):
+    """NDJSON stream of per-candidate screening results, then a summary line."""
+    session_id = request.session_id or str(uuid.uuid4())
+    max_tokens = int(os.getenv("SCREENING_MAX_TOKENS", "800"))
+    caller = get_admission_controller().caller_for(request.user_id, session_id, batch=True)
+
+    async def complete(system_prompt: str, resume_text: str) -> str:
+        return await agent.complete(
+            system_prompt, resume_text, max_tokens=max_tokens, temperature=0.0, caller=caller
+        )
+
+    async def events():
+        started = time.perf_counter()
+        counts = {"ok": 0, "error": 0}
+        for event in preface or []:
+            counts["error"] += event.get("status") == "error"
+            yield json.dumps(event) + "\n"
+        # The screener opens its own short sessions: the response outlives
+        # request-scoped dependencies
+        system_prompt = agent.module_loader.build_system_prompt(TaskType.RESUME_SCREENING)
+        async for event in get_batch_screener().screen(complete, system_prompt, request, session_id):
+            counts[event["status"]] += 1
+            yield json.dumps(event) + "\n"
+        get_session_writer().record(
+            session_id, task_type=TaskType.RESUME_SCREENING.value, user_id=request.user_id
+        )
+        yield json.dumps({
+            "done": True,
+            "session_id": session_id,
+            "succeeded": counts["ok"],
+            "failed": counts["error"],
+            "took_ms": round((time.perf_counter() - started) * 1000, 3),
+        }) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.post("/screening/batch")
+async def screen_batch(
+    request: ScreeningBatchRequest,
+    background: bool = False,
+    agent: S1NGULARITYAgent = Depends(get_agent)
+):
+    """Screen N resumes (text or stored resume_ids) against one JD; streams NDJSON.
+
+    With `background=true` the batch runs as a job instead (poll /jobs/{id}).
+    """
+    if background:
+        job = await get_job_queue().enqueue("batch_screening", request.model_dump())
+        return FastJSONResponse(status_code=202, content=job)
+    return screening_stream(agent, request)
+
+
+@app.post("/screening/batch/upload")
+async def screen_batch_upload(
+    jd_text: str = Form(...),
+    job_id: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None),
+    files: List[UploadFile] = File(...),
+    store: bool = True,
+    db: AsyncSession = Depends(get_db_session),
+    agent: S1NGULARITYAgent = Depends(get_agent)
+):
+    """Screen uploaded resumes against one JD; extraction errors stream first."""
+    uploads = [(upload.filename or f"resume-{i}", await upload.read()) for i, upload in enumerate(files)]
+    resumes: List[ScreeningResume] = []
+    errors: List[Dict[str, Any]] = []
+    async for index, extracted, error in get_resume_ingestor().ingest_batch(uploads):
+        if extracted is None:
+            errors.append({"filename": uploads[index][0], "status": "error", "error": error})
+            continue
+        stored = await store_extracted_resume(db, extracted) if store else {}
+        resumes.append(ScreeningResume(
+            text=extracted.text,
+            resume_id=stored.get("resume_id"),
+            candidate_email=find_email(extracted.text),
+            source=extracted.filename,
+        ))
+    if not resumes:
+        raise HTTPException(status_code=400, detail={"message": "No readable resumes", "errors": errors})
+
+    request = ScreeningBatchRequest(jd_text=jd_text, job_id=job_id, session_id=session_id, resumes=resumes)
+    return screening_stream(agent, request, preface=errors)
+
+
+# ==============================================
+# BACKGROUND JOBS
+# ==============================================
+
+@job_handler("batch_screening")
+async def run_batch_screening_job(ctx: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Screen a ScreeningBatchRequest; results go to CandidateInteraction."""
+    request = ScreeningBatchRequest(**payload)
+    session_id = request.session_id or ctx.job_id
+    agent = get_agent()
+    max_tokens = int(os.getenv("SCREENING_MAX_TOKENS", "800"))
+    caller = get_admission_controller().caller_for(request.user_id, session_id, batch=True)
+
+    async def complete(system_prompt: str, resume_text: str) -> str:
+        return await agent.complete(
+            system_prompt, resume_text, max_tokens=max_tokens, temperature=0.0, caller=caller
+        )
+
+    counts = {"ok": 0, "error": 0}
+    top: List[Dict[str, Any]] = []
+    system_prompt = agent.module_loader.build_system_prompt(TaskType.RESUME_SCREENING)
+    async for event in get_batch_screener().screen(complete, system_prompt, request, session_id):
+        counts[event["status"]] += 1
+        if event["status"] == "ok":
+            top.append({k: event.get(k) for k in ("index", "resume_id", "candidate_id", "candidate_name",
+                                                  "source", "match_score", "recommendation")})
+        done = counts["ok"] + counts["error"]
+        await ctx.progress(100 * done / len(request.resumes), f"{done}/{len(request.resumes)} screened")
+    get_session_writer().record(
+        session_id, task_type=TaskType.RESUME_SCREENING.value, user_id=request.user_id
+    )
+    top.sort(key=lambda r: r["match_score"] or 0, reverse=True)
+    return {"session_id": session_id, "succeeded": counts["ok"], "failed": counts["error"], "ranked": top}
+
+
+@job_handler("resume_import")
+async def run_resume_import_job(ctx: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Store resumes (`payload["resumes"]`: ResumeRequest objects) in the local corpus."""
+    resumes = [ResumeRequest(**item) for item in payload.get("resumes", [])]
+    created = duplicates = 0
+    async with get_db_manager().async_session() as db:
+        for i, resume in enumerate(resumes, 1):
+            document, is_new = await get_resume_search().add_resume(
+                db,
+                resume.text,
+                candidate_email=resume.candidate_email,
+                candidate_name=resume.candidate_name,
+                candidate_id=resume.candidate_id,
+                source=resume.source,
+            )
+            if is_new:
+                created += 1
+                duplicates += bool(await get_dedup_index().add_resume(document))
+            await ctx.progress(100 * i / len(resumes), f"{i}/{len(resumes)} imported")
+    return {"total": len(resumes), "created": created, "with_duplicates": duplicates}
+
+
+@job_handler("analytics_rollup")
+async def run_analytics_rollup_job(ctx: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Incremental analytics rollup."""
+    return {"processed": await get_analytics_rollup().run()}
+
+
+@job_handler("archive")
+async def run_archive_job(ctx: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Archive months older than the retention window."""
+    return {"archived": await get_archive_manager().run()}
+
+
+@job_handler("warm_indexes")
+async def run_warm_indexes_job(ctx: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Load the resume search and candidate dedup indexes of the worker process
+    (resume_import jobs then check duplicates without a cold start)."""
+    resumes = await get_resume_search().load()
+    await ctx.progress(50, "Resume search index loaded", force=True)
+    candidates = await get_dedup_index().load()
+    return {"resumes": resumes, "dedup_candidates": candidates}
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """Enqueue a background job; poll /jobs/{id} or follow /jobs/{id}/events."""
+    try:
+        return await get_job_queue().enqueue(
+            request.kind,
+            request.payload,
+            priority=request.priority,
+            max_attempts=request.max_attempts,
+            delay_seconds=request.delay_seconds,
+        )
+    except UnknownJobKind as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50):
+    """Most recent jobs, optionally filtered by status and kind."""
+    return {"jobs": await get_job_queue().list(status=status, kind=kind, limit=min(limit, 500))}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, progress and result."""
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued job, or ask the worker running it to stop."""
+    job = await get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: one `progress` event per change, `done` at the end."""
+    queue = get_job_queue()
+    if await queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for job in queue.watch(job_id):
+            name = "done" if job["status"] in TERMINAL_STATUSES else "progress"
+            yield f"event: {name}\ndata: {json.dumps(job)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ==============================================
+# CANDIDATE SCORING ENDPOINTS
+# ==============================================
+
+@app.post("/skills/normalize")
+async def normalize_skills(request: SkillNormalizeRequest):
+    """Canonical skills mentioned in each text (shared skill index)."""
+    return {"skills": get_skill_normalizer().extract_many(request.texts)}
+
+
+@app.post("/bias/scan")
+async def scan_bias(request: BiasScanRequest):
+    """Flag bias-coded terms in each text with spans and suggestions (no LLM)."""
+    started = time.perf_counter()
+    scans = get_bias_scanner().scan_many(request.texts)
+    return {
+        "results": [scan.to_dict() for scan in scans],
+        "flagged": sum(scan.flagged for scan in scans),
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+@app.post("/candidates/dedup/check")
+async def check_duplicate_candidate(request: CandidateDedupRequest):
+    """Find existing records for a candidate (MinHash-LSH index, no remote search)."""
+    dedup = get_dedup_index()
+    await dedup.load()
+    started = time.perf_counter()
+    duplicates = dedup.check(CandidateRecord(
+        key="",
+        name=request.name,
+        emails=request.emails,
+        phones=request.phones,
+        text=request.resume_text,
+    ))
+    return {
+        "duplicates": [m.to_dict() for m in duplicates],
+        "indexed": len(dedup),
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+@app.get("/candidates/dedup/clusters")
+async def duplicate_clusters(limit: int = 100):
+    """Batch job: group all indexed records into duplicate clusters."""
+    dedup = get_dedup_index()
+    await dedup.load()
+    started = time.perf_counter()
+    clusters = dedup.find_clusters()
+    return {
+        "clusters": [[record.summary() for record in cluster] for cluster in clusters[:limit]],
+        "count": len(clusters),
+        "duplicate_records": sum(len(cluster) - 1 for cluster in clusters),
+        "stats": dedup.stats(),
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+@app.post("/candidates/score", response_model=ScoringResponse)
+async def score_candidates(request: ScoringRequest, db: AsyncSession = Depends(get_db_session)):
+    """Rank candidates against a JD with the skills taxonomy (no LLM)."""
+    try:
+        return await get_candidate_scorer().rank(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ==============================================
+# MARKET DATA ENDPOINTS
+# ==============================================
+
+@app.get("/market-data/salary")
+async def get_salary_benchmarks(
+    job_title: str,
+    location: Optional[str] = None,
+    experience_level: Optional[str] = None,
+    refresh: bool = False,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Get structured salary ranges, served from the local store when fresh."""
+    try:
+        web_search = get_web_search_tool()
+    except ValueError:
+        web_search = None
+
+    store = get_market_data_store(web_search=web_search)
+    try:
+        ranges, from_store = await store.get_salary_ranges(
+            db,
+            job_title=job_title,
+            location=location,
+            experience_level=experience_level,
+            refresh=refresh,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {
+        "job_title": job_title,
+        "location": location,
+        "experience_level": experience_level,
+        "ranges": [r.model_dump() for r in ranges],
+        "count": len(ranges),
+        "cached": from_store,
+        "max_age_days": store.max_age_days,
     }
 
 
@@ -570,27 +1480,68 @@ async def get_analytics_summary(db: AsyncSession = Depends(get_db_session)):
 # BACKGROUND TASKS
 # ==============================================
 
-async def update_session_history(db: AsyncSession, session_id: str, task_type: str):
-    """Update session history in database."""
-    # Check if session exists
-    from sqlalchemy import select
-    stmt = select(SessionHistory).where(SessionHistory.session_id == session_id)
-    result = await db.execute(stmt)
-    session = result.scalar_one_or_none()
-
-    if session:
-        session.last_active = datetime.utcnow()
-        session.message_count += 1
-        session.task_type = task_type
-    else:
-        session = SessionHistory(
-            session_id=session_id,
+async def audit_cached_response(
+    agent: S1NGULARITYAgent,
+    hit: CacheHit,
+    message: str,
+    task_type: TaskType
+):
+    """Re-run a sampled cache hit and record whether the reuse was valid.
+
+    The audit skips the exact-match LLM cache too: comparing against another
+    cached answer would always agree.
+    """
+    try:
+        result = await agent.process_message(
+            message=message,
+            session_id=f"cache-audit-{uuid.uuid4()}",
             task_type=task_type,
-            message_count=1
+            bypass_cache=True
         )
-        db.add(session)
+        get_response_cache().record_audit(hit, message, task_type, result["response"])
+    except Exception as e:
+        print(f"Response cache audit failed: {e}")
+
 
+async def compact_conversation(
+    agent: S1NGULARITYAgent,
+    session_id: str,
+    memory: ConversationMemory
+):
+    """Fold older turns into the running summary after the response is sent.
+
+    The summary call outlives the request, so the result is only saved if
+    no newer turn was stored meanwhile (that turn's own compaction retries).
+    """
+    base_revision = memory.revision
+    if not await memory.compact(agent.summarize_turns):
+        return
+    conversation_store = get_conversation_store()
+    async with get_db_manager().async_session() as db:
+        current = await conversation_store.load(db, session_id)
+    if current.revision != base_revision:
+        print(f"Skipping compaction of {session_id}: revision {base_revision} superseded by {current.revision}")
+        return
+    state = conversation_store.save(session_id, memory)
+    get_session_writer().record(session_id, messages=0, conversation_state=state)
+
+
+async def record_bias_flags(
+    db: AsyncSession,
+    session_id: str,
+    context: Dict[str, Any],
+    bias_flags: List[Dict[str, Any]]
+):
+    """Attach bias-scan flags to the candidate the JD or outreach was for."""
+    db.add(CandidateInteraction(
+        session_id=session_id,
+        candidate_id=context.get("candidate_id"),
+        candidate_email=context.get("candidate_email"),
+        job_id=context.get("job_id"),
+        bias_flags=bias_flags,
+    ))
     await db.commit()
+    await get_db_manager().mark_write(session_id)
 
 
 async def log_error(db: AsyncSession, session_id: str, error: str, context: Dict[str, Any]):
@@ -605,6 +1556,7 @@ async def log_error(db: AsyncSession, session_id: str, error: str, context: Dict
     )
     db.add(error_log)
     await db.commit()
+    await get_db_manager().mark_write(session_id)
 
 
 # ==============================================
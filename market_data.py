@@ -0,0 +1,355 @@
+"""Persistent market-data store for salary research.
+
+Extracts structured salary ranges from web search results and stores them in
+the `salary_benchmarks` table so repeat salary questions become local indexed
+lookups instead of repeated advanced searches.
+
+Implements the salary validation trigger and data-currency rules from
+s1ngularity-web-search-integration.json.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import SalaryBenchmark
+from web_search_tool import SearchResponse, WebSearchTool
+
+
+# "$120,000", "$120k", "$1.2M", "$85/hr"
+_MONEY = r"\$\s?(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s?([kKmM])?\b"
+_RANGE_RE = re.compile(_MONEY + r"\s*(?:-|–|—|to)\s*" + _MONEY.replace("\\$", "\\$?", 1))
+_SINGLE_RE = re.compile(_MONEY)
+_HOURLY_RE = re.compile(r"^\s*(?:/\s?h(?:ou)?r|per\s+hour|an\s+hour|hourly|/\s?hour)", re.IGNORECASE)
+_PERCENTILE_RE = re.compile(r"(\d{1,2})(?:st|nd|rd|th)\s+percentile", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[^a-z0-9+#]+")
+
+# Sanity bounds to drop noise (e.g. "$5 coffee", "$3B funding")
+_BOUNDS = {
+    "annual": (15_000.0, 2_000_000.0),
+    "hourly": (7.0, 1_000.0),
+}
+
+
+class SalaryRange(BaseModel):
+    """A single salary figure extracted from a search result."""
+    job_title: str
+    location: Optional[str] = None
+    experience_level: Optional[str] = None
+    salary_min: float
+    salary_max: float
+    currency: str = "USD"
+    pay_period: str = "annual"
+    percentile: Optional[int] = None
+    statistic: str = "range"
+    source_url: Optional[str] = None
+    source_title: Optional[str] = None
+    published_date: Optional[str] = None
+    snippet: Optional[str] = None
+    extracted_at: Optional[str] = None
+
+
+def normalize_key(value: Optional[str]) -> str:
+    """Normalize a title, location or experience level into a lookup key."""
+    if not value:
+        return ""
+    return _NON_WORD_RE.sub(" ", value.lower()).strip()
+
+
+def _to_amount(number: str, suffix: Optional[str]) -> float:
+    amount = float(number.replace(",", ""))
+    if suffix and suffix.lower() == "k":
+        amount *= 1_000
+    elif suffix and suffix.lower() == "m":
+        amount *= 1_000_000
+    return amount
+
+
+def _classify(text: str, start: int, end: int) -> tuple[str, Optional[int], str]:
+    """Return (statistic, percentile, pay_period) from text around a match."""
+    # Only look back within the current sentence
+    before = text[max(0, start - 60):start].lower().rsplit(". ", 1)[-1]
+    pay_period = "hourly" if _HOURLY_RE.match(text[end:end + 12]) else "annual"
+
+    percentile_match = None
+    for percentile_match in _PERCENTILE_RE.finditer(before):
+        pass
+    if percentile_match:
+        return "percentile", int(percentile_match.group(1)), pay_period
+    if "median" in before:
+        return "median", 50, pay_period
+    if "average" in before or "mean" in before:
+        return "average", None, pay_period
+    return "range", None, pay_period
+
+
+def _in_bounds(low: float, high: float, pay_period: str) -> bool:
+    floor, ceiling = _BOUNDS[pay_period]
+    return floor <= low <= high <= ceiling
+
+
+class SalaryExtractor:
+    """Regex-based salary extraction from search result text.
+
+    Recognizes ranges ("$130k-$165k", "$120,000 to $150,000") and single
+    figures qualified as median, average or an explicit percentile. Bare
+    single dollar amounts are ignored as too noisy.
+    """
+
+    def extract_from_text(
+        self,
+        text: str,
+        job_title: str,
+        location: Optional[str] = None,
+    ) -> List[SalaryRange]:
+        """Extract salary figures from a block of text."""
+        ranges: List[SalaryRange] = []
+        covered: List[tuple[int, int]] = []
+
+        for match in _RANGE_RE.finditer(text):
+            low = _to_amount(match.group(1), match.group(2))
+            high = _to_amount(match.group(3), match.group(4))
+            # "$130-165k" carries the suffix on the upper bound only
+            if match.group(2) is None and match.group(4) and low < 1_000 <= high:
+                low = _to_amount(match.group(1), match.group(4))
+            statistic, percentile, pay_period = _classify(text, match.start(), match.end())
+            covered.append((match.start(), match.end()))
+            if not _in_bounds(low, high, pay_period):
+                continue
+            ranges.append(self._build(
+                text, match, job_title, location, low, high,
+                "range" if statistic == "average" else statistic, percentile, pay_period,
+            ))
+
+        for match in _SINGLE_RE.finditer(text):
+            if any(start <= match.start() < end for start, end in covered):
+                continue
+            statistic, percentile, pay_period = _classify(text, match.start(), match.end())
+            if statistic == "range":
+                continue
+            amount = _to_amount(match.group(1), match.group(2))
+            if not _in_bounds(amount, amount, pay_period):
+                continue
+            ranges.append(self._build(
+                text, match, job_title, location, amount, amount,
+                statistic, percentile, pay_period,
+            ))
+
+        return ranges
+
+    def extract(
+        self,
+        response: SearchResponse,
+        job_title: str,
+        location: Optional[str] = None,
+    ) -> List[SalaryRange]:
+        """Extract salary figures from every result of a search response."""
+        ranges: List[SalaryRange] = []
+        for result in response.results:
+            for item in self.extract_from_text(
+                f"{result.title}. {result.content}", job_title, location
+            ):
+                item.source_url = result.url
+                item.source_title = result.title
+                item.published_date = result.published_date
+                ranges.append(item)
+        return ranges
+
+    @staticmethod
+    def _build(
+        text: str,
+        match: re.Match,
+        job_title: str,
+        location: Optional[str],
+        low: float,
+        high: float,
+        statistic: str,
+        percentile: Optional[int],
+        pay_period: str,
+    ) -> SalaryRange:
+        snippet = text[max(0, match.start() - 80):match.end() + 40].strip()
+        return SalaryRange(
+            job_title=job_title,
+            location=location,
+            salary_min=low,
+            salary_max=high,
+            pay_period=pay_period,
+            percentile=percentile,
+            statistic=statistic,
+            snippet=snippet,
+        )
+
+
+class MarketDataStore:
+    """Salary benchmark store with freshness rules.
+
+    Lookups hit the `salary_benchmarks` table first; only when no row newer
+    than `max_age_days` exists is a web search issued, parsed and persisted.
+    Rows are keyed by title, location and experience level; a new search
+    replaces the rows stored for its key.
+    """
+
+    def __init__(
+        self,
+        web_search: Optional[WebSearchTool] = None,
+        extractor: Optional[SalaryExtractor] = None,
+        max_age_days: int = 30,
+    ):
+        """Initialize market data store.
+
+        Args:
+            web_search: Web search tool used to refresh stale data
+            extractor: Salary extractor (default: SalaryExtractor())
+            max_age_days: Rows older than this are considered stale
+        """
+        self.web_search = web_search
+        self.extractor = extractor or SalaryExtractor()
+        self.max_age_days = max_age_days
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        job_title: str,
+        location: Optional[str] = None,
+        experience_level: Optional[str] = None,
+        max_age_days: Optional[int] = None,
+    ) -> List[SalaryRange]:
+        """Return fresh stored salary figures for a title/location/level."""
+        max_age = self.max_age_days if max_age_days is None else max_age_days
+        cutoff = datetime.utcnow() - timedelta(days=max_age)
+        stmt = (
+            select(SalaryBenchmark)
+            .where(
+                SalaryBenchmark.title_key == normalize_key(job_title),
+                SalaryBenchmark.location_key == normalize_key(location),
+                SalaryBenchmark.level_key == normalize_key(experience_level),
+                SalaryBenchmark.extracted_at >= cutoff,
+            )
+            .order_by(SalaryBenchmark.extracted_at.desc())
+        )
+        result = await db.execute(stmt)
+        return [self._to_range(row) for row in result.scalars().all()]
+
+    async def store(
+        self,
+        db: AsyncSession,
+        ranges: List[SalaryRange],
+        query: Optional[str] = None,
+    ) -> int:
+        """Persist extracted salary figures, replacing the rows stored for the key."""
+        if not ranges:
+            return 0
+
+        now = datetime.utcnow()
+        first = ranges[0]
+        await db.execute(
+            delete(SalaryBenchmark).where(
+                SalaryBenchmark.title_key == normalize_key(first.job_title),
+                SalaryBenchmark.location_key == normalize_key(first.location),
+                SalaryBenchmark.level_key == normalize_key(first.experience_level),
+            )
+        )
+        db.add_all([
+            SalaryBenchmark(
+                extracted_at=now,
+                job_title=r.job_title,
+                title_key=normalize_key(r.job_title),
+                location=r.location,
+                location_key=normalize_key(r.location),
+                experience_level=r.experience_level,
+                level_key=normalize_key(r.experience_level),
+                salary_min=r.salary_min,
+                salary_max=r.salary_max,
+                currency=r.currency,
+                pay_period=r.pay_period,
+                percentile=r.percentile,
+                statistic=r.statistic,
+                source_url=r.source_url,
+                source_title=r.source_title,
+                published_date=r.published_date,
+                snippet=r.snippet,
+                query=query,
+            )
+            for r in ranges
+        ])
+        await db.commit()
+        for r in ranges:
+            r.extracted_at = now.isoformat()
+        return len(ranges)
+
+    async def get_salary_ranges(
+        self,
+        db: AsyncSession,
+        job_title: str,
+        location: Optional[str] = None,
+        experience_level: Optional[str] = None,
+        refresh: bool = False,
+    ) -> tuple[List[SalaryRange], bool]:
+        """Serve salary figures from the store, refreshing when stale.
+
+        Returns:
+            Tuple of (salary ranges, served_from_store)
+        """
+        if not refresh:
+            stored = await self.lookup(db, job_title, location, experience_level)
+            if stored:
+                return stored, True
+
+        if self.web_search is None:
+            raise RuntimeError("Market data is stale and no web search tool is configured")
+
+        response = await asyncio.to_thread(
+            self.web_search.search_salary_data,
+            job_title,
+            location,
+            experience_level,
+        )
+        ranges = self.extractor.extract(response, job_title, location)
+        for item in ranges:
+            item.experience_level = experience_level
+        await self.store(db, ranges, query=response.query)
+        return ranges, False
+
+    @staticmethod
+    def _to_range(row: SalaryBenchmark) -> SalaryRange:
+        return SalaryRange(
+            job_title=row.job_title,
+            location=row.location,
+            experience_level=row.experience_level,
+            salary_min=row.salary_min,
+            salary_max=row.salary_max,
+            currency=row.currency or "USD",
+            pay_period=row.pay_period or "annual",
+            percentile=row.percentile,
+            statistic=row.statistic or "range",
+            source_url=row.source_url,
+            source_title=row.source_title,
+            published_date=row.published_date,
+            snippet=row.snippet,
+            extracted_at=row.extracted_at.isoformat() if row.extracted_at else None,
+        )
+
+
+def get_market_data_store(web_search: Optional[WebSearchTool] = None) -> MarketDataStore:
+    """Factory function to create MarketDataStore instance."""
+    return MarketDataStore(
+        web_search=web_search,
+        max_age_days=int(os.getenv("SALARY_DATA_MAX_AGE_DAYS", "30")),
+    )
+
+
+__all__ = [
+    "SalaryRange",
+    "SalaryExtractor",
+    "MarketDataStore",
+    "normalize_key",
+    "get_market_data_store",
+]
@@ -0,0 +1,199 @@
+"""Per-task model and token-budget routing.
+
+Every task used to run on ANTHROPIC_MODEL with ANTHROPIC_MAX_TOKENS=4096,
+whether the recruiter asked a one-line "is this a good fit?" or for a full
+report. `ModelRouter` picks a `Route` (model tier, max_tokens, stop
+sequences) per `TaskType` and TOON response mode:
+
+- brief: 2-3 sentences | yes/no + reason
+- standard: 4-6 sentences | bullets | most common
+- detailed: full report | tables | evidence
+
+The mode comes from the request or is detected from the message with the
+triggers in s1ngularity-core-system.json, and the mode's line is added to
+the system prompt. Answers from the small tier are validated (empty,
+truncated, task-specific checks); a failing answer is regenerated on the
+large tier.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, replace
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+from llm_router import LARGE, SMALL, LLMResult
+from module_loader import TaskType
+
+
+class ResponseMode(str, Enum):
+    """TOON response modes (s1ngularity-master-v3.toon `response_modes`)."""
+    BRIEF = "brief"
+    STANDARD = "standard"
+    DETAILED = "detailed"
+
+
+MODE_INSTRUCTIONS = {
+    ResponseMode.BRIEF: "brief: 2-3 sent | yes/no + reason",
+    ResponseMode.STANDARD: "standard: 4-6 sent | bullets | most_common",
+    ResponseMode.DETAILED: "detailed: full_report | tables | evidence",
+}
+
+_DETAILED_RE = re.compile(
+    r"\b(full (analysis|report|breakdown)|detailed|in detail|break (it|this|that)? ?down|"
+    r"tell me everything|deep dive|comprehensive|compare (all|these|the)|side.by.side)\b"
+)
+_BRIEF_RE = re.compile(
+    r"\b(quick(ly)?|yes or no|yes/no|just tell me|tl;?dr|in short|one line|asap|urgent|immediately)\b"
+)
+_YES_NO_RE = re.compile(r"^(is|are|does|do|did|can|could|should|will|would|has|have)\b")
+_BOOLEAN_RE = re.compile(r"\b(AND|OR|NOT)\b|\"[^\"]+\"")
+
+
+@dataclass(frozen=True)
+class Route:
+    """How one (task type, response mode) is generated."""
+    tier: str = LARGE
+    max_tokens: Optional[int] = 4096  # None: the provider's configured default
+    stop: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"tier": self.tier, "max_tokens": self.max_tokens, "stop": list(self.stop)}
+
+
+# (task type, mode) -> route; a None task type applies to every task
+DEFAULT_ROUTES: Dict[Tuple[Optional[TaskType], ResponseMode], Route] = {
+    # A brief answer that starts a report section has stopped being brief
+    (None, ResponseMode.BRIEF): Route(SMALL, 300, ("\n# ", "\n## ")),
+    (None, ResponseMode.STANDARD): Route(SMALL, 1024),
+    (None, ResponseMode.DETAILED): Route(LARGE, 4096),
+    # Boolean strings are short but must be complete
+    (TaskType.BOOLEAN_SEARCH, ResponseMode.BRIEF): Route(SMALL, 600),
+    # Evidence-heavy tasks stay on the large tier unless brief
+    (TaskType.JD_ANALYSIS, ResponseMode.STANDARD): Route(LARGE, 2048),
+    (TaskType.RESUME_SCREENING, ResponseMode.STANDARD): Route(LARGE, 2048),
+    (TaskType.BIAS_CHECK, ResponseMode.STANDARD): Route(LARGE, 1536),
+}
+
+
+def detect_response_mode(message: str) -> ResponseMode:
+    """Response mode implied by the message (standard unless triggered).
+
+    Only the start is read: requests come before pasted documents, whose
+    wording ("detailed", "urgent") says nothing about the answer wanted.
+    """
+    text = message[:500].lower()
+    if _DETAILED_RE.search(text):
+        return ResponseMode.DETAILED
+    if _BRIEF_RE.search(text):
+        return ResponseMode.BRIEF
+    stripped = text.strip()
+    if len(stripped) < 120 and stripped.endswith("?") and _YES_NO_RE.match(stripped):
+        return ResponseMode.BRIEF
+    return ResponseMode.STANDARD
+
+
+class ModelRouter:
+    """Routing table with validation-driven escalation."""
+
+    def __init__(
+        self,
+        routes: Optional[Dict[Tuple[Optional[TaskType], ResponseMode], Route]] = None,
+        escalation_max_tokens: int = 4096,
+        enabled: bool = True,
+    ):
+        """Initialize model router.
+
+        Args:
+            routes: (task type or None, mode) -> Route overrides on top of
+                DEFAULT_ROUTES
+            escalation_max_tokens: Token budget of a large-tier retry
+            enabled: When False every request gets the large tier and the
+                provider's default max_tokens (the previous behaviour)
+        """
+        self.routes = {**DEFAULT_ROUTES, **(routes or {})}
+        self.escalation_max_tokens = escalation_max_tokens
+        self.enabled = enabled
+
+    def mode_for(self, message: str, requested: Optional[str] = None) -> ResponseMode:
+        """Requested mode if valid, else the detected one."""
+        if requested:
+            try:
+                return ResponseMode(requested.lower())
+            except ValueError:
+                pass
+        return detect_response_mode(message)
+
+    def route(self, task_type: TaskType, mode: ResponseMode) -> Optional[Route]:
+        """Route for a task type and mode (None when routing is disabled)."""
+        if not self.enabled:
+            return None
+        return self.routes.get((task_type, mode)) or self.routes[(None, mode)]
+
+    @staticmethod
+    def instruction(mode: ResponseMode) -> str:
+        return f"\n\n# RESPONSE MODE\n{MODE_INSTRUCTIONS[mode]}"
+
+    def validate(self, task_type: TaskType, result: LLMResult) -> Optional[str]:
+        """Why an answer is not acceptable, or None if it is."""
+        text = result.text.strip()
+        if not text:
+            return "empty"
+        if result.truncated:
+            return "truncated"
+        if task_type == TaskType.BOOLEAN_SEARCH and not _BOOLEAN_RE.search(text):
+            return "no boolean string"
+        return None
+
+    def escalation(self, route: Route) -> Optional[Route]:
+        """Large-tier route to retry a failed small-tier answer with."""
+        if route.tier == LARGE:
+            return None
+        max_tokens = max((route.max_tokens or 0) * 2, self.escalation_max_tokens)
+        return replace(route, tier=LARGE, max_tokens=max_tokens, stop=())
+
+
+def _parse_routes(raw: str) -> Dict[Tuple[Optional[TaskType], ResponseMode], Route]:
+    """Parse "jd_analysis:brief=small:400,*:standard=large:2048"."""
+    routes = {}
+    for item in raw.split(","):
+        try:
+            target, spec = item.split("=", 1)
+            task, mode = target.split(":", 1)
+            tier, max_tokens = spec.split(":", 1)
+            if tier.strip() not in (LARGE, SMALL):
+                raise ValueError(tier)
+            task_type = None if task.strip() == "*" else TaskType(task.strip())
+            routes[(task_type, ResponseMode(mode.strip()))] = Route(tier.strip(), int(max_tokens))
+        except ValueError:
+            if item.strip():
+                print(f"Warning: ignoring model route {item!r}")
+    return routes
+
+
+# Global model router instance
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Get or create global model router instance."""
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter(
+            routes=_parse_routes(os.getenv("MODEL_ROUTES", "")),
+            escalation_max_tokens=int(os.getenv("MODEL_ESCALATION_MAX_TOKENS", "4096")),
+            enabled=os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true",
+        )
+    return _model_router
+
+
+__all__ = [
+    "DEFAULT_ROUTES",
+    "ModelRouter",
+    "ResponseMode",
+    "Route",
+    "detect_response_mode",
+    "get_model_router",
+]
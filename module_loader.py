@@ -6,6 +6,7 @@ Only loads relevant JSON modules based on task type to optimize context usage.
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 from enum import Enum
@@ -261,6 +262,28 @@ class ModuleLoader:
 
         return "".join(prompt_parts)
 
+    def prompt_version(self, task_type: TaskType) -> str:
+        """Version of the compiled system prompt for a task.
+
+        Derived from the size and mtime of the master prompt and every module
+        file that would be loaded, so it changes whenever any of them does
+        (without reading or rebuilding the prompt).
+        """
+        paths = ["s1ngularity-master-v3.toon"] + [
+            config.file_path
+            for config in self.MODULE_MAP.values()
+            if config.always_load
+            or task_type in config.task_types
+            or TaskType.GENERAL in config.task_types
+            or not config.task_types
+        ]
+        digest = hashlib.sha256(task_type.value.encode())
+        for path in paths:
+            full_path = self.modules_dir / path
+            stat = full_path.stat() if full_path.exists() else None
+            digest.update(f"{path}:{stat.st_size if stat else 0}:{stat.st_mtime_ns if stat else 0}".encode())
+        return digest.hexdigest()[:12]
+
     def get_module_summary(self, task_type: TaskType) -> Dict[str, Any]:
         """Get summary of modules that would be loaded for a task.
 
@@ -0,0 +1,104 @@
+"""Keyset pagination helpers and cheap row counts.
+
+Cursors are opaque, URL-safe tokens encoding the sort key of the last row on
+a page, so deep pages cost the same as the first one (no OFFSET scans).
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Encode (sort value, id) of the last row into an opaque cursor."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, as_datetime: bool = True) -> Tuple[Any, int]:
+    """Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if as_datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+class CountCache:
+    """Short-TTL cache of row counts keyed by table and filters.
+
+    For large unfiltered Postgres tables the planner's `reltuples` estimate
+    is used instead of `COUNT(*)`.
+    """
+
+    def __init__(self, ttl: float = 30.0, estimate_threshold: int = 100_000):
+        """Initialize count cache.
+
+        Args:
+            ttl: Seconds a count is reused
+            estimate_threshold: Use the planner estimate above this many rows
+        """
+        self.ttl = ttl
+        self.estimate_threshold = estimate_threshold
+        self._cache: Dict[str, Tuple[float, int, bool]] = {}
+
+    async def count(
+        self,
+        db: AsyncSession,
+        model: Any,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[int, bool]:
+        """Return (row count, is_estimate) for a model and equality filters."""
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        key = f"{model.__tablename__}:{json.dumps(filters, sort_keys=True, default=str)}"
+
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1], cached[2]
+
+        total: Optional[int] = None
+        estimated = False
+        if not filters and db.get_bind().dialect.name == "postgresql":
+            estimate = (await db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+                {"table": model.__tablename__},
+            )).scalar()
+            if estimate is not None and estimate >= self.estimate_threshold:
+                total, estimated = int(estimate), True
+
+        if total is None:
+            stmt = select(func.count()).select_from(model)
+            for column, value in filters.items():
+                stmt = stmt.where(getattr(model, column) == value)
+            total = (await db.execute(stmt)).scalar() or 0
+
+        self._cache[key] = (time.monotonic(), total, estimated)
+        return total, estimated
+
+
+__all__ = [
+    "InvalidCursorError",
+    "encode_cursor",
+    "decode_cursor",
+    "CountCache",
+]
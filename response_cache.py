@@ -0,0 +1,340 @@
+"""Near-duplicate LLM response cache (SimHash + LSH, CPU only).
+
+Chat turns that differ only in wording - the same Boolean question with
+punctuation or filler-word changes, the same salary question for the same
+title - reuse a
+stored response instead of a new LLM call:
+
+- Messages are normalized (case, punctuation, contractions, stopwords) into
+  content tokens and fingerprinted with a 64-bit SimHash
+- An LSH index over the fingerprint's 8-bit bands finds candidates; a
+  candidate is a hit when the token-set Jaccard similarity reaches the
+  threshold configured for its `TaskType`
+- Entries are scoped by task type and compiled-prompt version, so editing a
+  module invalidates them
+- Only task types with a configured threshold are cached
+- A sample of hits is audited against a fresh LLM call; disagreeing entries
+  count as false hits and are replaced
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import random
+import re
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from module_loader import TaskType
+
+FINGERPRINT_BITS = 64
+BAND_BITS = 8
+BANDS = FINGERPRINT_BITS // BAND_BITS
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9]+)*")
+_CONTRACTIONS = {
+    "what's": "what is", "who's": "who is", "it's": "it is", "i'm": "i am",
+    "can't": "cannot", "don't": "do not", "i'd": "i would", "let's": "let us",
+}
+_STOPWORDS = frozenset("""
+    a an the is are was were be been am do does did of for to in on at by with
+    and or but what which who whom how can could would should will please me my
+    i you your we our us it its this that these those give show tell need want
+    some any get find write create make let hi hey thanks thank
+""".split())
+_OPERATORS = frozenset({"and", "or", "not"})
+
+# Safe-to-reuse task types and their minimum token Jaccard similarity. One
+# changed location or skill still scores ~0.9 on a 20-token request, so
+# Boolean requests must match on every content token.
+DEFAULT_THRESHOLDS = {
+    TaskType.BOOLEAN_SEARCH: 1.0,
+    TaskType.SALARY_RESEARCH: 1.0,
+}
+
+
+def normalize_tokens(message: str, task_type: Optional[TaskType] = None) -> FrozenSet[str]:
+    """Content tokens of a message (order, case and punctuation ignored).
+
+    Boolean operators change the meaning of a search string: for
+    BOOLEAN_SEARCH "and"/"or"/"not" are kept in any case, elsewhere only
+    when written as upper-case operators.
+    """
+    text = message.lower().replace("’", "'")
+    for contraction, expanded in _CONTRACTIONS.items():
+        text = text.replace(contraction, expanded)
+    if task_type == TaskType.BOOLEAN_SEARCH:
+        operators = _OPERATORS
+    else:
+        operators = {op.lower() for op in re.findall(r"\b(AND|OR|NOT)\b", message)}
+    return frozenset(
+        token for token in _TOKEN_RE.findall(text)
+        if token not in _STOPWORDS or token in operators
+    )
+
+
+def _feature_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+
+def simhash(tokens: FrozenSet[str]) -> int:
+    """64-bit SimHash of a token set."""
+    weights = [0] * FINGERPRINT_BITS
+    for token in tokens:
+        value = _feature_hash(token)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _bands(fingerprint: int) -> List[Tuple[int, int]]:
+    mask = (1 << BAND_BITS) - 1
+    return [(band, fingerprint >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+
+@dataclass
+class CacheEntry:
+    """A stored response and the normalized message it answered."""
+    key: int
+    scope: Tuple[str, str]
+    tokens: FrozenSet[str]
+    fingerprint: int
+    message: str
+    response: str
+    created_at: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+@dataclass
+class CacheHit:
+    """Result of a successful lookup."""
+    entry: CacheEntry
+    similarity: float
+    audit: bool
+
+
+class ResponseCache:
+    """In-process near-duplicate response cache with an LSH index."""
+
+    def __init__(
+        self,
+        thresholds: Optional[Dict[TaskType, float]] = None,
+        max_entries: int = 5000,
+        ttl_seconds: float = 86400,
+        audit_rate: float = 0.02,
+        audit_min_similarity: float = 0.5,
+        min_tokens: int = 2,
+    ):
+        """Initialize response cache.
+
+        Args:
+            thresholds: Minimum token Jaccard similarity per cacheable task type
+            max_entries: LRU capacity
+            ttl_seconds: Entry lifetime
+            audit_rate: Fraction of hits re-checked against a fresh LLM call
+            audit_min_similarity: Audited responses below this token Jaccard
+                similarity to the cached one count as false hits
+            min_tokens: Messages with fewer content tokens are never cached
+        """
+        self.thresholds = thresholds if thresholds is not None else dict(DEFAULT_THRESHOLDS)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.audit_rate = audit_rate
+        self.audit_min_similarity = audit_min_similarity
+        self.min_tokens = min_tokens
+
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._index: Dict[Tuple[str, str, int, int], Set[int]] = defaultdict(set)
+        self._next_key = 0
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._audit_log: List[Dict[str, Any]] = []
+
+    def enabled_for(self, task_type: TaskType) -> bool:
+        return task_type in self.thresholds
+
+    # ------------------------------------------------------------------
+    # Lookup and store
+    # ------------------------------------------------------------------
+
+    def lookup(self, message: str, task_type: TaskType, prompt_version: str) -> Optional[CacheHit]:
+        """Find a stored response for a near-duplicate message."""
+        if not self.enabled_for(task_type):
+            return None
+        tokens = normalize_tokens(message, task_type)
+        if len(tokens) < self.min_tokens:
+            return None
+
+        stats = self._stats[task_type.value]
+        stats["lookups"] += 1
+        scope = (task_type.value, prompt_version)
+        fingerprint = simhash(tokens)
+        now = time.monotonic()
+
+        best: Optional[CacheEntry] = None
+        best_similarity = 0.0
+        candidates: Set[int] = set()
+        for band, value in _bands(fingerprint):
+            candidates |= self._index.get((*scope, band, value), set())
+        for key in candidates:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if now - entry.created_at > self.ttl_seconds:
+                self._remove(key)
+                continue
+            similarity = jaccard(tokens, entry.tokens)
+            if similarity > best_similarity:
+                best, best_similarity = entry, similarity
+
+        if best is None or best_similarity < self.thresholds[task_type]:
+            stats["misses"] += 1
+            return None
+
+        best.hits += 1
+        self._entries.move_to_end(best.key)
+        stats["hits"] += 1
+        stats["saved_tokens"] += len(best.response) // 4
+        return CacheHit(entry=best, similarity=best_similarity, audit=random.random() < self.audit_rate)
+
+    def store(self, message: str, task_type: TaskType, prompt_version: str, response: str) -> None:
+        """Store a fresh response."""
+        if not self.enabled_for(task_type):
+            return
+        tokens = normalize_tokens(message, task_type)
+        if len(tokens) < self.min_tokens:
+            return
+
+        key = self._next_key
+        self._next_key += 1
+        entry = CacheEntry(
+            key=key,
+            scope=(task_type.value, prompt_version),
+            tokens=tokens,
+            fingerprint=simhash(tokens),
+            message=message,
+            response=response,
+        )
+        self._entries[key] = entry
+        for band, value in _bands(entry.fingerprint):
+            self._index[(*entry.scope, band, value)].add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: int) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band, value in _bands(entry.fingerprint):
+            bucket = self._index.get((*entry.scope, band, value))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._index[(*entry.scope, band, value)]
+
+    # ------------------------------------------------------------------
+    # Audits and reporting
+    # ------------------------------------------------------------------
+
+    def record_audit(self, hit: CacheHit, message: str, task_type: TaskType, fresh_response: str) -> bool:
+        """Compare a cached response with a fresh one for the same message.
+
+        A disagreeing entry is replaced by the fresh response.
+
+        Returns:
+            True if the hit was a false hit
+        """
+        agreement = jaccard(normalize_tokens(hit.entry.response), normalize_tokens(fresh_response))
+        false_hit = agreement < self.audit_min_similarity
+
+        stats = self._stats[task_type.value]
+        stats["audits"] += 1
+        if false_hit:
+            stats["false_hits"] += 1
+            self._remove(hit.entry.key)
+            self.store(message, task_type, hit.entry.scope[1], fresh_response)
+
+        self._audit_log.append({
+            "task_type": task_type.value,
+            "message": message[:200],
+            "cached_message": hit.entry.message[:200],
+            "similarity": round(hit.similarity, 3),
+            "response_agreement": round(agreement, 3),
+            "false_hit": false_hit,
+        })
+        del self._audit_log[:-50]
+        return false_hit
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, savings and audit results per task type."""
+        per_task = {}
+        for task, stats in self._stats.items():
+            lookups = stats["lookups"] or 1
+            audits = stats["audits"]
+            per_task[task] = {
+                "lookups": int(stats["lookups"]),
+                "hits": int(stats["hits"]),
+                "misses": int(stats["misses"]),
+                "hit_rate": round(stats["hits"] / lookups, 4),
+                # Audited hits still cost a (background) LLM call
+                "llm_calls_saved": int(stats["hits"] - audits),
+                "estimated_output_tokens_saved": int(stats["saved_tokens"]),
+                "audits": int(audits),
+                "false_hits": int(stats["false_hits"]),
+                "false_hit_rate": round(stats["false_hits"] / audits, 4) if audits else None,
+            }
+        return {
+            "entries": len(self._entries),
+            "thresholds": {task.value: value for task, value in self.thresholds.items()},
+            "task_types": per_task,
+            "recent_audits": list(self._audit_log),
+        }
+
+
+def _parse_thresholds(raw: str) -> Dict[TaskType, float]:
+    """Parse "boolean_search:0.9,salary_research:1.0"."""
+    thresholds = {}
+    for item in raw.split(","):
+        if ":" not in item:
+            continue
+        name, value = item.split(":", 1)
+        try:
+            thresholds[TaskType(name.strip())] = float(value)
+        except ValueError:
+            print(f"Warning: ignoring response cache threshold {item!r}")
+    return thresholds
+
+
+# Global response cache instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create global response cache instance."""
+    global _response_cache
+    if _response_cache is None:
+        raw_thresholds = os.getenv("RESPONSE_CACHE_THRESHOLDS")
+        _response_cache = ResponseCache(
+            thresholds=_parse_thresholds(raw_thresholds) if raw_thresholds is not None else None,
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000")),
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "86400")),
+            audit_rate=float(os.getenv("RESPONSE_CACHE_AUDIT_RATE", "0.02")),
+        )
+    return _response_cache
+
+
+__all__ = [
+    "CacheHit",
+    "ResponseCache",
+    "get_response_cache",
+    "normalize_tokens",
+    "simhash",
+]
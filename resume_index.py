@@ -0,0 +1,685 @@
+"""Boolean query execution over a local resume inverted index.
+
+Lets recruiters test Boolean strings (e.g. from `boolean_compiler.py`)
+against resumes stored in `resume_documents` before spending JobDiva quota:
+
+- `parse_boolean` turns AND / OR / NOT, quoted phrases, parentheses and
+  trailing wildcards into a query tree (implicit AND between adjacent terms)
+- `InvertedIndex` keeps one positional posting list per term, compressed as
+  delta + varint bytes with a skip list every `SKIP_INTERVAL` postings
+- AND clauses run cheapest-first by document frequency; term postings are
+  intersected by skipping through the compressed lists instead of decoding
+  them; NOT clauses are subtracted last
+- Matches are ranked with BM25 over the positive query terms
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import DatabaseManager, ResumeDocument, get_db_manager
+from skill_index import get_skill_normalizer
+
+SKIP_INTERVAL = 64
+MIN_WILDCARD_PREFIX = 3
+MAX_WILDCARD_EXPANSION = 200
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*|\.[a-z][a-z0-9]*")
+_QUERY_TOKEN_RE = re.compile(r'\s*(?:(?P<lparen>\()|(?P<rparen>\))|"(?P<phrase>[^"]*)"|(?P<word>[^\s()"]+))')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase index tokens; keeps C#, C++, .NET and dotted names intact."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+# ----------------------------------------------------------------------
+# Compressed posting lists
+# ----------------------------------------------------------------------
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class PostingList:
+    """Positional postings for one term: [doc delta, tf, position deltas...].
+
+    The first posting of every skip block stores its absolute doc ID, so a
+    cursor can start decoding at any skip entry.
+    """
+
+    __slots__ = ("data", "skips", "skip_docs", "count", "last_doc")
+
+    def __init__(self):
+        self.data = bytearray()
+        # Doc ID and byte offset of every SKIP_INTERVAL-th posting
+        self.skip_docs: List[int] = []
+        self.skips: List[int] = []
+        self.count = 0
+        self.last_doc = 0
+
+    def append(self, doc_id: int, positions: List[int]) -> None:
+        """Append a posting; doc IDs must be increasing."""
+        if self.count % SKIP_INTERVAL == 0:
+            self.skip_docs.append(doc_id)
+            self.skips.append(len(self.data))
+            _write_varint(self.data, doc_id)
+        else:
+            _write_varint(self.data, doc_id - self.last_doc)
+        _write_varint(self.data, len(positions))
+        previous = 0
+        for position in positions:
+            _write_varint(self.data, position - previous)
+            previous = position
+        self.last_doc = doc_id
+        self.count += 1
+
+    def cursor(self) -> "PostingCursor":
+        return PostingCursor(self)
+
+    def doc_ids(self) -> List[int]:
+        """Decode all doc IDs (positions are stepped over, not decoded)."""
+        data = self.data
+        ids = []
+        offset = doc_id = 0
+        for index in range(self.count):
+            value, offset = _read_varint(data, offset)
+            doc_id = value if index % SKIP_INTERVAL == 0 else doc_id + value
+            ids.append(doc_id)
+            tf, offset = _read_varint(data, offset)
+            while tf:
+                if data[offset] < 0x80:
+                    tf -= 1
+                offset += 1
+        return ids
+
+
+class PostingCursor:
+    """Forward iterator over a posting list with skip-list `advance`."""
+
+    __slots__ = ("postings", "offset", "index", "doc_id", "tf", "_positions_at")
+
+    def __init__(self, postings: PostingList):
+        self.postings = postings
+        self.offset = 0
+        self.index = 0
+        self.doc_id = -1
+        self.tf = 0
+        self._positions_at = 0
+
+    def next(self) -> bool:
+        """Move to the next posting; False when exhausted."""
+        if self.index >= self.postings.count:
+            return False
+        data = self.postings.data
+        value, offset = _read_varint(data, self.offset)
+        self.doc_id = value if self.index % SKIP_INTERVAL == 0 else self.doc_id + value
+        self.tf, offset = _read_varint(data, offset)
+        self._positions_at = offset
+        tf = self.tf
+        while tf:
+            if data[offset] < 0x80:
+                tf -= 1
+            offset += 1
+        self.offset = offset
+        self.index += 1
+        return True
+
+    def advance(self, target: int) -> bool:
+        """Move to the first posting with doc_id >= target; False when exhausted."""
+        if self.index and self.doc_id >= target:
+            return True
+        # Jump to the last skip block starting at or before the target
+        block = bisect.bisect_right(self.postings.skip_docs, target) - 1
+        if block >= 0 and block * SKIP_INTERVAL > self.index - 1:
+            self.index = block * SKIP_INTERVAL
+            self.offset = self.postings.skips[block]
+        while self.next():
+            if self.doc_id >= target:
+                return True
+        return False
+
+    def positions(self) -> List[int]:
+        data = self.postings.data
+        offset = self._positions_at
+        positions, previous = [], 0
+        for _ in range(self.tf):
+            delta, offset = _read_varint(data, offset)
+            previous += delta
+            positions.append(previous)
+        return positions
+
+
+# ----------------------------------------------------------------------
+# Query parsing
+# ----------------------------------------------------------------------
+
+@dataclass
+class Term:
+    word: str
+
+
+@dataclass
+class Prefix:
+    prefix: str
+
+
+@dataclass
+class Phrase:
+    words: List[str]
+
+
+@dataclass
+class Not:
+    child: "Node"
+
+
+@dataclass
+class And:
+    children: List["Node"] = field(default_factory=list)
+
+
+@dataclass
+class Or:
+    children: List["Node"] = field(default_factory=list)
+
+
+Node = Union[Term, Prefix, Phrase, Not, And, Or]
+
+
+class BooleanSyntaxError(ValueError):
+    """Raised when a Boolean query cannot be parsed."""
+
+
+def parse_boolean(query: str) -> Node:
+    """Parse a Boolean string (precedence: NOT > AND > OR)."""
+    tokens: List[Tuple[str, str]] = []
+    position = 0
+    query = query.strip()
+    while position < len(query):
+        match = _QUERY_TOKEN_RE.match(query, position)
+        if not match or match.end() == position:
+            raise BooleanSyntaxError(f"Unexpected input at position {position}")
+        position = match.end()
+        if match.group("lparen"):
+            tokens.append(("(", "("))
+        elif match.group("rparen"):
+            tokens.append((")", ")"))
+        elif match.group("phrase") is not None:
+            tokens.append(("phrase", match.group("phrase")))
+        elif match.group("word"):
+            word = match.group("word")
+            tokens.append(("op", word) if word in ("AND", "OR", "NOT") else ("word", word))
+
+    parser = _Parser(tokens)
+    node = parser.parse_or()
+    if parser.index != len(tokens):
+        raise BooleanSyntaxError(f"Unexpected token: {tokens[parser.index][1]}")
+    return node
+
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.index = 0
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def parse_or(self) -> Node:
+        children = [self.parse_and()]
+        while self._peek() == ("op", "OR"):
+            self.index += 1
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self) -> Node:
+        children = [self.parse_not()]
+        while True:
+            token = self._peek()
+            if token == ("op", "AND"):
+                self.index += 1
+            elif token is None or token[0] == ")" or token == ("op", "OR"):
+                break
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not(self) -> Node:
+        if self._peek() == ("op", "NOT"):
+            self.index += 1
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> Node:
+        token = self._peek()
+        if token is None:
+            raise BooleanSyntaxError("Unexpected end of query")
+        self.index += 1
+        kind, value = token
+        if kind == "(":
+            node = self.parse_or()
+            if self._peek() != (")", ")"):
+                raise BooleanSyntaxError("Unbalanced parentheses")
+            self.index += 1
+            return node
+        if kind == "phrase":
+            words = tokenize(value)
+            if not words:
+                raise BooleanSyntaxError(f'Empty phrase: "{value}"')
+            return Term(words[0]) if len(words) == 1 else Phrase(words)
+        if kind == "word":
+            if value.endswith("*"):
+                prefix = value.rstrip("*").lower()
+                if len(prefix) < MIN_WILDCARD_PREFIX:
+                    raise BooleanSyntaxError(
+                        f"Wildcard root too short: {value} (min {MIN_WILDCARD_PREFIX} characters)"
+                    )
+                return Prefix(prefix)
+            words = tokenize(value)
+            if not words:
+                raise BooleanSyntaxError(f"Unsearchable term: {value}")
+            return Term(words[0]) if len(words) == 1 else Phrase(words)
+        raise BooleanSyntaxError(f"Unexpected token: {value}")
+
+
+def describe_plan(node: Node, index: "InvertedIndex") -> str:
+    """Human-readable execution plan with document-frequency estimates."""
+    if isinstance(node, Term):
+        return f"{node.word}[{index.doc_freq(node.word)}]"
+    if isinstance(node, Prefix):
+        return f"{node.prefix}*[{len(index.expand_prefix(node.prefix))} terms]"
+    if isinstance(node, Phrase):
+        return '"' + " ".join(node.words) + f'"[<={index.estimate(node)}]'
+    if isinstance(node, Not):
+        return f"NOT {describe_plan(node.child, index)}"
+    if isinstance(node, Or):
+        return "(" + " OR ".join(describe_plan(c, index) for c in node.children) + ")"
+    positives = sorted(
+        (c for c in node.children if not isinstance(c, Not)), key=index.estimate
+    )
+    negatives = [c for c in node.children if isinstance(c, Not)]
+    return "(" + " AND ".join(describe_plan(c, index) for c in positives + negatives) + ")"
+
+
+# ----------------------------------------------------------------------
+# Index and execution
+# ----------------------------------------------------------------------
+
+@dataclass
+class IndexedDocument:
+    """Per-document metadata kept next to the postings."""
+    record_id: int
+    length: int
+    candidate_email: Optional[str]
+    candidate_name: Optional[str]
+    snippet: str
+
+
+class InvertedIndex:
+    """In-memory positional inverted index."""
+
+    def __init__(self):
+        self.postings: Dict[str, PostingList] = {}
+        self.documents: List[IndexedDocument] = []
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, record_id: int, text: str, candidate_email: Optional[str] = None,
+            candidate_name: Optional[str] = None) -> int:
+        """Index a document; returns its internal doc ID."""
+        doc_id = len(self.documents)
+        tokens = tokenize(text)
+        positions: Dict[str, List[int]] = {}
+        for position, token in enumerate(tokens):
+            positions.setdefault(token, []).append(position)
+        for token, token_positions in positions.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = PostingList()
+                self._vocabulary_dirty = True
+            postings.append(doc_id, token_positions)
+
+        self.documents.append(IndexedDocument(
+            record_id=record_id,
+            length=len(tokens),
+            candidate_email=candidate_email,
+            candidate_name=candidate_name,
+            snippet=" ".join(text.split())[:240],
+        ))
+        self._total_length += len(tokens)
+        return doc_id
+
+    def doc_freq(self, term: str) -> int:
+        postings = self.postings.get(term)
+        return postings.count if postings else 0
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self.postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "￿")
+        return self._vocabulary[start:end][:MAX_WILDCARD_EXPANSION]
+
+    def estimate(self, node: Node) -> int:
+        """Upper bound on matching documents (used to order AND clauses)."""
+        if isinstance(node, Term):
+            return self.doc_freq(node.word)
+        if isinstance(node, Prefix):
+            return min(len(self), sum(self.doc_freq(t) for t in self.expand_prefix(node.prefix)))
+        if isinstance(node, Phrase):
+            return min(self.doc_freq(w) for w in node.words)
+        if isinstance(node, Or):
+            return min(len(self), sum(self.estimate(c) for c in node.children))
+        if isinstance(node, And):
+            positives = [self.estimate(c) for c in node.children if not isinstance(c, Not)]
+            return min(positives) if positives else len(self)
+        return len(self) - self.estimate(node.child)
+
+    # -- evaluation --------------------------------------------------------
+
+    def evaluate(self, node: Node) -> List[int]:
+        """Sorted internal doc IDs matching a query tree."""
+        if isinstance(node, Term):
+            postings = self.postings.get(node.word)
+            return postings.doc_ids() if postings else []
+        if isinstance(node, Prefix):
+            return self._union([self.evaluate(Term(t)) for t in self.expand_prefix(node.prefix)])
+        if isinstance(node, Phrase):
+            return self._phrase(node.words)
+        if isinstance(node, Or):
+            return self._union([self.evaluate(c) for c in node.children])
+        if isinstance(node, Not):
+            return self._difference(list(range(len(self))), self.evaluate(node.child))
+        return self._and(node)
+
+    def _and(self, node: And) -> List[int]:
+        positives = sorted(
+            (c for c in node.children if not isinstance(c, Not)), key=self.estimate
+        )
+        negatives = [c.child for c in node.children if isinstance(c, Not)]
+
+        if positives:
+            result = self.evaluate(positives[0])
+        else:
+            result = list(range(len(self)))
+        for child in positives[1:]:
+            if not result:
+                return []
+            if isinstance(child, Term):
+                result = self._intersect_postings(result, child.word)
+            else:
+                result = self._intersect(result, self.evaluate(child))
+        for child in negatives:
+            if not result:
+                break
+            result = self._difference(result, self.evaluate(child))
+        return result
+
+    def _intersect_postings(self, candidates: List[int], term: str) -> List[int]:
+        """Intersect sorted candidates with a term's postings via skips."""
+        postings = self.postings.get(term)
+        if postings is None:
+            return []
+        cursor = postings.cursor()
+        result = []
+        for doc_id in candidates:
+            if not cursor.advance(doc_id):
+                break
+            if cursor.doc_id == doc_id:
+                result.append(doc_id)
+        return result
+
+    def _phrase(self, words: List[str]) -> List[int]:
+        cursors = []
+        for word in words:
+            postings = self.postings.get(word)
+            if postings is None:
+                return []
+            cursors.append(postings.cursor())
+        # Drive the scan from the rarest word
+        rarest = min(cursors, key=lambda cursor: cursor.postings.count)
+
+        result = []
+        for doc_id in rarest.postings.doc_ids():
+            if not all(cursor.advance(doc_id) for cursor in cursors):
+                break
+            if any(cursor.doc_id != doc_id for cursor in cursors):
+                continue
+            starts = set(cursors[0].positions())
+            for offset, cursor in enumerate(cursors[1:], start=1):
+                starts &= {position - offset for position in cursor.positions()}
+                if not starts:
+                    break
+            if starts:
+                result.append(doc_id)
+        return result
+
+    @staticmethod
+    def _intersect(a: List[int], b: List[int]) -> List[int]:
+        if len(a) > len(b):
+            a, b = b, a
+        lookup = set(b)
+        return [doc_id for doc_id in a if doc_id in lookup]
+
+    @staticmethod
+    def _union(lists: List[List[int]]) -> List[int]:
+        lists = [items for items in lists if items]
+        if len(lists) == 1:
+            return lists[0]
+        return sorted(set().union(*lists))
+
+    @staticmethod
+    def _difference(a: List[int], b: List[int]) -> List[int]:
+        exclude = set(b)
+        return [doc_id for doc_id in a if doc_id not in exclude]
+
+    # -- ranking -----------------------------------------------------------
+
+    def positive_terms(self, node: Node) -> List[str]:
+        """Index terms that contribute to ranking (NOT branches excluded)."""
+        if isinstance(node, Term):
+            return [node.word]
+        if isinstance(node, Prefix):
+            return self.expand_prefix(node.prefix)
+        if isinstance(node, Phrase):
+            return list(node.words)
+        if isinstance(node, Not):
+            return []
+        return [t for c in node.children for t in self.positive_terms(c)]
+
+    def rank(self, doc_ids: List[int], terms: List[str], limit: int,
+             k1: float = 1.2, b: float = 0.75) -> List[Tuple[int, float]]:
+        """Top documents by BM25 over the query terms."""
+        if not doc_ids:
+            return []
+        n_docs = len(self)
+        avg_length = self._total_length / n_docs if n_docs else 0
+        scores = dict.fromkeys(doc_ids, 0.0)
+        for term in dict.fromkeys(terms):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            idf = math.log(1 + (n_docs - postings.count + 0.5) / (postings.count + 0.5))
+            cursor = postings.cursor()
+            for doc_id in doc_ids:
+                if not cursor.advance(doc_id):
+                    break
+                if cursor.doc_id != doc_id:
+                    continue
+                length = self.documents[doc_id].length
+                tf = cursor.tf
+                scores[doc_id] += idf * tf * (k1 + 1) / (
+                    tf + k1 * (1 - b + b * length / (avg_length or 1))
+                )
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+class ResumeSearchEngine:
+    """Keeps the inverted index in sync with `resume_documents` and runs queries.
+
+    Other uvicorn workers and worker.py `resume_import` jobs store resumes
+    too, so every search first indexes rows it has not seen yet.
+    """
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, reread_window: int = 1000):
+        """Initialize resume search engine.
+
+        Args:
+            db_manager: Database manager to load resumes from
+            reread_window: IDs below the highest indexed one that are
+                re-checked on each load; concurrent inserts can commit a
+                lower ID after a higher one
+        """
+        self.db_manager = db_manager or get_db_manager()
+        self.reread_window = reread_window
+        self.index = InvertedIndex()
+        self._indexed_ids: set = set()
+        self._last_indexed_id = 0
+
+    async def load(self) -> int:
+        """Index resumes stored since the last call (all of them on the first)."""
+        async with self.db_manager.engine.connect() as conn:
+            new_rows = ResumeDocument.id > self._last_indexed_id
+            if self._last_indexed_id:
+                window = await conn.execute(
+                    select(ResumeDocument.id).where(
+                        ResumeDocument.id > self._last_indexed_id - self.reread_window,
+                        ResumeDocument.id <= self._last_indexed_id,
+                    )
+                )
+                late = [record_id for record_id in window.scalars() if record_id not in self._indexed_ids]
+                if late:
+                    new_rows = or_(new_rows, ResumeDocument.id.in_(late))
+            result = await conn.stream(
+                select(
+                    ResumeDocument.id,
+                    ResumeDocument.text,
+                    ResumeDocument.candidate_email,
+                    ResumeDocument.candidate_name,
+                )
+                .where(new_rows)
+                .order_by(ResumeDocument.id)
+            )
+            async for row in result:
+                self._add(row.id, row.text, row.candidate_email, row.candidate_name)
+                self._last_indexed_id = max(self._last_indexed_id, row.id)
+        return len(self.index)
+
+    def _add(self, record_id: int, text: str, email: Optional[str], name: Optional[str]) -> None:
+        if record_id not in self._indexed_ids:
+            self._indexed_ids.add(record_id)
+            self.index.add(record_id, text, email, name)
+
+    async def add_resume(
+        self,
+        db: AsyncSession,
+        text: str,
+        candidate_email: Optional[str] = None,
+        candidate_name: Optional[str] = None,
+        candidate_id: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> Tuple[ResumeDocument, bool]:
+        """Store and index a resume (deduplicated by content hash).
+
+        Returns:
+            (document, created)
+        """
+        content_hash = hashlib.sha256(" ".join(text.split()).lower().encode()).hexdigest()
+        existing = (await db.execute(
+            select(ResumeDocument).where(ResumeDocument.content_hash == content_hash)
+        )).scalar_one_or_none()
+        if existing is not None:
+            return existing, False
+
+        document = ResumeDocument(
+            candidate_id=candidate_id,
+            candidate_email=candidate_email,
+            candidate_name=candidate_name,
+            source=source,
+            content_hash=content_hash,
+            text=text,
+            skills=get_skill_normalizer().extract(text),
+        )
+        db.add(document)
+        await db.commit()
+        # Searchable here right away; other processes pick it up in load()
+        self._add(document.id, text, candidate_email, candidate_name)
+        return document, True
+
+    async def search(self, query: str, limit: int = 20) -> Dict[str, Any]:
+        """Run a Boolean query; returns hit count, plan and top documents."""
+        await self.load()
+        started = time.perf_counter()
+        tree = parse_boolean(query)
+        doc_ids = self.index.evaluate(tree)
+        top = self.index.rank(doc_ids, self.index.positive_terms(tree), limit)
+        took_ms = (time.perf_counter() - started) * 1000
+
+        documents = []
+        for doc_id, score in top:
+            document = self.index.documents[doc_id]
+            documents.append({
+                "resume_id": document.record_id,
+                "candidate_email": document.candidate_email,
+                "candidate_name": document.candidate_name,
+                "score": round(score, 4),
+                "snippet": document.snippet,
+            })
+        return {
+            "query": query,
+            "plan": describe_plan(tree, self.index),
+            "hits": len(doc_ids),
+            "corpus_size": len(self.index),
+            "took_ms": round(took_ms, 3),
+            "documents": documents,
+        }
+
+
+# Global resume search engine instance
+_resume_search: Optional[ResumeSearchEngine] = None
+
+
+def get_resume_search() -> ResumeSearchEngine:
+    """Get or create global resume search engine instance."""
+    global _resume_search
+    if _resume_search is None:
+        _resume_search = ResumeSearchEngine()
+    return _resume_search
+
+
+__all__ = [
+    "BooleanSyntaxError",
+    "InvertedIndex",
+    "ResumeSearchEngine",
+    "get_resume_search",
+    "parse_boolean",
+    "tokenize",
+]
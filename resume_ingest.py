@@ -0,0 +1,219 @@
+"""Resume upload ingestion: text extraction off the event loop.
+
+PDF parsing is CPU-bound, so it runs in a `ProcessPoolExecutor` and a bulk
+upload scales with cores instead of blocking the event loop or serializing
+on one worker:
+
+- Extracted text is cached by SHA-256 of the file bytes (LRU), and
+  concurrent uploads of the same file share one extraction
+- Batches are extracted concurrently and reported per file as each one
+  completes (`ingest_batch` yields progress events)
+
+This module only imports the standard library and pypdf so pool workers
+start quickly; storage in the resume corpus happens in the caller.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+PDF_MAGIC = b"%PDF"
+TEXT_EXTENSIONS = (".txt", ".md")
+
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+
+class ResumeExtractionError(ValueError):
+    """Raised when no text can be extracted from an upload."""
+
+
+def extract_pdf_text(data: bytes) -> str:
+    """Extract text from PDF bytes (runs in a worker process)."""
+    if PdfReader is None:
+        raise ResumeExtractionError("PDF support requires pypdf (pip install pypdf)")
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        if reader.is_encrypted:
+            reader.decrypt("")
+        pages = [page.extract_text() or "" for page in reader.pages]
+    except Exception as e:
+        raise ResumeExtractionError(f"Could not read PDF: {e}") from e
+    return "\n".join(page.strip() for page in pages if page.strip())
+
+
+def find_email(text: str) -> Optional[str]:
+    """First email address in a resume (the candidate's, by convention)."""
+    match = _EMAIL_RE.search(text)
+    return match.group(0).lower() if match else None
+
+
+@dataclass
+class ExtractedResume:
+    """Result of extracting one upload."""
+    filename: str
+    content_hash: str
+    text: str
+    cached: bool
+
+
+class ResumeIngestor:
+    """Extracts resume text in a process pool with a content-hash cache."""
+
+    def __init__(self, max_workers: Optional[int] = None, cache_size: int = 1000,
+                 max_file_bytes: int = 10 * 1024 * 1024):
+        """Initialize resume ingestor.
+
+        Args:
+            max_workers: Extraction processes (default: CPU count)
+            cache_size: Extracted texts kept in the LRU cache
+            max_file_bytes: Larger uploads are rejected
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.max_file_bytes = max_file_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {"extracted": 0, "cache_hits": 0, "errors": 0}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and DB pools is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            print(f"📄 Resume extraction pool started ({self.max_workers} workers)")
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def extract(self, filename: str, data: bytes) -> ExtractedResume:
+        """Extract text from one upload (PDF or plain text).
+
+        Raises:
+            ResumeExtractionError: Empty, oversized, unsupported or unreadable file
+        """
+        if not data:
+            raise ResumeExtractionError("Empty file")
+        if len(data) > self.max_file_bytes:
+            raise ResumeExtractionError(
+                f"File exceeds {self.max_file_bytes // (1024 * 1024)} MB limit"
+            )
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        text = self._cache.get(content_hash)
+        if text is not None:
+            self._cache.move_to_end(content_hash)
+            self._stats["cache_hits"] += 1
+            return ExtractedResume(filename, content_hash, text, cached=True)
+
+        inflight = self._inflight.get(content_hash)
+        if inflight is not None:
+            self._stats["cache_hits"] += 1
+            return ExtractedResume(filename, content_hash, await asyncio.shield(inflight), cached=True)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[content_hash] = future
+        try:
+            text = await self._extract_uncached(filename, data)
+            future.set_result(text)
+        except Exception as e:
+            self._stats["errors"] += 1
+            future.set_exception(e)
+            # Mark retrieved so waiter-less failures are not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._inflight[content_hash]
+
+        self._stats["extracted"] += 1
+        self._cache[content_hash] = text
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return ExtractedResume(filename, content_hash, text, cached=False)
+
+    async def _extract_uncached(self, filename: str, data: bytes) -> str:
+        if data.startswith(PDF_MAGIC):
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(self._pool(), extract_pdf_text, data)
+        elif filename.lower().endswith(TEXT_EXTENSIONS):
+            text = data.decode("utf-8", errors="replace")
+        else:
+            raise ResumeExtractionError("Unsupported file type (PDF or plain text only)")
+        if not text.strip():
+            raise ResumeExtractionError("No extractable text (scanned PDF?)")
+        return text
+
+    async def ingest_batch(
+        self, files: List[Tuple[str, bytes]]
+    ) -> AsyncIterator[Tuple[int, Optional[ExtractedResume], Optional[str]]]:
+        """Extract a batch concurrently, yielding results as they complete.
+
+        Yields:
+            (file index, extracted resume or None, error message or None)
+        """
+        async def run(position: int, filename: str, data: bytes):
+            try:
+                return position, await self.extract(filename, data), None
+            except ResumeExtractionError as e:
+                return position, None, str(e)
+            except Exception as e:
+                # e.g. BrokenProcessPool; report per file instead of aborting the batch
+                return position, None, f"Extraction failed: {e}"
+
+        tasks = [asyncio.ensure_future(run(i, name, data)) for i, (name, data) in enumerate(files)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "cached_texts": len(self._cache), "workers": self.max_workers}
+
+
+# Global resume ingestor instance
+_resume_ingestor: Optional[ResumeIngestor] = None
+
+
+def get_resume_ingestor() -> ResumeIngestor:
+    """Get or create global resume ingestor instance."""
+    global _resume_ingestor
+    if _resume_ingestor is None:
+        workers = os.getenv("RESUME_PARSE_WORKERS")
+        _resume_ingestor = ResumeIngestor(
+            max_workers=int(workers) if workers else None,
+            cache_size=int(os.getenv("RESUME_TEXT_CACHE_SIZE", "1000")),
+            max_file_bytes=int(float(os.getenv("RESUME_MAX_UPLOAD_MB", "10")) * 1024 * 1024),
+        )
+    return _resume_ingestor
+
+
+__all__ = [
+    "ExtractedResume",
+    "ResumeExtractionError",
+    "ResumeIngestor",
+    "extract_pdf_text",
+    "find_email",
+    "get_resume_ingestor",
+]
@@ -0,0 +1,198 @@
+"""Session detail queries with bounded, keyset-paged child collections.
+
+The session row and the first page of its candidate interactions and
+feedback logs are fetched in one round trip: a UNION ALL of three
+column-selected arms sharing a uniform row shape. Further pages of each
+child collection are served separately from (timestamp, id) cursors.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import DateTime, Float, Integer, String, Text, cast, literal, null, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import CandidateInteraction, FeedbackLog, SessionHistory
+from pagination import decode_cursor, encode_cursor
+
+MAX_PAGE_SIZE = 200
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _child_page(model, session_id: str, limit: int, cursor: Optional[str], columns: List):
+    """Select one keyset page (limit + 1 rows) of a child collection."""
+    stmt = select(*columns).where(model.session_id == session_id)
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.timestamp, model.id) < tuple_(timestamp, row_id))
+    return stmt.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1)
+
+
+def _interaction_columns():
+    return [
+        CandidateInteraction.id.label("row_id"),
+        CandidateInteraction.timestamp.label("ts"),
+        CandidateInteraction.candidate_email.label("s1"),
+        CandidateInteraction.job_id.label("s2"),
+        cast(CandidateInteraction.action, Text).label("s3"),
+        cast(CandidateInteraction.match_score, Float).label("n1"),
+    ]
+
+
+def _feedback_columns():
+    return [
+        FeedbackLog.id.label("row_id"),
+        FeedbackLog.timestamp.label("ts"),
+        FeedbackLog.error_type.label("s1"),
+        FeedbackLog.severity.label("s2"),
+        cast(FeedbackLog.user_input, Text).label("s3"),
+        cast(null(), Float).label("n1"),
+    ]
+
+
+def _interaction(row) -> Dict[str, Any]:
+    return {
+        "candidate_email": row.s1,
+        "job_id": row.s2,
+        "match_score": row.n1,
+        "action": row.s3,
+        "timestamp": _iso(row.ts),
+    }
+
+
+def _feedback(row) -> Dict[str, Any]:
+    return {
+        "error_type": row.s1,
+        "severity": row.s2,
+        "user_input": row.s3,
+        "timestamp": _iso(row.ts),
+    }
+
+
+def _page(rows: List, limit: int, serialize) -> Dict[str, Any]:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [serialize(row) for row in rows],
+        "next_cursor": encode_cursor(rows[-1].ts, rows[-1].row_id) if has_more else None,
+        "has_more": has_more,
+    }
+
+
+async def fetch_session_detail(
+    db: AsyncSession,
+    session_id: str,
+    limit: int = 50,
+) -> Optional[Dict[str, Any]]:
+    """Fetch a session with the first page of each child collection.
+
+    Returns:
+        Detail dict, or None if the session does not exist
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    session_arm = select(
+        literal("session").label("kind"),
+        SessionHistory.id.label("row_id"),
+        SessionHistory.last_active.label("ts"),
+        SessionHistory.created_at.label("ts2"),
+        cast(SessionHistory.task_type, String).label("s1"),
+        cast(null(), String).label("s2"),
+        cast(null(), Text).label("s3"),
+        cast(SessionHistory.message_count, Float).label("n1"),
+        cast(SessionHistory.token_usage, Integer).label("n2"),
+    ).where(SessionHistory.session_id == session_id)
+
+    def child_arm(kind: str, page):
+        sub = page.subquery()
+        return select(
+            literal(kind).label("kind"),
+            sub.c.row_id,
+            sub.c.ts,
+            cast(null(), DateTime).label("ts2"),
+            cast(sub.c.s1, String).label("s1"),
+            cast(sub.c.s2, String).label("s2"),
+            sub.c.s3,
+            sub.c.n1,
+            cast(null(), Integer).label("n2"),
+        )
+
+    stmt = union_all(
+        session_arm,
+        child_arm("interaction", _child_page(
+            CandidateInteraction, session_id, limit, None, _interaction_columns()
+        )),
+        child_arm("feedback", _child_page(
+            FeedbackLog, session_id, limit, None, _feedback_columns()
+        )),
+    )
+    rows = (await db.execute(stmt)).all()
+
+    session = next((row for row in rows if row.kind == "session"), None)
+    if session is None:
+        return None
+
+    # UNION ALL does not guarantee arm ordering; restore it per collection
+    def ordered(kind: str) -> List:
+        return sorted(
+            (row for row in rows if row.kind == kind),
+            key=lambda row: (row.ts, row.row_id),
+            reverse=True,
+        )
+
+    interactions = _page(ordered("interaction"), limit, _interaction)
+    feedback_logs = _page(ordered("feedback"), limit, _feedback)
+    return {
+        "session": {
+            "session_id": session_id,
+            "task_type": session.s1,
+            "message_count": int(session.n1 or 0),
+            "token_usage": session.n2 or 0,
+            "created_at": _iso(session.ts2),
+            "last_active": _iso(session.ts),
+        },
+        "interactions": interactions.pop("items"),
+        "feedback_logs": feedback_logs.pop("items"),
+        "pagination": {
+            "limit": limit,
+            "interactions": interactions,
+            "feedback_logs": feedback_logs,
+        },
+    }
+
+
+async def fetch_interactions_page(
+    db: AsyncSession,
+    session_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Fetch one page of a session's candidate interactions."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    stmt = _child_page(CandidateInteraction, session_id, limit, cursor, _interaction_columns())
+    return _page((await db.execute(stmt)).all(), limit, _interaction)
+
+
+async def fetch_feedback_page(
+    db: AsyncSession,
+    session_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Fetch one page of a session's feedback logs."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    stmt = _child_page(FeedbackLog, session_id, limit, cursor, _feedback_columns())
+    return _page((await db.execute(stmt)).all(), limit, _feedback)
+
+
+__all__ = [
+    "fetch_session_detail",
+    "fetch_interactions_page",
+    "fetch_feedback_page",
+    "MAX_PAGE_SIZE",
+]
@@ -0,0 +1,234 @@
+"""Write-behind buffer for session history updates.
+
+Chat turns record session increments in memory; a background flusher writes
+them every `flush_interval_ms` or `max_events` as a single multi-row upsert
+(`INSERT ... ON CONFLICT DO UPDATE message_count = message_count + excluded`)
+on a dedicated database session. Pending increments are drained on shutdown.
+The same transaction adds the flushed messages to the `message_count`
+analytics rollup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import case, func, null
+from sqlalchemy.dialects import postgresql, sqlite
+
+from analytics_rollup import record_messages
+from conversation_memory import state_revision
+from database import DatabaseManager, SessionHistory, get_db_manager
+
+
+@dataclass
+class _PendingUpdate:
+    """Accumulated increments for one session since the last flush."""
+    task_type: Optional[str]
+    last_active: datetime
+    user_id: Optional[str] = None
+    messages: int = 0
+    tokens: int = 0
+    conversation_state: Optional[Dict[str, Any]] = None
+
+
+class SessionHistoryWriter:
+    """Batches `SessionHistory` increments and flushes them as one upsert."""
+
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        flush_interval_ms: int = 250,
+        max_events: int = 100,
+    ):
+        """Initialize session history writer.
+
+        Args:
+            db_manager: Database manager providing the dedicated session
+            flush_interval_ms: Maximum time an increment waits in memory
+            max_events: Flush early once this many events are buffered
+        """
+        self.db_manager = db_manager or get_db_manager()
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_events = max_events
+
+        self._pending: Dict[str, _PendingUpdate] = {}
+        self._event_count = 0
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def record(
+        self,
+        session_id: str,
+        task_type: Optional[str] = None,
+        user_id: Optional[str] = None,
+        messages: int = 1,
+        tokens: int = 0,
+        conversation_state: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Buffer a session increment (non-blocking).
+
+        The highest-revision `conversation_state` per session wins; sessions
+        without one keep their stored state (and task type and user, if None).
+        """
+        pending = self._pending.get(session_id)
+        if pending is None:
+            pending = _PendingUpdate(task_type=task_type, last_active=datetime.utcnow(), user_id=user_id)
+            self._pending[session_id] = pending
+        else:
+            pending.last_active = datetime.utcnow()
+            if task_type:
+                pending.task_type = task_type
+            if user_id:
+                pending.user_id = user_id
+        pending.messages += messages
+        pending.tokens += tokens
+        if conversation_state is not None and (
+            state_revision(conversation_state) >= state_revision(pending.conversation_state)
+        ):
+            pending.conversation_state = conversation_state
+
+        self._event_count += 1
+        if self._event_count >= self.max_events:
+            self._wake.set()
+        if self._task is None and not self._stopping:
+            self.start()
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and drain all pending increments."""
+        self._stopping = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    @property
+    def pending_count(self) -> int:
+        """Number of sessions with unflushed increments."""
+        return len(self._pending)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all buffered increments in one upsert.
+
+        Returns:
+            Number of sessions written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            self._event_count = 0
+
+            try:
+                async with self.db_manager.async_session() as session:
+                    await session.execute(self._upsert_statement(batch))
+                    await record_messages(session, sum(update.messages for update in batch.values()))
+                    await session.commit()
+                # Replicas may lag behind this flush
+                for session_id in batch:
+                    await self.db_manager.mark_write(session_id)
+            except Exception as e:
+                # Put the increments back so the next flush retries them
+                self._requeue(batch)
+                print(f"Session history flush failed ({len(batch)} sessions): {e}")
+                return 0
+
+            return len(batch)
+
+    def _upsert_statement(self, batch: Dict[str, _PendingUpdate]):
+        dialect = self.db_manager.engine.dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+
+        stmt = insert(SessionHistory).values([
+            {
+                "session_id": session_id,
+                "task_type": update.task_type,
+                "user_id": update.user_id,
+                "message_count": update.messages,
+                "token_usage": update.tokens,
+                "created_at": update.last_active,
+                "last_active": update.last_active,
+                # SQL NULL (not JSON null) so COALESCE keeps the stored state
+                "conversation_state": (
+                    update.conversation_state
+                    if update.conversation_state is not None else null()
+                ),
+            }
+            for session_id, update in batch.items()
+        ])
+        stored_state = SessionHistory.conversation_state
+        new_state = stmt.excluded.conversation_state
+        return stmt.on_conflict_do_update(
+            index_elements=[SessionHistory.session_id],
+            set_={
+                "message_count": SessionHistory.message_count + stmt.excluded.message_count,
+                "token_usage": SessionHistory.token_usage + stmt.excluded.token_usage,
+                "task_type": func.coalesce(stmt.excluded.task_type, SessionHistory.task_type),
+                "user_id": func.coalesce(stmt.excluded.user_id, SessionHistory.user_id),
+                "last_active": stmt.excluded.last_active,
+                # Another worker may have stored a newer revision meanwhile
+                "conversation_state": case(
+                    (new_state.is_(None), stored_state),
+                    (
+                        func.coalesce(new_state["revision"].as_integer(), 0)
+                        >= func.coalesce(stored_state["revision"].as_integer(), 0),
+                        new_state,
+                    ),
+                    else_=stored_state,
+                ),
+            },
+        )
+
+    def _requeue(self, batch: Dict[str, _PendingUpdate]) -> None:
+        for session_id, update in batch.items():
+            pending = self._pending.get(session_id)
+            if pending is None:
+                self._pending[session_id] = update
+            else:
+                pending.messages += update.messages
+                pending.tokens += update.tokens
+                pending.task_type = pending.task_type or update.task_type
+                pending.user_id = pending.user_id or update.user_id
+                if state_revision(update.conversation_state) > state_revision(pending.conversation_state):
+                    pending.conversation_state = update.conversation_state
+            self._event_count += 1
+
+
+# Global session writer instance
+_session_writer: Optional[SessionHistoryWriter] = None
+
+
+def get_session_writer() -> SessionHistoryWriter:
+    """Get or create global session history writer instance."""
+    global _session_writer
+    if _session_writer is None:
+        _session_writer = SessionHistoryWriter(
+            flush_interval_ms=int(os.getenv("SESSION_FLUSH_INTERVAL_MS", "250")),
+            max_events=int(os.getenv("SESSION_FLUSH_MAX_EVENTS", "100")),
+        )
+    return _session_writer
+
+
+__all__ = ["SessionHistoryWriter", "get_session_writer"]
@@ -0,0 +1,242 @@
+"""Compiled skill normalization index.
+
+Builds one token trie from the skill vocabularies spread through the
+module files, so JD parsing, resume parsing, matching and Boolean
+generation share the same canonical skill names:
+
+- s1ngularity-advanced-matching.json: equivalent, adjacent and
+  complementary skill names (each stays its own skill - the scorer weighs
+  those relationships)
+- s1ngularity-boolean-engine-v1.json: spelling, symbol and abbreviation
+  families ("Amazon Web Services" / "AWS", "C Sharp" / "C#", "front-end" /
+  "frontend"), which collapse to one canonical name
+
+`extract` finds canonical skills in free text in one left-to-right pass
+(longest multi-word match at each token, word boundaries from the
+tokenizer), memoized per document hash.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MATCHING_SPEC = "s1ngularity-advanced-matching.json"
+BOOLEAN_SPEC = "s1ngularity-boolean-engine-v1.json"
+
+# Words, dotted names (ASP.NET, Node.js, .NET) and symbol names (C#, C++);
+# hyphens and slashes separate tokens, so "front-end" == "front end"
+_TOKEN_RE = re.compile(r"\.?[A-Za-z0-9][A-Za-z0-9+#]*(?:\.[A-Za-z0-9+#]+)*")
+# Module files contain bare ranges such as `"score": 0.6-0.9`
+_BARE_RANGE_RE = re.compile(r":\s*(\d+(?:\.\d+)?-\d+(?:\.\d+)?)(\s*[,}\n])")
+# Surface forms this short (AD, CI, CD, Go, JS) only match with exact case
+_CASE_SENSITIVE_MAX_CHARS = 2
+_END = ""
+
+
+def load_spec(path: Path) -> Dict:
+    """Load a module file, quoting bare numeric ranges that break strict JSON."""
+    text = path.read_text(encoding="utf-8")
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(_BARE_RANGE_RE.sub(r': "\1"\2', text))
+
+
+def display_name(name: str) -> str:
+    """Readable skill name from a spec key ("CI_CD" -> "CI/CD", "Data_Engineer" -> "Data Engineer")."""
+    return "CI/CD" if name == "CI_CD" else name.replace("_", " ")
+
+
+def skill_tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text)
+
+
+class SkillNormalizer:
+    """Token trie mapping surface forms to canonical skill names."""
+
+    def __init__(self, memo_size: int = 4096):
+        """Initialize an empty normalizer.
+
+        Args:
+            memo_size: Documents whose extraction result is memoized (LRU)
+        """
+        self.memo_size = memo_size
+        self._trie: Dict = {}
+        self._canonical: Dict[Tuple[str, ...], str] = {}
+        self._memo: "OrderedDict[bytes, Tuple[str, ...]]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_specs(cls, modules_dir: Optional[Path] = None, memo_size: int = 4096) -> "SkillNormalizer":
+        """Compile the matching taxonomy and Boolean variant families."""
+        modules_dir = modules_dir or Path(os.getenv("MODULES_DIR", "."))
+        normalizer = cls(memo_size=memo_size)
+
+        relationships = load_spec(modules_dir / MATCHING_SPEC)["skills_taxonomy"]["skill_relationships"]
+        primary: List[str] = []
+        vocabulary: List[str] = []
+        for canonical, aliases in relationships["equivalent_skills"]["examples"].items():
+            primary.append(display_name(canonical))
+            vocabulary.extend(aliases)
+        for section in ("adjacent_skills", "complementary_skills"):
+            for skill, config in relationships[section]["examples"].items():
+                primary.append(display_name(skill))
+                vocabulary.extend(config.get("adjacent", []))
+                vocabulary.extend(config.get("suggests_familiarity_with", []))
+
+        boolean = load_spec(modules_dir / BOOLEAN_SPEC)
+        variants = boolean["variant_generation"]["variant_types"]
+        spelling = boolean["tech_spelling_variant_rules"]
+        families: List[List[str]] = []
+        for examples in (
+            variants["tech_spelling_variants"]["dot_separated"]["examples"],
+            variants["tech_spelling_variants"]["hyphenated"]["examples"],
+            variants["tech_spelling_variants"]["symbols"]["mappings"],
+            variants["abbreviation_pairs"]["pairs"],
+            spelling["dot_separated_names"]["examples"],
+            spelling["hyphenated_names"]["examples"],
+        ):
+            families.extend(examples.values())
+        families.extend(mapping["variants"] for mapping in spelling["symbol_expansions"]["mappings"].values())
+        for group in spelling["abbreviation_pairs"]["approved_pairs"].values():
+            families.extend(group.values())
+
+        # Canonical form of a family: a matching-taxonomy key, else any
+        # taxonomy name, else the family's first form
+        ranks = {skill.lower(): 0 for skill in primary}
+        for name in vocabulary:
+            ranks.setdefault(name.lower(), 1)
+        for family in families:
+            canonical = min(family, key=lambda form: (ranks.get(form.lower(), 2), family.index(form)))
+            for form in family:
+                # An ambiguous form (CD: Deployment / Delivery) keeps its first family
+                normalizer.add(form, canonical, replace=False)
+
+        for name in primary + vocabulary:
+            normalizer.add(name, name, replace=False)
+        return normalizer
+
+    @classmethod
+    def from_terms(cls, terms: Iterable[str]) -> "SkillNormalizer":
+        """Normalizer for ad-hoc skill names (each its own canonical form)."""
+        normalizer = cls(memo_size=0)
+        for term in terms:
+            normalizer.add(term, term.strip(), replace=False)
+        return normalizer
+
+    def add(self, surface: str, canonical: str, replace: bool = True) -> None:
+        """Register a surface form of a canonical skill."""
+        tokens = skill_tokens(surface)
+        if not tokens:
+            return
+        key = tuple(token.lower() for token in tokens)
+        if not replace and key in self._canonical:
+            return
+        # A family member already registered under another name follows it
+        canonical = self._canonical.get(tuple(t.lower() for t in skill_tokens(canonical)), canonical)
+        self._canonical[key] = canonical
+
+        node = self._trie
+        for token in key:
+            node = node.setdefault(token, {})
+        exact = tuple(tokens) if len(surface.strip()) <= _CASE_SENSITIVE_MAX_CHARS else None
+        node[_END] = (canonical, exact)
+        self._memo.clear()
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    @property
+    def skills(self) -> List[str]:
+        """Distinct canonical skill names."""
+        return sorted(set(self._canonical.values()))
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def canonical(self, name: str) -> str:
+        """Canonical name of a whole skill string (the cleaned input if unknown)."""
+        tokens = skill_tokens(name)
+        return self._canonical.get(tuple(t.lower() for t in tokens), " ".join(name.split()))
+
+    def find(self, text: str) -> List[Tuple[str, int, int]]:
+        """All skill mentions as (canonical, start, end) character spans.
+
+        One pass over the tokens; at each position the longest known phrase
+        wins and scanning resumes after it.
+        """
+        matches = [m for m in _TOKEN_RE.finditer(text)]
+        lowered = [m.group(0).lower() for m in matches]
+        found = []
+        position, count = 0, len(matches)
+        while position < count:
+            node = self._trie.get(lowered[position])
+            best: Optional[Tuple[str, int]] = None
+            end = position
+            while node is not None:
+                terminal = node.get(_END)
+                if terminal is not None:
+                    canonical, exact = terminal
+                    if exact is None or exact == tuple(m.group(0) for m in matches[position:end + 1]):
+                        best = (canonical, end)
+                end += 1
+                node = node.get(lowered[end]) if end < count else None
+            if best is None:
+                position += 1
+                continue
+            canonical, last = best
+            found.append((canonical, matches[position].start(), matches[last].end()))
+            position = last + 1
+        return found
+
+    def extract(self, text: str) -> List[str]:
+        """Distinct canonical skills in a text, in order of first mention."""
+        if self.memo_size <= 0:
+            return list(dict.fromkeys(canonical for canonical, _, _ in self.find(text)))
+        digest = hashlib.blake2b(text.encode("utf-8", "replace"), digest_size=16).digest()
+        cached = self._memo.get(digest)
+        if cached is None:
+            cached = tuple(dict.fromkeys(canonical for canonical, _, _ in self.find(text)))
+            self._memo[digest] = cached
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        else:
+            self._memo.move_to_end(digest)
+        return list(cached)
+
+    def extract_many(self, texts: Iterable[str]) -> List[List[str]]:
+        """Batch `extract` (documents seen before are served from the memo)."""
+        return [self.extract(text) for text in texts]
+
+
+# Global skill normalizer instance
+_skill_normalizer: Optional[SkillNormalizer] = None
+
+
+def get_skill_normalizer() -> SkillNormalizer:
+    """Get or create global skill normalizer instance."""
+    global _skill_normalizer
+    if _skill_normalizer is None:
+        _skill_normalizer = SkillNormalizer.from_specs(
+            memo_size=int(os.getenv("SKILL_INDEX_MEMO_SIZE", "4096")),
+        )
+    return _skill_normalizer
+
+
+__all__ = [
+    "SkillNormalizer",
+    "display_name",
+    "get_skill_normalizer",
+    "load_spec",
+    "skill_tokens",
+]
@@ -0,0 +1,41 @@
+"""Tests for the near-duplicate response cache."""
+
+import pytest
+
+from module_loader import TaskType
+from response_cache import ResponseCache, normalize_tokens
+
+STORED = "write a boolean search for java and python developers"
+
+
+@pytest.fixture
+def cache():
+    cache = ResponseCache(audit_rate=0.0)
+    cache.store(STORED, TaskType.BOOLEAN_SEARCH, "v1", '"java" AND "python"')
+    return cache
+
+
+@pytest.mark.parametrize("message", [
+    "write a boolean search for java or python developers",
+    "write a boolean search for java not python developers",
+    "write a boolean search for java OR python developers",
+    "write a boolean search for java python developers",
+])
+def test_boolean_operator_variants_miss(cache, message):
+    assert cache.lookup(message, TaskType.BOOLEAN_SEARCH, "v1") is None
+
+
+def test_boolean_wording_variants_hit(cache):
+    hit = cache.lookup(
+        "Write a Boolean search for Java AND Python developers!",
+        TaskType.BOOLEAN_SEARCH,
+        "v1",
+    )
+    assert hit is not None
+    assert hit.entry.response == '"java" AND "python"'
+
+
+def test_lowercase_operators_are_stopwords_outside_boolean_search():
+    tokens = normalize_tokens("salary for java and python developers", TaskType.SALARY_RESEARCH)
+    assert "and" not in tokens
+    assert "and" in normalize_tokens("java and python", TaskType.BOOLEAN_SEARCH)
@@ -1,4 +1,4 @@
-"""OpenAI function/tool schemas for JobDiva integration."""
+"""OpenAI function/tool schemas for JobDiva integration and local tools."""
 
 from __future__ import annotations
 
@@ -73,6 +73,36 @@ TOOLS_CONFIG = [
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "compile_boolean_search",
+            "description": "Deterministically compile concept buckets into a recruiter-grade Boolean search string (rules from s1ngularity-boolean-engine-v1.json). Prefer this over writing Boolean strings by hand.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "buckets": {
+                        "type": "array",
+                        "description": "Concept buckets extracted from the JD",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "name": {"type": "string", "description": "TITLES, CORE_TECH, PLATFORMS, ACCESS_SECURITY, DOMAIN, SOFT_FILTERS"},
+                                "terms": {"type": "array", "items": {"type": "string"}, "description": "Base terms as written in the JD"},
+                                "priority": {"type": "string", "enum": ["MUST", "STRONG", "OPTIONAL"]},
+                            },
+                            "required": ["name", "terms"],
+                        },
+                    },
+                    "platform": {"type": "string", "enum": ["generic", "linkedin_recruiter", "dice", "indeed", "ats_generic"]},
+                    "mode": {"type": "string", "enum": ["tight", "standard", "wide", "staged"]},
+                    "exclusions": {"type": "array", "items": {"type": "string"}, "description": "Only terms the user explicitly excluded"},
+                    "locations": {"type": "array", "items": {"type": "string"}, "description": "Only locations the user explicitly requested"},
+                },
+                "required": ["buckets"],
+            },
+        },
+    },
 ]
 
 __all__ = ["TOOLS_CONFIG"]
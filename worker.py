@@ -0,0 +1,77 @@
+"""
+Background job worker for S1NGULARITY.
+
+Runs jobs from the `background_jobs` queue (see job_queue.py) outside the
+web process, so bulk imports, batch screening, rollups and archiving scale
+independently of request handling:
+
+    python worker.py --concurrency 4
+
+SIGINT/SIGTERM stop claiming new jobs; running jobs get a grace period and
+are then released back to the queue for another worker.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+
+from database import init_db
+from job_queue import JobWorker, get_job_queue, registered_kinds
+from session_writer import get_session_writer
+
+import main  # noqa: F401  (registers the job handlers)
+
+
+async def run_worker(concurrency: int, poll_interval: float, grace_seconds: float) -> None:
+    """Run a job worker until SIGINT/SIGTERM."""
+    await init_db()
+    session_writer = get_session_writer()
+    session_writer.start()
+
+    queue = get_job_queue()
+    worker = JobWorker(
+        queue,
+        concurrency=concurrency,
+        poll_interval=poll_interval,
+        shutdown_grace_seconds=grace_seconds,
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    print(f"📋 Job kinds: {', '.join(registered_kinds())}")
+    runner = asyncio.create_task(worker.run())
+    await stop.wait()
+
+    print("👋 Stopping job worker...")
+    await worker.stop()
+    await runner
+    await session_writer.stop()
+    print("✅ Job worker stopped")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Run S1NGULARITY background jobs")
+    parser.add_argument(
+        "--concurrency", type=int,
+        default=int(os.getenv("JOB_WORKER_CONCURRENCY", "2")),
+        help="Jobs run at the same time (default: JOB_WORKER_CONCURRENCY or 2)",
+    )
+    parser.add_argument(
+        "--poll-interval", type=float,
+        default=float(os.getenv("JOB_POLL_INTERVAL", "2")),
+        help="Seconds between queue checks when idle and Redis is unavailable",
+    )
+    parser.add_argument(
+        "--grace", type=float,
+        default=float(os.getenv("JOB_SHUTDOWN_GRACE_SECONDS", "30")),
+        help="Seconds running jobs get to finish on shutdown",
+    )
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.concurrency, args.poll_interval, args.grace))
+
+
+if __name__ == "__main__":
+    main_cli()